@@ -0,0 +1,290 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""
+Benchmarks for collection materialization and command dispatch.
+
+Generates synthetic collections, measures the main phases of
+``antsibull-tool run-local-collection``, and stores the results as JSON in
+``.benchmarks/`` so that they can be compared across commits::
+
+    nox -e benchmark -- --files 5000 --compare .benchmarks/<older result>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+from collections.abc import Callable
+from pathlib import Path
+
+from antsibull_tool import collection
+from antsibull_tool import vcs as git_vcs
+from antsibull_tool.files import list_files
+from antsibull_tool.store import ObjectStore
+from antsibull_tool.tree import sync_tree
+
+_GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Benchmark",
+    "GIT_AUTHOR_EMAIL": "benchmark@example.com",
+    "GIT_COMMITTER_NAME": "Benchmark",
+    "GIT_COMMITTER_EMAIL": "benchmark@example.com",
+}
+
+
+def generate_collection(
+    path: Path, *, files: int, depth: int, total_bytes: int, git: bool
+) -> None:
+    """
+    Create a collection with ``files`` files spread over ``depth`` directory levels.
+    """
+    path.mkdir(parents=True)
+    (path / "galaxy.yml").write_text(
+        "namespace: bench\nname: collection\nversion: 1.0.0\n"
+        "dependencies: {}\nbuild_ignore:\n"
+        + "".join(f"  - ignored{i}\n" for i in range(100)),
+        encoding="utf-8",
+    )
+    file_size = total_bytes // max(files, 1)
+    content = b"#" * file_size
+    for i in range(files):
+        directory = path / "plugins"
+        for level in range(depth):
+            directory = directory / f"dir{level}_{i % (level + 2)}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i}.py").write_bytes(content)
+    if git:
+        env = {**os.environ, **_GIT_ENV}
+        for argv in (
+            ["git", "init", "-q"],
+            ["git", "add", "."],
+            ["git", "commit", "-q", "-m", "Initial commit"],
+        ):
+            subprocess.run(argv, cwd=path, env=env, check=True)
+
+
+def measure(
+    func: Callable[[], t.Any],
+    *,
+    repeat: int,
+    setup: Callable[[], t.Any] | None = None,
+) -> dict[str, float]:
+    """
+    Run ``func`` ``repeat`` times and return statistics of the wall clock times.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+    }
+
+
+def _run_vcs_benchmarks(
+    path: Path, *, vcs: t.Literal["none", "git"], repeat: int
+) -> dict[str, dict[str, float]]:
+    # pylint: disable-next=protected-access
+    clear_listing_cache = git_vcs._LISTING_CACHE.clear
+    results = {
+        "detect_vcs": measure(
+            lambda: git_vcs.detect_vcs(path), repeat=repeat, setup=clear_listing_cache
+        )
+    }
+    if vcs == "git":
+        # Only listings of trees that did not change within the last second are
+        # cached
+        time.sleep(1.1)
+        results["list_git_files"] = measure(
+            lambda: git_vcs.list_git_files_cached(path),
+            repeat=repeat,
+            setup=clear_listing_cache,
+        )
+        results["list_git_files_cached"] = measure(
+            lambda: git_vcs.list_git_files_cached(path), repeat=repeat
+        )
+    return results
+
+
+def run_benchmarks(
+    path: Path, work_dir: Path, *, vcs: t.Literal["none", "git"], repeat: int
+) -> dict[str, dict[str, float]]:
+    """
+    Run all benchmarks for the collection in ``path``.
+    """
+    results: dict[str, dict[str, float]] = {}
+    files = list_files(path, vcs)
+    dest = work_dir / "dest"
+
+    def remove_dest() -> None:
+        shutil.rmtree(dest, ignore_errors=True)
+
+    results["load_collection_details"] = measure(
+        lambda: collection.load_collection_details(path),
+        repeat=repeat,
+        setup=collection._DETAILS_CACHE.clear,  # pylint: disable=protected-access
+    )
+    results["load_collection_details_cached"] = measure(
+        lambda: collection.load_collection_details(path), repeat=repeat
+    )
+    results.update(_run_vcs_benchmarks(path, vcs=vcs, repeat=repeat))
+    results["list_files"] = measure(lambda: list_files(path, vcs), repeat=repeat)
+    for strategy in ("copy", "hardlink"):
+        results[f"sync_tree_{strategy}"] = measure(
+            functools.partial(sync_tree, path, dest, files, strategy=strategy),
+            repeat=repeat,
+            setup=remove_dest,
+        )
+    with ObjectStore(work_dir / "store") as store:
+        results["sync_tree_store"] = measure(
+            functools.partial(
+                sync_tree, path, dest, files, strategy="store", store=store
+            ),
+            repeat=repeat,
+            setup=remove_dest,
+        )
+    # Bring dest into the state a copy creates
+    sync_tree(path, dest, files)
+    results["sync_tree_unchanged"] = measure(
+        lambda: sync_tree(path, dest, files), repeat=repeat
+    )
+    results["run_local_collection"] = measure(
+        lambda: subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "antsibull_tool.cli",
+                "run-local-collection",
+                f"--vcs={vcs}",
+                "--",
+                "true",
+            ],
+            cwd=path,
+            check=True,
+        ),
+        repeat=repeat,
+    )
+    remove_dest()
+    return results
+
+
+def _get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            encoding="utf-8",
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, t.Any], previous: dict[str, t.Any]) -> None:
+    """
+    Print the median times of ``results`` relative to ``previous``.
+    """
+    print(f"\nComparison with {previous.get('commit')} ({previous.get('date')}):")
+    for vcs, benchmarks in results["results"].items():
+        for name, times in benchmarks.items():
+            old = previous["results"].get(vcs, {}).get(name)
+            if old is None:
+                continue
+            ratio = times["median"] / old["median"] if old["median"] else 0.0
+            print(
+                f"  {vcs:<5} {name:<32} {old['median'] * 1000:>10.2f}ms"
+                f" -> {times['median'] * 1000:>10.2f}ms ({ratio:.2f}x)"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split("\n\n", maxsplit=1)[0]
+    )
+    parser.add_argument("--files", type=int, default=1000, help="Number of files")
+    parser.add_argument("--depth", type=int, default=3, help="Directory depth")
+    parser.add_argument(
+        "--total-bytes", type=int, default=10 * 1024 * 1024, help="Total file size"
+    )
+    parser.add_argument(
+        "--vcs",
+        choices=["none", "git", "both"],
+        default="both",
+        help="Whether the collection is a git checkout",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument(
+        "--output-dir",
+        default=".benchmarks",
+        help="Directory to store the results in",
+    )
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    args = parser.parse_args()
+
+    result: dict[str, t.Any] = {
+        "commit": _get_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "files": args.files,
+            "depth": args.depth,
+            "total_bytes": args.total_bytes,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    vcses: list[t.Literal["none", "git"]] = (
+        ["none", "git"] if args.vcs == "both" else [args.vcs]
+    )
+    for vcs in vcses:
+        with tempfile.TemporaryDirectory(prefix="antsibull-tool-bench") as tmp:
+            path = Path(tmp) / "collection"
+            generate_collection(
+                path,
+                files=args.files,
+                depth=args.depth,
+                total_bytes=args.total_bytes,
+                git=vcs == "git",
+            )
+            result["results"][vcs] = benchmarks = run_benchmarks(
+                path, Path(tmp), vcs=vcs, repeat=args.repeat
+            )
+        for name, times in benchmarks.items():
+            print(
+                f"{vcs:<5} {name:<32} min {times['min'] * 1000:>10.2f}ms"
+                f"  median {times['median'] * 1000:>10.2f}ms"
+            )
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = output_dir / f"{timestamp}-{result['commit'] or 'unknown'}.json"
+    output.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(result, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -108,6 +108,12 @@ def coverage(session: nox.Session):
     session.run("coverage", "report", "-m")
 
 
+@nox.session
+def benchmark(session: nox.Session):
+    install(session, ".", *other_antsibull(), editable=True)
+    session.run("python", "benchmarks/benchmark.py", *session.posargs)
+
+
 @nox.session
 def lint(session: nox.Session):
     session.notify("formatters")
@@ -121,8 +127,8 @@ def formatters(session: nox.Session):
     posargs = list(session.posargs)
     if IN_CI:
         posargs.append("--check")
-    session.run("isort", *posargs, "src", "tests", "noxfile.py")
-    session.run("black", *posargs, "src", "tests", "noxfile.py")
+    session.run("isort", *posargs, "src", "tests", "benchmarks", "noxfile.py")
+    session.run("black", *posargs, "src", "tests", "benchmarks", "noxfile.py")
 
 
 @nox.session
@@ -0,0 +1,337 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Read and extract built collection artifacts in a single streaming pass."""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from antsibull_fileutils.copier import CopierError
+
+from .collection import CollectionDetails, parse_manifest_json
+from .files import FileFilter
+from .tree import SyncStats
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_MANIFEST_JSON = "MANIFEST.json"
+_FILES_JSON = "FILES.json"
+
+# Files up to this size are read into memory and written and verified by the
+# workers; larger files are streamed to disk by the reading thread
+_BUFFERED_FILE_SIZE = 1024 * 1024
+
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+_MAX_PENDING_FILES = 64
+
+# gzip's magic number; its trailer contains the uncompressed size modulo 2**32
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclasses.dataclass(frozen=True)
+class ArtifactMetadata:
+    """
+    The metadata of a collection artifact.
+    """
+
+    details: CollectionDetails
+    #: Maps the paths of the files listed in ``FILES.json`` to their SHA-256
+    #: checksums, or to ``None`` for directories
+    checksums: dict[str, str | None]
+
+
+def _normalize_name(name: str) -> str:
+    name = name[2:] if name.startswith("./") else name
+    normalized = os.path.normpath(name).replace(os.sep, "/")
+    if os.path.isabs(name) or normalized == ".." or normalized.startswith("../"):
+        raise ValueError(f"Member {name!r} is outside of the collection")
+    return normalized
+
+
+def _parse_files_json(content: bytes, expected_checksum: str | None) -> dict:
+    if (
+        expected_checksum is not None
+        and hashlib.sha256(content).hexdigest() != expected_checksum
+    ):
+        raise ValueError(f"Checksum of {_FILES_JSON} does not match {_MANIFEST_JSON}")
+    data = json.loads(content)
+    if not isinstance(data, dict) or not isinstance(data.get("files"), list):
+        raise ValueError(f"Cannot find files in {_FILES_JSON}")
+    return {
+        _normalize_name(entry["name"]): (
+            entry.get("chksum_sha256") if entry.get("ftype") == "file" else None
+        )
+        for entry in data["files"]
+        if entry["name"] != "."
+    }
+
+
+def _read_metadata_members(tar: tarfile.TarFile) -> dict[str, bytes]:
+    contents: dict[str, bytes] = {}
+    for member in tar:
+        name = _normalize_name(member.name)
+        if name in (_MANIFEST_JSON, _FILES_JSON) and member.isfile():
+            f = tar.extractfile(member)
+            if f is not None:
+                contents[name] = f.read()
+        if len(contents) == 2:
+            # ansible-galaxy puts the metadata first, so the rest is not read
+            break
+    return contents
+
+
+def load_artifact_metadata(path: StrPath) -> ArtifactMetadata:
+    """
+    Read ``MANIFEST.json`` and ``FILES.json`` from the collection artifact ``path``.
+
+    The archive is read as a stream and only until both files were found, which
+    are the first members of artifacts built by ``ansible-galaxy``. The checksum
+    of ``FILES.json`` is verified against ``MANIFEST.json``.
+    """
+    try:
+        with tarfile.open(path, mode="r|*") as tar:
+            contents = _read_metadata_members(tar)
+        if _MANIFEST_JSON not in contents or _FILES_JSON not in contents:
+            raise ValueError(f"Cannot find {_MANIFEST_JSON} and {_FILES_JSON}")
+        details, manifest = parse_manifest_json(contents[_MANIFEST_JSON])
+        file_manifest = manifest.get("file_manifest_file") or {}
+        checksums = _parse_files_json(
+            contents[_FILES_JSON], file_manifest.get("chksum_sha256")
+        )
+    except (OSError, tarfile.TarError, ValueError, KeyError, TypeError) as exc:
+        raise ValueError(
+            f"Error while loading collection artifact {path}: {exc}"
+        ) from exc
+    return ArtifactMetadata(details=details, checksums=checksums)
+
+
+def get_artifact_size(path: StrPath) -> int:
+    """
+    Estimate the size of the extracted collection artifact ``path`` in bytes.
+
+    For gzip compressed artifacts, this is the uncompressed size stored in the
+    gzip trailer. Otherwise, it is the size of the file.
+    """
+    with open(path, "rb") as f:
+        if f.read(2) != _GZIP_MAGIC:
+            return os.fstat(f.fileno()).st_size
+        f.seek(-4, os.SEEK_END)
+        return int.from_bytes(f.read(4), "little")
+
+
+def _set_metadata(dest: str, member: tarfile.TarInfo) -> None:
+    # Files need to be readable, executables stay executable
+    os.chmod(dest, (member.mode & 0o755) | 0o600)
+    os.utime(dest, (member.mtime, member.mtime))
+
+
+def _open_new_file(dest: str) -> t.BinaryIO:
+    # Never follow a symlink or replace an existing file
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_NOFOLLOW", 0)
+    return os.fdopen(os.open(dest, flags, 0o600), "wb")
+
+
+def _write_buffered(dest: str, member: tarfile.TarInfo, data: bytes) -> str:
+    with _open_new_file(dest) as f:
+        f.write(data)
+    _set_metadata(dest, member)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_streamed(dest: str, member: tarfile.TarInfo, src: t.IO[bytes]) -> str:
+    hasher = hashlib.sha256()
+    with _open_new_file(dest) as f:
+        while chunk := src.read(_COPY_CHUNK_SIZE):
+            hasher.update(chunk)
+            f.write(chunk)
+    _set_metadata(dest, member)
+    return hasher.hexdigest()
+
+
+class _Extractor:
+    def __init__(
+        self,
+        dest: str,
+        metadata: ArtifactMetadata,
+        *,
+        selected: set[str],
+        verify: bool,
+        log_debug: t.Callable[[str], None] | None,
+    ):
+        self.dest = dest
+        self.real_dest = os.path.realpath(dest)
+        self.metadata = metadata
+        self.selected = selected
+        self.verify = verify
+        self._log_debug = log_debug
+        self.stats = SyncStats()
+        self.mismatches: list[str] = []
+        self.extracted: set[str] = set()
+        #: Directories below ``dest`` that are known to not be symlinks
+        self._directories: set[str] = {""}
+
+    def _do_log_debug(self, msg: str, *args: t.Any) -> None:
+        if self._log_debug:
+            self._log_debug(msg, *args)
+
+    def check(self, name: str, checksum: str) -> None:
+        if not self.verify or name in (_MANIFEST_JSON, _FILES_JSON):
+            return
+        if self.metadata.checksums.get(name) != checksum:
+            self.mismatches.append(f"{name} has checksum {checksum}")
+
+    def _make_directory(self, directory: str) -> None:
+        """
+        Create ``directory`` below ``dest`` with its parents, and make sure that
+        none of them is a symlink, so that nothing is written outside of ``dest``.
+        """
+        if directory in self._directories:
+            return
+        self._make_directory(os.path.dirname(directory))
+        full_dest = os.path.join(self.dest, directory)
+        if os.path.islink(full_dest):
+            raise ValueError(f"Cannot extract below the symlink {directory!r}")
+        if not os.path.isdir(full_dest):
+            os.mkdir(full_dest, mode=0o700)
+        self._directories.add(directory)
+
+    def _extract_symlink(self, name: str, full_dest: str, target: str) -> None:
+        resolved = os.path.realpath(os.path.join(os.path.dirname(full_dest), target))
+        if os.path.isabs(target) or (
+            resolved != self.real_dest
+            and not resolved.startswith(self.real_dest + os.sep)
+        ):
+            raise ValueError(f"Symlink {name!r} points outside of the collection")
+        self._do_log_debug("Creating symlink {!r} to {!r}", full_dest, target)
+        os.symlink(target, full_dest)
+        self.extracted.add(name)
+        self.stats.copied += 1
+
+    def _select(self, name: str) -> bool:
+        if name in self.selected:
+            return True
+        if self.verify and name != "." and name not in self.metadata.checksums:
+            self.mismatches.append(f"{name} is not listed in {_FILES_JSON}")
+        return False
+
+    def _prepare(self, member: tarfile.TarInfo, name: str) -> bool:
+        """
+        Create the directories for ``member``, and extract it if it is a directory
+        or symlink.
+
+        Returns whether the member is a file whose contents need to be written.
+        """
+        if member.isdir():
+            self._make_directory(name)
+            return False
+        self._make_directory(os.path.dirname(name))
+        if member.issym():
+            self._extract_symlink(name, os.path.join(self.dest, name), member.linkname)
+            return False
+        if not member.isfile():
+            self._do_log_debug("Skipping member {!r} of unsupported type", name)
+            return False
+        return True
+
+    def extract(
+        self, tar: tarfile.TarFile, executor: ThreadPoolExecutor, max_pending: int
+    ) -> None:
+        pending: collections.deque[tuple[str, Future[str]]] = collections.deque()
+        for member in tar:
+            name = _normalize_name(member.name)
+            if not self._select(name) or not self._prepare(member, name):
+                continue
+            src = tar.extractfile(member)
+            if src is None:
+                continue
+            full_dest = os.path.join(self.dest, name)
+            self.extracted.add(name)
+            self.stats.copied += 1
+            self.stats.copied_bytes += member.size
+            if member.size > _BUFFERED_FILE_SIZE:
+                self.check(name, _write_streamed(full_dest, member, src))
+                continue
+            pending.append(
+                (
+                    name,
+                    executor.submit(_write_buffered, full_dest, member, src.read()),
+                )
+            )
+            while len(pending) > max_pending:
+                done_name, future = pending.popleft()
+                self.check(done_name, future.result())
+        for done_name, future in pending:
+            self.check(done_name, future.result())
+
+    def check_missing(self) -> None:
+        if not self.verify:
+            return
+        for name, checksum in self.metadata.checksums.items():
+            if checksum is not None and name in self.selected:
+                if name not in self.extracted:
+                    self.mismatches.append(f"{name} is missing")
+
+
+def extract_artifact(
+    path: StrPath,
+    dest: StrPath,
+    metadata: ArtifactMetadata,
+    *,
+    file_filter: FileFilter | None = None,
+    verify: bool = False,
+    workers: int | None = None,
+    log_debug: t.Callable[[str], None] | None = None,
+) -> SyncStats:
+    """
+    Extract the collection artifact ``path`` into the directory ``dest``, which
+    is replaced.
+
+    The archive is read in a single streaming pass. Only the files listed in
+    ``FILES.json`` are extracted; if ``file_filter`` is provided, only those that
+    pass it. Members that would be written outside of ``dest``, also through
+    symlinks, cause an error. The files are written by a pool of ``workers``
+    threads. With ``verify``, their SHA-256 checksums are computed while writing
+    them and compared to ``FILES.json``, and files listed there that are missing
+    as well as members that are not listed cause an error.
+    """
+    names = [_MANIFEST_JSON, _FILES_JSON, *metadata.checksums]
+    selected = set(file_filter.apply(names) if file_filter else names)
+    selected.update((_MANIFEST_JSON, _FILES_JSON))
+    dest = os.fspath(dest)
+    extractor = _Extractor(
+        dest, metadata, selected=selected, verify=verify, log_debug=log_debug
+    )
+    try:
+        if os.path.islink(dest):
+            os.unlink(dest)
+        elif os.path.exists(dest):
+            shutil.rmtree(dest)
+        os.makedirs(dest, mode=0o700)
+        with tarfile.open(path, mode="r|*") as tar:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Bound the memory used by files read but not yet written
+                extractor.extract(tar, executor, max_pending=_MAX_PENDING_FILES)
+    except OSError as exc:
+        raise CopierError(f"Error while extracting {path} to {dest}: {exc}") from exc
+    except tarfile.TarError as exc:
+        raise ValueError(f"Error while extracting {path}: {exc}") from exc
+    extractor.check_missing()
+    if extractor.mismatches:
+        raise ValueError(
+            f"Checksum verification of {path} failed: "
+            + "; ".join(extractor.mismatches[:10])
+        )
+    return extractor.stats
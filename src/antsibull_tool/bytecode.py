@@ -0,0 +1,85 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Compile the Python files of collection trees to bytecode ahead of time."""
+
+from __future__ import annotations
+
+import compileall
+import os
+import re
+import shutil
+import subprocess
+import sys
+import typing as t
+from collections.abc import Sequence
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+# ansible-test writes its results and temporary files there
+_EXCLUDE = re.escape(f"{os.sep}tests{os.sep}output{os.sep}")
+
+
+def _is_current_python(python: str) -> bool:
+    executable = shutil.which(python)
+    return executable is not None and os.path.realpath(executable) == os.path.realpath(
+        sys.executable
+    )
+
+
+def precompile_tree(
+    path: StrPath,
+    *,
+    pythons: Sequence[str] = (),
+    workers: int | None = None,
+    log_debug: t.Callable[..., None] | None = None,
+) -> None:
+    """
+    Compile all Python files below ``path`` with ``workers`` processes (by default
+    one per CPU), so that processes importing them do not need to.
+
+    The files are compiled for every interpreter in ``pythons``, and for the
+    current interpreter if ``pythons`` is empty. Files that cannot be compiled,
+    for example because they use syntax of another Python version, are skipped.
+
+    Nothing is compiled if ``path`` is a symlink, since the bytecode would be
+    written into the directory it points to, like a collection checkout.
+    Symlinked directories below ``path`` are skipped by :mod:`compileall`.
+    """
+    path = os.fspath(path)
+    if os.path.islink(path):
+        if log_debug:
+            log_debug("Not compiling symlink {!r}", path)
+        return
+    for python in pythons or [sys.executable]:
+        if log_debug:
+            log_debug("Compiling {!r} for {!r}", path, python)
+        if _is_current_python(python):
+            compileall.compile_dir(
+                path,
+                rx=re.compile(_EXCLUDE),
+                quiet=2,
+                workers=workers or 0,
+            )
+            continue
+        try:
+            subprocess.run(
+                [
+                    python,
+                    "-m",
+                    "compileall",
+                    "-qq",
+                    "-j",
+                    str(workers or 0),
+                    "-x",
+                    _EXCLUDE,
+                    path,
+                ],
+                check=False,
+                stdin=subprocess.DEVNULL,
+            )
+        except OSError as exc:
+            raise ValueError(f"Cannot run {python} to compile {path}: {exc}") from exc
@@ -11,8 +11,10 @@
 from __future__ import annotations
 
 import argparse
+import copy
 import os
 import os.path
+import shlex
 import sys
 from collections.abc import Callable
 from importlib import import_module
@@ -24,31 +26,19 @@ try:
 except ImportError:
     HAS_ARGCOMPLETE = False
 
-import twiggy  # type: ignore[import]
-from antsibull_core.logging import initialize_app_logging, log
-
-initialize_app_logging()
-
-# We have to call initialize_app_logging() before these imports so that the log object is configured
-# correctly before other antisbull modules make copies of it.
-# pylint: disable=wrong-import-position
-from antsibull_core import app_context  # noqa: E402
-from antsibull_core.args import (  # noqa: E402
+from antsibull_core.args import (
     InvalidArgumentError,
     get_toplevel_parser,
     normalize_toplevel_options,
 )
-from antsibull_core.compat import BooleanOptionalAction  # noqa: E402
-from antsibull_core.config import ConfigError, load_config  # noqa: E402
-
-import antsibull_tool  # noqa: E402
-
-from .schemas.app_context import ToolAppContext  # noqa: E402
+from antsibull_core.compat import BooleanOptionalAction
 
-# pylint: enable=wrong-import-position
+import antsibull_tool
+from antsibull_tool.limits import ResourceLimits
 
-
-mlog = log.fields(mod=__name__)
+# Logging, configuration loading, and the app context pull in twiggy and pydantic.
+# They are only imported in run() once the arguments have been parsed, so that
+# --help and shell completion stay fast.
 
 
 def _create_loader(module: str, function: str) -> Callable[[], Callable[[], int]]:
@@ -63,9 +53,124 @@ def _create_loader(module: str, function: str) -> Callable[[], Callable[[], int]
 #: The functions need to take a single argument, the processed list of args.
 ARGS_MAP: dict[str, Callable[[], Callable[[], int]]] = {
     "run-local-collection": _create_loader("run", "run_local_collection"),
+    "run-collections": _create_loader("run", "run_collections"),
+    "daemon": _create_loader("daemon", "run_daemon"),
 }
 
 
+_SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def _parse_size(value: str) -> int:
+    """
+    Parse a size in bytes with an optional K, M, G, or T suffix (powers of 1024).
+    """
+    number = value.strip().upper().removesuffix("B")
+    suffix = ""
+    if number and number[-1] in _SIZE_SUFFIXES:
+        number, suffix = number[:-1], number[-1]
+    try:
+        size = int(float(number) * _SIZE_SUFFIXES[suffix])
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}") from exc
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"size must not be negative: {value!r}")
+    return size
+
+
+def _parse_matrix(specs: list[str]) -> dict[str, list[str]]:
+    matrix: dict[str, list[str]] = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        if not sep or not name.isidentifier():
+            raise InvalidArgumentError(
+                f"--matrix must be of the form NAME=VALUE[,VALUE...]: {spec!r}"
+            )
+        if name in matrix:
+            raise InvalidArgumentError(f"--matrix variable {name} specified twice")
+        matrix[name] = values.split(",")
+    return matrix
+
+
+def _parse_commands(args: argparse.Namespace) -> list[list[str]]:
+    commands: list[list[str]] = []
+    if args.argv:
+        commands.append(args.argv)
+    for command in args.extra_commands:
+        try:
+            argv = shlex.split(command)
+        except ValueError as exc:
+            raise InvalidArgumentError(
+                f"Cannot parse command {command!r}: {exc}"
+            ) from exc
+        if not argv:
+            raise InvalidArgumentError("--command must not be empty")
+        commands.append(argv)
+    if not commands:
+        raise InvalidArgumentError("At least one command must be specified")
+    return commands
+
+
+def _normalize_run_local_collection_options(args: argparse.Namespace) -> None:
+    args.commands = _parse_commands(args)
+    args.matrix = _parse_matrix(args.matrix)
+    if args.matrix or args.changed_since is not None:
+        args.template = True
+    if args.changed_only and args.changed_since is None:
+        raise InvalidArgumentError("--changed-only requires --changed-since")
+
+    if args.watch_interval <= 0:
+        raise InvalidArgumentError("--watch-interval must be positive")
+    if args.watch_debounce < 0:
+        raise InvalidArgumentError("--watch-debounce must not be negative")
+    if args.result_cache and args.watch:
+        raise InvalidArgumentError("--result-cache cannot be used with --watch")
+    _check_artifact_options(args)
+
+
+def _check_artifact_options(args: argparse.Namespace) -> None:
+    if args.artifact is None:
+        if args.verify_checksums:
+            raise InvalidArgumentError("--verify-checksums requires --artifact")
+        return
+    if args.watch:
+        raise InvalidArgumentError("--artifact cannot be used with --watch")
+    if args.changed_since is not None:
+        raise InvalidArgumentError("--artifact cannot be used with --changed-since")
+    if args.materialize != "copy":
+        raise InvalidArgumentError("--artifact requires --materialize copy")
+
+
+def _normalize_collection_tree_options(args: argparse.Namespace) -> None:
+    if args.jobs < 1:
+        raise InvalidArgumentError("--jobs must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        raise InvalidArgumentError("--workers must be at least 1")
+    if args.pool_size < 1:
+        raise InvalidArgumentError("--pool-size must be at least 1")
+    if args.pool_size > 1 and args.cache_dir is None:
+        raise InvalidArgumentError("--pool-size requires --cache-dir")
+    if args.output_log_backups < 0:
+        raise InvalidArgumentError("--output-log-backups must not be negative")
+    if args.timeout is not None and args.timeout <= 0:
+        raise InvalidArgumentError("--timeout must be positive")
+    if args.tmp_root is not None and args.cache_dir is not None:
+        raise InvalidArgumentError(
+            "--tmp-root cannot be used together with --cache-dir"
+        )
+    _check_resource_limits(args)
+
+
+def _check_resource_limits(args: argparse.Namespace) -> None:
+    limits = ResourceLimits(
+        max_memory=args.max_memory, max_cpu_time=args.max_cpu_time, nice=args.nice
+    )
+    try:
+        limits.validate()
+    except ValueError as exc:
+        raise InvalidArgumentError(str(exc)) from exc
+
+
 def parse_args(program_name: str, args: list[str]) -> argparse.Namespace:
     """
     Parse and coerce the command line arguments.
@@ -75,9 +180,6 @@ def parse_args(program_name: str, args: list[str]) -> argparse.Namespace:
     :returns: A :python:obj:`argparse.Namespace`
     :raises InvalidArgumentError: Whenever there's something wrong with the arguments.
     """
-    flog = mlog.fields(func="parse_args")
-    flog.fields(program_name=program_name, raw_args=args).info("Enter")
-
     parser = get_toplevel_parser(
         prog=program_name,
         package="antsibull_tool",
@@ -90,69 +192,577 @@ def parse_args(program_name: str, args: list[str]) -> argparse.Namespace:
     )
     subparsers.required = True
 
+    collection_tree_parser = argparse.ArgumentParser(add_help=False)
+    collection_tree_parser.add_argument(
+        "--vcs",
+        choices=["auto", "none", "git"],
+        default="auto",
+        help="The VCS to use to determine which files to copy.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--template",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Use Python string templating for commands."
+        " Variables: {cwd}, {root_path}, {collection_path}, {namespace},"
+        " {name}, {collection_name}, and the variables of --matrix. With"
+        " --changed-since, an argument that is exactly {changed_files} is replaced"
+        " by the changed files, one argument per file",
+    )
+
+    collection_tree_parser.add_argument(
+        "--cache-dir",
+        help="Keep the collection tree in this directory between runs instead of"
+        " creating a new temporary copy every time. Only files that changed since"
+        " the last run are copied, and removed files are deleted.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--materialize",
+        choices=["copy", "hardlink", "reflink", "symlink", "store"],
+        default="copy",
+        help="How to place the collection's files into the collection tree."
+        " 'hardlink' and 'reflink' fall back to copying if the filesystem does not"
+        " support them. Note that with 'hardlink', modifying a file in the tree"
+        " modifies the original. 'symlink' links the whole checkout, ignoring --vcs;"
+        " this does not work with tools that resolve the current working directory,"
+        " like ansible-test. 'store' hardlinks the files from a content-addressed"
+        " store (see --store-dir), so that trees share identical files and"
+        " unchanged files are neither read nor copied again; the files in the tree"
+        " are read-only.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--store-dir",
+        metavar="DIR",
+        help="The object store used by --materialize store. Must be on the same"
+        " filesystem as the collection tree. Default: 'store' in --cache-dir if"
+        " provided, otherwise antsibull-tool/store in the user's cache directory.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--store-max-size",
+        metavar="SIZE",
+        type=_parse_size,
+        default="5G",
+        help="After running, remove the least recently used objects that are not"
+        " part of any collection tree until the object store is at most this"
+        " large, in bytes or with a K, M, G, or T suffix. Default: 5G.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of threads that copy, link, and hash files when"
+        " materializing the collection tree. Small files are handled in batches,"
+        " large files are copied with copy_file_range() or sendfile() if possible."
+        " Default: as many as Python's ThreadPoolExecutor uses, which depends on"
+        " the number of CPUs.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--pool-size",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Keep up to N collection trees in --cache-dir for the same collection"
+        " or workspace, so that up to N runs, for example concurrent CI jobs on"
+        " the same runner, can use their own tree at the same time. Every run"
+        " locks a tree that is not in use and only synchronizes the files that"
+        " changed, or waits until a tree becomes available. Default: 1.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--precompile",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Compile the Python files of the collection tree to bytecode in"
+        " parallel before running the commands, so that the commands do not need"
+        " to compile them when importing them. Bytecode in __pycache__"
+        " directories is kept in cached trees, so only changed files need to be"
+        " compiled again.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--precompile-python",
+        metavar="PYTHON",
+        action="append",
+        default=[],
+        help="With --precompile, compile the bytecode for this Python interpreter."
+        " Can be specified multiple times. Default: the interpreter running"
+        " antsibull-tool.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--pin-collections-path",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Only put the collection tree on Ansible's collection search path,"
+        " instead of prepending it to ANSIBLE_COLLECTIONS_PATH. Use with"
+        " --with-dependencies to link the dependencies into the tree. Otherwise,"
+        " the search path is deduplicated and entries that do not exist are"
+        " removed.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--with-dependencies",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Also place the collection's dependencies into the collection tree,"
+        " so the command can run without installing them. Dependencies are"
+        " searched in the paths provided with --dependency-path, in checkouts next"
+        " to the collection, and in the installed collections from"
+        " ANSIBLE_COLLECTIONS_PATH or Ansible's default locations. The first"
+        " collection whose version satisfies the requirement is linked into the"
+        " tree.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--dependency-path",
+        dest="dependency_paths",
+        metavar="PATH",
+        action="append",
+        default=[],
+        help="A directory containing collection checkouts, or a collection path"
+        " containing an ansible_collections tree, to search for dependencies"
+        " with --with-dependencies. Can be specified multiple times.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--include",
+        metavar="PATTERN",
+        action="append",
+        default=[],
+        help="Only place files matching this shell-style pattern, relative to the"
+        " collection's root, into the collection tree. A pattern matching a"
+        " directory includes everything below it. Can be specified multiple times."
+        " galaxy.yml and MANIFEST.json are always included.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--exclude",
+        metavar="PATTERN",
+        action="append",
+        default=[],
+        help="Do not place files matching this shell-style pattern, relative to the"
+        " collection's root, into the collection tree. A pattern matching a"
+        " directory excludes everything below it. Can be specified multiple times.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--build-ignore",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Also exclude the files matching the build_ignore patterns from"
+        " galaxy.yml, like ansible-galaxy collection build does.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--tmp-root",
+        metavar="DIR",
+        help="Create the temporary collection tree in this directory, for example"
+        " on a RAM-backed tmpfs to speed up IO-heavy commands. With 'auto', the"
+        " tree is created in --tmpfs-dir if the files fit into"
+        " --tmp-memory-budget and the free space there, and in the system's"
+        " temporary directory otherwise. Cannot be used with --cache-dir.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--tmpfs-dir",
+        metavar="DIR",
+        default="/dev/shm",
+        help="The RAM-backed directory used by --tmp-root auto. Default: /dev/shm.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--tmp-memory-budget",
+        metavar="SIZE",
+        type=_parse_size,
+        default="1G",
+        help="The maximal size of the collection tree for --tmp-root auto to use"
+        " --tmpfs-dir, in bytes or with a K, M, G, or T suffix. Default: 1G.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--output-log",
+        metavar="FILE",
+        help="Also write the commands' output to this file, line by line and"
+        " annotated with a timestamp, the stream name, and the command's label."
+        " With this option, the output of a single command is forwarded through a"
+        " pipe instead of being inherited, so the command does not write to a"
+        " terminal.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--output-format",
+        choices=["text", "jsonl"],
+        default="text",
+        help="The format of --output-log. 'jsonl' writes one JSON object with the"
+        " keys time, stream, label, and line per line of output. Default: text.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--output-log-max-size",
+        metavar="SIZE",
+        type=_parse_size,
+        default="100M",
+        help="Rotate --output-log before it exceeds this size, in bytes or with a"
+        " K, M, G, or T suffix. 0 disables rotation. Default: 100M.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--output-log-backups",
+        metavar="COUNT",
+        type=int,
+        default=3,
+        help="The number of rotated --output-log files to keep. Default: 3.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--timeout",
+        metavar="SECONDS",
+        type=float,
+        help="Terminate a command, including all processes it started, if it"
+        " runs longer than this. The return code is then 124.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--max-memory",
+        metavar="SIZE",
+        type=_parse_size,
+        help="Limit the virtual memory of every process of a command to this"
+        " size, in bytes or with a K, M, G, or T suffix.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--max-cpu-time",
+        metavar="SECONDS",
+        type=int,
+        help="Limit the CPU time of every process of a command to this many"
+        " seconds.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--nice",
+        metavar="INCREMENT",
+        type=int,
+        help="Run commands with their niceness increased by this value.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The maximal number of commands to run at the same time."
+        " Defaults to the number of CPUs.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--timings",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Print how much wall clock and CPU time the phases of the run took,"
+        " like detecting the VCS, loading the collection details, copying the"
+        " files, and running the command, to stderr when done.",
+    )
+
+    collection_tree_parser.add_argument(
+        "--timings-json",
+        metavar="PATH",
+        help="Write the timings of the phases of the run as JSON to this file.",
+    )
+
     run_local_collection_parser = subparsers.add_parser(
         "run-local-collection",
+        parents=[collection_tree_parser],
         description="Run command in the local collection checkout."
         " The command's return code is returned without modification.",
     )
 
     run_local_collection_parser.add_argument(
-        "argv", metavar="command", nargs="+", help="The command to run."
+        "argv", metavar="command", nargs="*", help="The command to run."
     )
 
     run_local_collection_parser.add_argument(
-        "--vcs",
-        choices=["auto", "none", "git"],
-        default="auto",
-        help="The VCS to use to determine which files to copy.",
+        "--command",
+        dest="extra_commands",
+        metavar="COMMAND",
+        action="append",
+        default=[],
+        help="Additional command to run in the same collection tree. The command is"
+        " split into arguments like a shell would do. Can be specified multiple"
+        " times. All commands are run concurrently, their output is prefixed with"
+        " the command's number. The first non-zero return code is returned.",
     )
 
     run_local_collection_parser.add_argument(
-        "--template",
+        "--matrix",
+        metavar="NAME=VALUE[,VALUE...]",
+        action="append",
+        default=[],
+        help="Run every command once for every combination of the values of all"
+        " matrix variables, concurrently in the same collection tree. The variable"
+        " can be used in the commands as {NAME}. Implies --template. Can be"
+        " specified multiple times.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--changed-since",
+        metavar="REF",
+        help="Determine the files of the collection that were added or modified"
+        " since the merge base of the Git ref REF and HEAD, including uncommitted"
+        " and untracked files. They can be passed to the commands with the"
+        " {changed_files} template variable. If no file changed, no command is"
+        " run. Implies --template.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--changed-only",
         action=BooleanOptionalAction,
         default=False,
-        help="Use Python string templating for commands."
-        " Variables: {cwd}, {root_path}, {collection_path}, {namespace},"
-        " {name}, {collection_name}",
+        help="With --changed-since, only place the changed files into the"
+        " collection tree, together with the files needed to check them:"
+        " galaxy.yml, meta, shared plugin code, test configuration and helpers,"
+        " and the integration targets of changed files. Use --include to add"
+        " more files.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--artifact",
+        metavar="FILE",
+        help="Run in a built collection artifact, like the tarballs created by"
+        " ansible-galaxy collection build, instead of the collection checkout in"
+        " the current directory. Its MANIFEST.json and FILES.json are read first,"
+        " and the files passing --include and --exclude are then extracted into"
+        " the collection tree in a single pass over the archive. The commands run"
+        " in the extracted collection. Cannot be used with --watch and"
+        " --changed-since, and requires --materialize copy.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--verify-checksums",
+        action=BooleanOptionalAction,
+        default=False,
+        help="With --artifact, compare the checksums of the extracted files to"
+        " FILES.json while extracting them, and fail if a file was modified, is"
+        " missing, or is not listed.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--watch",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Keep the collection tree and watch the collection checkout for"
+        " changes. When files change, only the changed files are copied to the"
+        " tree, and the command is run again. A command that is still running is"
+        " terminated first. Stop with Ctrl+C.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="How often to check for changes with --watch. Default: 0.5 seconds.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=0.3,
+        metavar="SECONDS",
+        help="With --watch, wait until no more changes happened for this time"
+        " before running the command again. Default: 0.3 seconds.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Profile antsibull-tool with cProfile and write the statistics to"
+        " this file. They can be inspected with Python's pstats module.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--result-cache",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Cache the output of successful runs, and replay it instead of running"
+        " the commands again if the contents of the collection tree, the commands,"
+        " the environment variables PATH, ANSIBLE_*, PYTHON*, and those provided"
+        " with --result-cache-env, and the versions of antsibull-tool, Python,"
+        " ansible-core, and the commands' executables did not change. The output"
+        " is forwarded through pipes, so the commands do not write to a terminal."
+        " Cannot be used with --watch.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--result-cache-dir",
+        metavar="DIR",
+        help="The directory of the result cache. Default: 'results' in --cache-dir"
+        " if provided, otherwise antsibull-tool/results in the user's cache"
+        " directory.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--result-cache-max-size",
+        metavar="SIZE",
+        type=_parse_size,
+        default="1G",
+        help="Remove the least recently used results once the result cache exceeds"
+        " this size, in bytes or with a K, M, G, or T suffix. Default: 1G.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--result-cache-env",
+        metavar="NAME",
+        action="append",
+        default=[],
+        help="An additional environment variable that is part of the result"
+        " cache key. Can be specified multiple times.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--daemon",
+        action=BooleanOptionalAction,
+        default=False,
+        help="Forward the invocation to a running antsibull-tool daemon (see the"
+        " daemon subcommand), which avoids the startup costs. The daemon runs the"
+        " command with this process' working directory, environment, and standard"
+        " streams. If no daemon is running, the command runs in this process.",
+    )
+
+    run_local_collection_parser.add_argument(
+        "--daemon-socket",
+        metavar="PATH",
+        help="The socket of the daemon to use with --daemon. Default:"
+        " antsibull-tool.sock in $XDG_RUNTIME_DIR, or antsibull-tool-<UID>.sock"
+        " in /tmp if it is not set.",
+    )
+
+    run_collections_parser = subparsers.add_parser(
+        "run-collections",
+        parents=[collection_tree_parser],
+        description="Run command in every collection checkout found in a directory."
+        " All collections are placed in the same collection tree, so they can use"
+        " each other. The command is run concurrently for every collection, its"
+        " output is prefixed with the collection's name. The first non-zero return"
+        " code is returned.",
+    )
+
+    run_collections_parser.add_argument(
+        "argv", metavar="command", nargs="+", help="The command to run."
+    )
+
+    run_collections_parser.add_argument(
+        "--root",
+        default=".",
+        help="The directory to search for collections. Defaults to the current"
+        " directory.",
+    )
+
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        description="Run a daemon that keeps modules, the configuration, and"
+        " collection metadata loaded, so that run-local-collection --daemon"
+        " invocations start without delay. Every invocation runs in a forked child"
+        " process of the daemon.",
+    )
+
+    daemon_parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="The Unix domain socket to listen on. Default: antsibull-tool.sock in"
+        " $XDG_RUNTIME_DIR, or antsibull-tool-<UID>.sock in /tmp if it is not set.",
+    )
+
+    daemon_parser.add_argument(
+        "--idle-timeout",
+        metavar="SECONDS",
+        type=float,
+        help="Exit after no invocation ran for this many seconds. By default, the"
+        " daemon runs until it is terminated.",
     )
 
     # This must come after all parser setup
     if HAS_ARGCOMPLETE:
         argcomplete.autocomplete(parser)
 
-    flog.debug("Argument parser setup")
-
     parsed_args: argparse.Namespace = parser.parse_args(args)
-    flog.fields(args=parsed_args).debug("Arguments parsed")
 
     # Validation and coercion
     normalize_toplevel_options(parsed_args)
-    flog.fields(args=parsed_args).debug("Arguments normalized")
+    if parsed_args.command == "run-local-collection":
+        _normalize_run_local_collection_options(parsed_args)
+    if parsed_args.command in ("run-local-collection", "run-collections"):
+        _normalize_collection_tree_options(parsed_args)
 
     return parsed_args
 
 
-def run(args: list[str]) -> int:
+def _stamp_file(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+#: Maps the explicit configuration files to the stamps of all configuration
+#: files and the configuration loaded from them. The daemon fills this before
+#: forking, so that invocations do not need to load the configuration again.
+_CONFIG_CACHE: dict[
+    tuple[str, ...], tuple[tuple[tuple[int, int] | None, ...], dict]
+] = {}
+
+
+def load_tool_config(config_files: list[str]) -> dict:
     """
-    Run the program.
+    Load the configuration from the implicit and the given configuration files.
 
-    :arg args: A list of command line arguments.  Typically :python:`sys.argv`.
-    :returns: A program return code.  0 for success, integers for any errors.  These are documented
-        in :func:`main`.
+    The configuration is cached until one of the files changes.
+    Raises ``antsibull_core.config.ConfigError`` on errors.
     """
-    flog = mlog.fields(func="run")
-    flog.fields(raw_args=args).info("Enter")
+    # pylint: disable=import-outside-toplevel
+    from antsibull_core.config import SYSTEM_CONFIG_FILE, USER_CONFIG_FILE, load_config
 
-    program_name = os.path.basename(args[0])
-    try:
-        parsed_args: argparse.Namespace = parse_args(program_name, args[1:])
-    except InvalidArgumentError as e:
-        print(e)
-        return 2
+    from .schemas.app_context import ToolAppContext
+
+    # pylint: enable=import-outside-toplevel
+
+    key = tuple(os.path.abspath(path) for path in config_files)
+    stamps = tuple(
+        _stamp_file(path)
+        for path in (SYSTEM_CONFIG_FILE, os.path.expanduser(USER_CONFIG_FILE), *key)
+    )
+    cached = _CONFIG_CACHE.get(key)
+    if cached is None or cached[0] != stamps:
+        cached = (stamps, load_config(list(key), app_context_model=ToolAppContext))
+        _CONFIG_CACHE[key] = cached
+    return copy.deepcopy(cached[1])
+
+
+def _load_config_and_run(parsed_args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from antsibull_core.logging import initialize_app_logging, log
+
+    initialize_app_logging()
+
+    # We have to call initialize_app_logging() before these imports so that the log object is
+    # configured correctly before other antisbull modules make copies of it.
+    import twiggy  # type: ignore[import]
+    from antsibull_core import app_context
+    from antsibull_core.config import ConfigError
+
+    from .schemas.app_context import ToolAppContext
+
+    # pylint: enable=import-outside-toplevel
+
+    flog = log.fields(mod=__name__, func="run")
     flog.fields(args=parsed_args).info("Arguments parsed")
 
     try:
-        cfg = load_config(parsed_args.config_file, app_context_model=ToolAppContext)
+        cfg = load_tool_config(parsed_args.config_file)
         flog.fields(config=cfg).info("Config loaded")
     except ConfigError as e:
         print(e)
@@ -169,6 +779,43 @@ def run(args: list[str]) -> int:
         return ARGS_MAP[parsed_args.command]()()
 
 
+def run(args: list[str], *, use_daemon: bool = True) -> int:
+    """
+    Run the program.
+
+    Logging, the configuration, and the subcommand's implementation are only loaded
+    after the arguments have been parsed successfully.
+
+    :arg args: A list of command line arguments.  Typically :python:`sys.argv`.
+    :kwarg use_daemon: Whether ``run-local-collection --daemon`` may forward the
+        invocation to the daemon. The daemon itself runs invocations with ``False``.
+    :returns: A program return code.  0 for success, integers for any errors.  These are documented
+        in :func:`main`.
+    """
+    program_name = os.path.basename(args[0])
+    try:
+        parsed_args: argparse.Namespace = parse_args(program_name, args[1:])
+    except InvalidArgumentError as e:
+        print(e)
+        return 2
+
+    if use_daemon and parsed_args.command == "run-local-collection":
+        if parsed_args.daemon:
+            # pylint: disable-next=import-outside-toplevel
+            from .client import get_default_socket_path, run_in_daemon
+
+            returncode = run_in_daemon(
+                parsed_args.daemon_socket or get_default_socket_path(),
+                args,
+                cwd=os.getcwd(),
+                env=os.environ,
+            )
+            if returncode is not None:
+                return returncode
+
+    return _load_config_and_run(parsed_args)
+
+
 def main() -> int:
     """
     Entrypoint called from the script.
@@ -0,0 +1,157 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Forward an invocation to the antsibull-tool daemon and wait for its result."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import typing as t
+from collections.abc import Iterator, Mapping, Sequence
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+#: Signals that are forwarded to the process group running the invocation
+FORWARDED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+
+
+def get_default_socket_path() -> str:
+    """
+    Return the default path of the daemon's socket.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "antsibull-tool.sock")
+    return os.path.join("/tmp", f"antsibull-tool-{os.getuid()}.sock")
+
+
+def get_peer_uid(sock: socket.socket) -> int | None:
+    """
+    Return the user ID of the process on the other end of the Unix domain socket
+    ``sock``, or ``None`` if the platform does not provide it.
+    """
+    peercred = getattr(socket, "SO_PEERCRED", None)
+    if peercred is None:
+        return None
+    data = sock.getsockopt(socket.SOL_SOCKET, peercred, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", data)
+    return uid
+
+
+def _is_own_daemon(sock: socket.socket, socket_path: StrPath) -> bool:
+    """
+    Check that the daemon listening on ``sock`` runs as the current user.
+
+    Without peer credentials, the owner of the socket file is checked instead.
+    """
+    uid = get_peer_uid(sock)
+    if uid is None:
+        uid = os.stat(socket_path).st_uid
+    return uid == os.getuid()
+
+
+def send_message(sock: socket.socket, message: Mapping[str, t.Any]) -> None:
+    """
+    Send a message as one line of JSON.
+    """
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+class MessageReader:
+    """
+    Reads messages sent with :func:`send_message` from a socket.
+    """
+
+    def __init__(self, sock: socket.socket, data: bytes = b""):
+        self._sock = sock
+        self._buffer = data
+
+    def read(self) -> dict[str, t.Any] | None:
+        """
+        Return the next message, or ``None`` if the connection was closed.
+        """
+        while b"\n" not in self._buffer:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return json.loads(line)
+
+
+@contextlib.contextmanager
+def _forward_signals(pgid: int) -> Iterator[None]:
+    def forward(signum: int, _frame: t.Any) -> None:
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(pgid, signum)
+
+    previous = {signum: signal.signal(signum, forward) for signum in FORWARDED_SIGNALS}
+    try:
+        yield
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def run_in_daemon(
+    socket_path: StrPath,
+    args: Sequence[str],
+    *,
+    cwd: StrPath,
+    env: Mapping[str, str],
+) -> int | None:
+    """
+    Run ``args`` in the daemon listening on ``socket_path``.
+
+    The daemon runs the invocation with this process' standard input, output and
+    error, in ``cwd`` and with the environment ``env``. Signals received while
+    waiting are forwarded. Returns the return code, or ``None`` if no daemon of
+    the current user is listening on ``socket_path``.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        try:
+            sock.connect(os.fspath(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        # Another user can create the socket in a shared directory like /tmp;
+        # never pass the environment and standard streams to their process
+        if not _is_own_daemon(sock, socket_path):
+            print(
+                f"Ignoring the antsibull-tool daemon socket {socket_path},"
+                " it belongs to another user",
+                file=sys.stderr,
+            )
+            return None
+        request = {"args": list(args), "cwd": os.fspath(cwd), "env": dict(env)}
+        data = json.dumps(request).encode("utf-8") + b"\n"
+        try:
+            # The standard streams are passed as file descriptors, so that the
+            # output is not copied through the socket
+            sent = socket.send_fds(sock, [data], [0, 1, 2])
+            sock.sendall(data[sent:])
+        except OSError:
+            return None
+        reader = MessageReader(sock)
+        message = reader.read()
+        if message is None:
+            print("The antsibull-tool daemon closed the connection", file=sys.stderr)
+            return 1
+        with _forward_signals(message["pgid"]):
+            message = reader.read()
+        if message is None:
+            print(
+                "The antsibull-tool daemon closed the connection without a return code",
+                file=sys.stderr,
+            )
+            return 1
+        return message["returncode"]
@@ -8,45 +8,220 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
+import os
+import typing as t
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pydantic as p
 from antsibull_fileutils.yaml import load_yaml_file
 
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
 
 class CollectionDetails(p.BaseModel):
+    model_config = p.ConfigDict(frozen=True)
+
     namespace: str
     name: str
+    version: t.Optional[str] = None
     dependencies: dict[str, str] = {}
+    #: Patterns of files to exclude when building the collection, only in galaxy.yml
+    build_ignore: list[str] = []
 
+    @p.field_validator("version", mode="before")
+    @classmethod
+    def _convert_version(cls, value: t.Any) -> t.Any:
+        # YAML parses versions like 1.0 as floats
+        if isinstance(value, (int, float)):
+            return str(value)
+        return value
 
-def load_collection_details(path: Path) -> CollectionDetails:
-    galaxy_yml_path = path / "galaxy.yml"
-    if galaxy_yml_path.exists():
-        try:
-            data = load_yaml_file(galaxy_yml_path)
-            if not isinstance(data, dict):
-                raise ValueError("galaxy.yml is not a global mapping")
-            return CollectionDetails.model_validate(data)
-        except Exception as exc:
-            raise ValueError(
-                f"Error while loading collection details from {galaxy_yml_path}: {exc}"
-            ) from exc
-
-    manifest_json_path = path / "MANIFEST.json"
-    if manifest_json_path.exists():
+    @p.field_validator("build_ignore", mode="before")
+    @classmethod
+    def _convert_build_ignore(cls, value: t.Any) -> t.Any:
+        # An empty build_ignore: in galaxy.yml is parsed as None
+        if value is None:
+            return []
+        return value
+
+
+_DETAILS_FIELDS = sorted(CollectionDetails.model_fields)
+
+
+def _extract_details(data: dict[str, t.Any]) -> CollectionDetails:
+    # Only pass on the fields we need; galaxy.yml and MANIFEST.json contain many more
+    return CollectionDetails.model_validate(
+        {key: data[key] for key in _DETAILS_FIELDS if key in data}
+    )
+
+
+def _load_galaxy_yml(galaxy_yml_path: Path) -> CollectionDetails:
+    try:
+        data = load_yaml_file(galaxy_yml_path)
+        if not isinstance(data, dict):
+            raise ValueError("galaxy.yml is not a global mapping")
+        return _extract_details(data)
+    except Exception as exc:
+        raise ValueError(
+            f"Error while loading collection details from {galaxy_yml_path}: {exc}"
+        ) from exc
+
+
+def parse_manifest_json(
+    content: bytes,
+) -> tuple[CollectionDetails, dict[str, t.Any]]:
+    """
+    Parse the contents of ``MANIFEST.json``.
+
+    Return the collection details and the whole manifest.
+    """
+    data = json.loads(content)
+    if not isinstance(data, dict) or not isinstance(data.get("collection_info"), dict):
+        raise ValueError("Cannot find collection_info in MANIFEST.json")
+    return _extract_details(data["collection_info"]), data
+
+
+def _load_manifest_json(manifest_json_path: Path) -> CollectionDetails:
+    try:
+        return parse_manifest_json(manifest_json_path.read_bytes())[0]
+    except Exception as exc:
+        raise ValueError(
+            f"Error while loading collection details from {manifest_json_path}: {exc}"
+        ) from exc
+
+
+_LOADERS: tuple[tuple[str, t.Callable[[Path], CollectionDetails]], ...] = (
+    ("galaxy.yml", _load_galaxy_yml),
+    ("MANIFEST.json", _load_manifest_json),
+)
+
+#: Maps (absolute path of galaxy.yml/MANIFEST.json, mtime, size) to the details
+_DETAILS_CACHE: dict[tuple[str, int, int], CollectionDetails] = {}
+
+
+def _get_disk_cache_path(cache_dir: StrPath, metadata_path: str) -> str:
+    path_hash = hashlib.sha256(os.fsencode(metadata_path)).hexdigest()
+    return os.path.join(cache_dir, "metadata", f"{path_hash}.json")
+
+
+def _load_from_disk_cache(
+    cache_dir: StrPath, key: tuple[str, int, int]
+) -> CollectionDetails | None:
+    try:
+        with open(_get_disk_cache_path(cache_dir, key[0]), "rb") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(entry, dict)
+        or entry.get("key") != list(key)
+        or entry.get("fields") != _DETAILS_FIELDS
+        or not isinstance(entry.get("details"), dict)
+    ):
+        return None
+    # The cache entry has been validated when it was written
+    return CollectionDetails.model_construct(**entry["details"])
+
+
+def _store_in_disk_cache(
+    cache_dir: StrPath, key: tuple[str, int, int], details: CollectionDetails
+) -> None:
+    cache_path = _get_disk_cache_path(cache_dir, key[0])
+    entry = {
+        "key": list(key),
+        "fields": _DETAILS_FIELDS,
+        "details": details.model_dump(),
+    }
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+
+def load_collection_details(
+    path: Path, *, cache_dir: StrPath | None = None
+) -> CollectionDetails:
+    """
+    Load the collection details from ``galaxy.yml`` or ``MANIFEST.json`` in ``path``.
+
+    The result is cached in memory, and in ``cache_dir`` if provided, as long as
+    the modification time and size of the file do not change.
+    """
+    for filename, loader in _LOADERS:
+        metadata_path = path / filename
         try:
-            with manifest_json_path.open("rb") as f:
-                data = json.load(f)
-                if not isinstance(data, dict) or not isinstance(
-                    data.get("collection_info"), dict
-                ):
-                    raise ValueError("Cannot find collection_info in MANIFEST.json")
-                return CollectionDetails.model_validate(data["collection_info"])
-        except Exception as exc:
-            raise ValueError(
-                f"Error while loading collection details from {manifest_json_path}: {exc}"
-            ) from exc
+            st = metadata_path.stat()
+        except FileNotFoundError:
+            continue
+        key = (str(metadata_path.absolute()), st.st_mtime_ns, st.st_size)
+        details = _DETAILS_CACHE.get(key)
+        if details is None and cache_dir is not None:
+            details = _load_from_disk_cache(cache_dir, key)
+        if details is None:
+            details = loader(metadata_path)
+            if cache_dir is not None:
+                _store_in_disk_cache(cache_dir, key, details)
+        _DETAILS_CACHE[key] = details
+        return details
 
     raise ValueError(f"Cannot find galaxy.yml or MANIFEST.json in {path}")
+
+
+_COLLECTION_METADATA_FILES = ("galaxy.yml", "MANIFEST.json")
+
+# Directories that never contain collections we want to find
+_SKIP_DIRECTORIES = frozenset(
+    {".git", ".hg", ".nox", ".tox", ".venv", "node_modules", "__pycache__"}
+)
+
+
+def is_collection_directory(path: Path) -> bool:
+    """
+    Check whether ``path`` contains a collection checkout or collection artifact.
+    """
+    return any((path / filename).is_file() for filename in _COLLECTION_METADATA_FILES)
+
+
+def find_collections(root: Path) -> list[Path]:
+    """
+    Find all collection checkouts and collection artifacts below ``root``.
+
+    Directories containing ``galaxy.yml`` or ``MANIFEST.json`` are considered
+    collections. Their subdirectories are not searched.
+    """
+    result: list[Path] = []
+    for directory, dirs, files in os.walk(root):
+        if any(filename in files for filename in _COLLECTION_METADATA_FILES):
+            result.append(Path(directory))
+            dirs.clear()
+            continue
+        dirs[:] = sorted(a_dir for a_dir in dirs if a_dir not in _SKIP_DIRECTORIES)
+    return result
+
+
+def load_collections_details(
+    paths: Sequence[Path],
+    *,
+    max_workers: int | None = None,
+    cache_dir: StrPath | None = None,
+) -> list[CollectionDetails]:
+    """
+    Load the collection details of several collections in parallel.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(
+            executor.map(
+                functools.partial(load_collection_details, cache_dir=cache_dir), paths
+            )
+        )
@@ -0,0 +1,297 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Daemon that runs forwarded invocations from a warm process."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+import typing as t
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from antsibull_core.logging import log
+
+from . import app_context
+from .client import (
+    FORWARDED_SIGNALS,
+    MessageReader,
+    get_default_socket_path,
+    get_peer_uid,
+    send_message,
+)
+from .collection import load_collection_details
+from .vcs import detect_vcs, keep_listings
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+mlog = log.fields(mod=__name__)
+
+#: How often the daemon checks for finished invocations and the idle timeout
+_POLL_INTERVAL = 1.0
+
+#: How long a client may take to send its request; the request is received by
+#: the accept loop, so a client that does not send it must not block others
+_REQUEST_TIMEOUT = 5.0
+
+
+def _check_peer(conn: socket.socket) -> bool:
+    uid = get_peer_uid(conn)
+    # Without peer credentials, the socket's permissions still restrict access
+    # to the current user
+    return uid is None or uid == os.getuid()
+
+
+def _receive_request(conn: socket.socket) -> tuple[dict[str, t.Any], list[int]]:
+    data, fds, _flags, _address = socket.recv_fds(conn, 65536, 3)
+    try:
+        request = MessageReader(conn, data).read()
+        if request is None or len(fds) != 3:
+            raise ValueError("Incomplete request")
+        return request, fds
+    except BaseException:
+        for fd in fds:
+            os.close(fd)
+        raise
+
+
+def _run_invocation(request: dict[str, t.Any], fds: list[int]) -> int:
+    # pylint: disable-next=import-outside-toplevel,cyclic-import
+    from .cli import run
+
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    # pylint: disable=consider-using-with,unspecified-encoding
+    sys.stdin = open(0, closefd=False)
+    sys.stdout = open(1, "w", buffering=1, closefd=False)
+    sys.stderr = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+    # pylint: enable=consider-using-with,unspecified-encoding
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+    try:
+        return run(request["args"], use_daemon=False)
+    except SystemExit as exc:
+        # argparse exits for --help and invalid arguments
+        if exc.code is None:
+            return 0
+        return exc.code if isinstance(exc.code, int) else 1
+    except KeyboardInterrupt:
+        return 128 + signal.SIGINT
+    except BaseException:  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+
+@contextlib.contextmanager
+def _environment(env: Mapping[str, str]) -> Iterator[None]:
+    previous = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(previous)
+
+
+def _warm_caches(cwd: str, env: Mapping[str, str]) -> None:
+    """
+    Load the collection details and Git file listing of ``cwd`` into the daemon's
+    caches with the client's environment, so that later invocations inherit them.
+    """
+    with contextlib.suppress(OSError, ValueError), _environment(env):
+        load_collection_details(Path(cwd))
+        detect_vcs(cwd)
+
+
+def _fork_invocation(
+    conn: socket.socket, listener: socket.socket
+) -> tuple[int, dict[str, t.Any]]:
+    """
+    Run the invocation requested on ``conn`` in a child process.
+
+    Returns the child's process ID and the request.
+    """
+    request, fds = _receive_request(conn)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        pid = os.fork()
+    except OSError:
+        for fd in fds:
+            os.close(fd)
+        raise
+    if pid != 0:
+        for fd in fds:
+            os.close(fd)
+        return pid, request
+
+    # In the child: never return into the daemon's loop
+    returncode = 1
+    try:
+        listener.close()
+        conn.settimeout(None)
+        # The client forwards signals to this process group, which also
+        # contains the commands run by the invocation
+        os.setpgid(0, 0)
+        for signum in FORWARDED_SIGNALS:
+            signal.signal(
+                signum,
+                (
+                    signal.default_int_handler
+                    if signum == signal.SIGINT
+                    else signal.SIG_DFL
+                ),
+            )
+        send_message(conn, {"pgid": os.getpid()})
+        returncode = _run_invocation(request, fds)
+        send_message(conn, {"returncode": returncode})
+    finally:
+        os._exit(returncode)  # pylint: disable=protected-access
+
+
+def _reap_children(children: set[int]) -> None:
+    for pid in list(children):
+        with contextlib.suppress(ChildProcessError):
+            if os.waitpid(pid, os.WNOHANG)[0] == 0:
+                continue
+        children.discard(pid)
+
+
+def _bind(socket_path: str) -> socket.socket:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with probe:
+        try:
+            probe.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+        else:
+            raise ValueError(f"A daemon is already listening on {socket_path}")
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        # For example a stale socket of another user in a shared directory
+        raise ValueError(
+            f"Cannot remove the stale socket {socket_path}: {exc}"
+        ) from exc
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+        listener.listen()
+    except OSError as exc:
+        listener.close()
+        raise ValueError(f"Cannot listen on {socket_path}: {exc}") from exc
+    return listener
+
+
+def _accept_invocation(
+    conn: socket.socket,
+    listener: socket.socket,
+    children: set[int],
+    warm_up: dict[str, dict[str, str]],
+) -> None:
+    flog = mlog.fields(func="_accept_invocation")
+    conn.settimeout(_REQUEST_TIMEOUT)
+    if not _check_peer(conn):
+        flog.warning("Rejected connection from another user")
+        return
+    try:
+        pid, request = _fork_invocation(conn, listener)
+    except (OSError, ValueError) as exc:
+        flog.fields(error=exc).warning("Invalid request")
+        return
+    children.add(pid)
+    warm_up[request["cwd"]] = request["env"]
+
+
+def serve(socket_path: StrPath, *, idle_timeout: float | None = None) -> None:
+    """
+    Accept invocations on the Unix domain socket ``socket_path`` until terminated.
+
+    Every invocation runs in a forked child of the daemon, so it starts with all
+    modules imported, and the configuration, collection metadata and Git file
+    listings cached. The caches are filled for the working directories of
+    previous invocations while no client is waiting. The daemon exits once it was
+    idle for ``idle_timeout`` seconds.
+    """
+    flog = mlog.fields(func="serve")
+    socket_path = os.path.abspath(socket_path)
+    listener = _bind(socket_path)
+    keep_listings()
+    children: set[int] = set()
+    #: Maps the working directories of recent invocations to their environment
+    warm_up: dict[str, dict[str, str]] = {}
+    last_active = time.monotonic()
+    flog.fields(socket=socket_path).notice("Listening")
+    try:
+        listener.settimeout(_POLL_INTERVAL)
+        while True:
+            _reap_children(children)
+            if children:
+                last_active = time.monotonic()
+            elif (
+                idle_timeout is not None
+                and time.monotonic() - last_active > idle_timeout
+            ):
+                flog.notice("Idle timeout reached")
+                return
+            try:
+                conn, _address = listener.accept()
+            except socket.timeout:
+                # Only warm the caches while no client is waiting
+                if warm_up:
+                    _warm_caches(*warm_up.popitem())
+                continue
+            with conn:
+                _accept_invocation(conn, listener, children, warm_up)
+            last_active = time.monotonic()
+    finally:
+        listener.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+
+
+def run_daemon() -> int:
+    # pylint: disable-next=import-outside-toplevel,cyclic-import
+    from .cli import ARGS_MAP, load_tool_config
+
+    flog = mlog.fields(func="run_daemon")
+    app_ctx = app_context.app_ctx.get()
+
+    # Import the subcommands and load the configuration before forking
+    for loader in ARGS_MAP.values():
+        loader()
+    load_tool_config([])
+
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: sys.exit(0))
+    try:
+        serve(
+            app_ctx.extra["socket"] or get_default_socket_path(),
+            idle_timeout=app_ctx.extra["idle_timeout"],
+        )
+    except (OSError, ValueError) as e:
+        flog.error(str(e))
+        return 5
+    except KeyboardInterrupt:
+        pass
+    return 0
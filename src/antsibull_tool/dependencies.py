@@ -0,0 +1,272 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Resolve collection dependencies against local checkouts and installed collections."""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import typing as t
+from collections import ChainMap
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import semantic_version as semver
+
+from .collection import (
+    CollectionDetails,
+    is_collection_directory,
+    load_collection_details,
+    load_collections_details,
+)
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+#: The environment variables Ansible reads its collection search path from,
+#: in order of precedence
+ANSIBLE_COLLECTIONS_PATH_VARS = (
+    "ANSIBLE_COLLECTIONS_PATH",
+    "ANSIBLE_COLLECTIONS_PATHS",
+)
+
+_DEFAULT_COLLECTIONS_PATHS = (
+    "~/.ansible/collections",
+    "/usr/share/ansible/collections",
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Candidate:
+    """
+    A collection that can be used to satisfy a dependency.
+    """
+
+    path: Path
+    details: CollectionDetails
+
+
+@dataclasses.dataclass
+class ResolvedDependencies:
+    """
+    The result of :meth:`DependencyResolver.resolve`.
+    """
+
+    resolved: list[Candidate] = dataclasses.field(default_factory=list)
+    #: Human readable descriptions of dependencies that could not be satisfied
+    unresolved: list[str] = dataclasses.field(default_factory=list)
+
+
+def get_installed_collections_paths() -> list[Path]:
+    """
+    Return the collection paths Ansible uses by default.
+
+    These are the paths in ``ANSIBLE_COLLECTIONS_PATH`` (or the deprecated
+    ``ANSIBLE_COLLECTIONS_PATHS``) if set, and Ansible's default paths otherwise.
+    """
+    paths = get_collections_path_from_env(os.environ)
+    if paths is not None:
+        return [Path(path).expanduser() for path in paths if path]
+    return [Path(path).expanduser() for path in _DEFAULT_COLLECTIONS_PATHS]
+
+
+def get_collections_path_from_env(env: t.Mapping[str, str]) -> list[str] | None:
+    """
+    Return the entries of the collection search path set in ``env``, or ``None``
+    if none of :data:`ANSIBLE_COLLECTIONS_PATH_VARS` is set.
+    """
+    for env_var in ANSIBLE_COLLECTIONS_PATH_VARS:
+        value = env.get(env_var)
+        if value is not None:
+            return value.split(os.pathsep)
+    return None
+
+
+def build_collections_path(
+    root: StrPath, existing: Iterable[str] = (), *, pin: bool = False
+) -> list[str]:
+    """
+    Build the collection search path for a collection tree in ``root``.
+
+    ``root`` comes first, followed by the ``existing`` entries. Entries are
+    normalized, and only the first of several entries resolving to the same
+    directory is kept. Entries that are not directories are removed, so
+    Ansible does not need to look for collections there. With ``pin``, only
+    ``root`` is returned; dependencies are expected to be linked into the tree.
+    """
+    result: list[str] = []
+    seen: set[str] = set()
+    for index, entry in enumerate([os.fspath(root), *existing]):
+        if not entry:
+            continue
+        path = os.path.normpath(os.path.abspath(os.path.expanduser(entry)))
+        real_path = os.path.realpath(path)
+        if real_path in seen or (index > 0 and not os.path.isdir(real_path)):
+            continue
+        seen.add(real_path)
+        result.append(path)
+        if pin:
+            break
+    return result
+
+
+def get_collections_environment(
+    root: StrPath, env: t.MutableMapping[str, str], *, pin: bool = False
+) -> t.Mapping[str, str]:
+    """
+    Return ``env`` with the collection search path built by
+    :func:`build_collections_path` for a collection tree in ``root``.
+
+    The result is an overlay over ``env`` instead of a copy.
+    """
+    collections_path = os.pathsep.join(
+        build_collections_path(root, get_collections_path_from_env(env) or (), pin=pin)
+    )
+    return ChainMap(
+        {env_var: collections_path for env_var in ANSIBLE_COLLECTIONS_PATH_VARS}, env
+    )
+
+
+def get_sibling_directories(path: Path) -> list[Path]:
+    """
+    Return the directories that can contain checkouts next to the collection in ``path``.
+
+    If the checkout is part of an ``ansible_collections`` tree, all other
+    collections of that tree are included.
+    """
+    result = [path.parent]
+    if path.parent.parent.name == "ansible_collections":
+        result.extend(
+            namespace_dir
+            for namespace_dir in sorted(path.parent.parent.iterdir())
+            if namespace_dir.is_dir() and namespace_dir != path.parent
+        )
+    return result
+
+
+def _version_matches(details: CollectionDetails, spec: str) -> bool:
+    if spec in ("*", ""):
+        return True
+    if details.version is None:
+        return False
+    try:
+        return semver.SimpleSpec(spec).match(semver.Version(details.version))
+    except ValueError:
+        return False
+
+
+def _load_all_details(paths: Sequence[Path]) -> list[CollectionDetails | None]:
+    try:
+        return list(load_collections_details(paths))
+    except ValueError:
+        pass
+    # Some checkouts are broken; load them one by one to skip those
+    result: list[CollectionDetails | None] = []
+    for path in paths:
+        try:
+            result.append(load_collection_details(path))
+        except ValueError:
+            result.append(None)
+    return result
+
+
+class DependencyResolver:
+    """
+    Resolves collection dependencies.
+
+    Candidates are looked up in the order of preference: first in ``checkout_dirs``,
+    which are directories containing collection checkouts as direct subdirectories,
+    and then in ``collections_paths``, which are paths that contain an
+    ``ansible_collections`` tree of installed collections.
+    """
+
+    def __init__(
+        self,
+        *,
+        checkout_dirs: Sequence[Path] = (),
+        collections_paths: Sequence[Path] = (),
+    ):
+        self.checkout_dirs = checkout_dirs
+        self.collections_paths = collections_paths
+        self._checkouts: dict[str, list[Candidate]] | None = None
+
+    def _load_checkouts(self) -> dict[str, list[Candidate]]:
+        if self._checkouts is None:
+            paths: list[Path] = []
+            for checkout_dir in self.checkout_dirs:
+                if checkout_dir.is_dir():
+                    paths.extend(
+                        path
+                        for path in sorted(checkout_dir.iterdir())
+                        if path.is_dir() and is_collection_directory(path)
+                    )
+            self._checkouts = {}
+            for path, details in zip(paths, _load_all_details(paths)):
+                if details is not None:
+                    name = f"{details.namespace}.{details.name}"
+                    self._checkouts.setdefault(name, []).append(
+                        Candidate(path=path, details=details)
+                    )
+        return self._checkouts
+
+    def _installed(self, collection: str) -> Iterable[Candidate]:
+        namespace, name = collection.split(".", 1)
+        for collections_path in self.collections_paths:
+            path = collections_path / "ansible_collections" / namespace / name
+            if not path.is_dir():
+                continue
+            try:
+                details = load_collection_details(path)
+            except ValueError:
+                continue
+            yield Candidate(path=path, details=details)
+
+    def find_candidate(self, collection: str, spec: str) -> Candidate | None:
+        """
+        Find the preferred collection that satisfies the version specifier ``spec``.
+        """
+        for candidate in self._load_checkouts().get(collection, []):
+            if _version_matches(candidate.details, spec):
+                return candidate
+        for candidate in self._installed(collection):
+            if _version_matches(candidate.details, spec):
+                return candidate
+        return None
+
+    def resolve(self, collections: Iterable[CollectionDetails]) -> ResolvedDependencies:
+        """
+        Resolve the dependencies of ``collections`` and their dependencies.
+
+        Dependencies on one of ``collections`` are considered to be satisfied.
+        """
+        result = ResolvedDependencies()
+        known: set[str] = set()
+        queue: list[tuple[str, str, str]] = []
+        for details in collections:
+            known.add(f"{details.namespace}.{details.name}")
+            queue.extend(
+                (f"{details.namespace}.{details.name}", dependency, spec)
+                for dependency, spec in details.dependencies.items()
+            )
+        while queue:
+            dependent, collection, spec = queue.pop(0)
+            if collection in known:
+                continue
+            candidate = self.find_candidate(collection, spec)
+            if candidate is None:
+                result.unresolved.append(
+                    f"{collection}:{spec} (required by {dependent})"
+                )
+                continue
+            known.add(collection)
+            result.resolved.append(candidate)
+            queue.extend(
+                (collection, dependency, dependency_spec)
+                for dependency, dependency_spec in (
+                    candidate.details.dependencies.items()
+                )
+            )
+        return result
@@ -0,0 +1,330 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Run several commands concurrently."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import dataclasses
+import functools
+import os
+import shlex
+import signal
+import subprocess
+import typing as t
+from collections.abc import Mapping, Sequence
+
+from antsibull_core.logging import log
+from asyncio_pool import AioPool  # type: ignore[import]
+
+from .limits import TIMEOUT_RETURNCODE, ResourceLimits, foreground_terminal
+from .output import OutputSink, show_output
+
+mlog = log.fields(mod=__name__)
+
+# Line length limit for reading the commands' output (the default is 64 KiB)
+_STREAM_LIMIT = 2**20
+
+# How long to wait for a terminated command to exit before killing it
+_TERMINATE_TIMEOUT = 5
+
+
+async def _forward_stream(
+    stream: asyncio.StreamReader,
+    *,
+    stream_name: str,
+    label: str | None = None,
+    output_log: OutputSink | None = None,
+) -> None:
+    """
+    Show the lines read from ``stream``, and write them to ``output_log``.
+
+    At most ``_STREAM_LIMIT`` bytes are buffered; longer lines are split.
+    """
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as exc:
+            line = exc.partial
+        except asyncio.LimitOverrunError as exc:
+            # Split overlong lines
+            line = await stream.read(exc.consumed)
+        if not line:
+            break
+        newline = line.endswith(b"\n")
+        if newline:
+            line = line[:-1]
+        show_output(stream_name, label, line, newline=newline)
+        if output_log is not None:
+            output_log.write(stream_name, label, line, newline=newline)
+
+
+@dataclasses.dataclass(frozen=True)
+class Command:
+    """
+    A command to run.
+    """
+
+    argv: list[str]
+    cwd: str
+    #: Used to prefix the command's output
+    label: str
+
+
+def _print_status(
+    message: str,
+    *,
+    label: str | None = None,
+    output_log: OutputSink | None = None,
+) -> None:
+    show_output("status", label, message.encode("utf-8"))
+    if output_log is not None:
+        output_log.write("status", label, message.encode("utf-8"))
+
+
+def _send_signal(proc: asyncio.subprocess.Process, signum: int) -> None:
+    with contextlib.suppress(ProcessLookupError):
+        if os.getpgid(proc.pid) == proc.pid:
+            # Commands with resource limits run in their own process group
+            os.killpg(proc.pid, signum)
+        else:
+            proc.send_signal(signum)
+
+
+async def _terminate(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is not None:
+        return
+    _send_signal(proc, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), _TERMINATE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _send_signal(proc, signal.SIGKILL)
+        await proc.wait()
+
+
+async def _wait(
+    proc: asyncio.subprocess.Process,
+    *streams: t.Awaitable,
+    timeout: float | None = None,
+) -> int:
+    """
+    Wait for the process and forward its output.
+
+    Terminates the process when being cancelled, or when ``timeout`` expires. In
+    the latter case, ``asyncio.TimeoutError`` is raised.
+    """
+
+    async def wait() -> int:
+        await asyncio.gather(*streams)
+        return await proc.wait()
+
+    try:
+        return await asyncio.wait_for(wait(), timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        await _terminate(proc)
+        raise
+
+
+def _subprocess_kwargs(
+    limits: ResourceLimits | None, terminal: int | None = None
+) -> dict[str, t.Any]:
+    if not limits:
+        return {}
+    return {"preexec_fn": limits.preexec_fn(terminal)}
+
+
+def _foreground_terminal(
+    limits: ResourceLimits | None,
+) -> t.ContextManager[int | None]:
+    # Only commands with limits run in their own process group
+    return foreground_terminal() if limits else contextlib.nullcontext()
+
+
+def _forward_output(
+    proc: asyncio.subprocess.Process,
+    *,
+    label: str | None,
+    output_log: OutputSink | None,
+) -> list[t.Awaitable]:
+    return [
+        _forward_stream(
+            t.cast(asyncio.StreamReader, stream),
+            stream_name=stream_name,
+            label=label,
+            output_log=output_log,
+        )
+        for stream_name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr))
+    ]
+
+
+async def async_run_command(
+    argv: Sequence[str],
+    *,
+    cwd: str,
+    env: Mapping[str, str],
+    output_log: OutputSink | None = None,
+    limits: ResourceLimits | None = None,
+) -> int:
+    """
+    Run a command with inherited stdin, stdout, and stderr, and return its return code.
+
+    If ``output_log`` is provided, stdout and stderr are forwarded line by line
+    instead, and also written to ``output_log``. If ``limits`` are provided, the
+    command runs in its own process group with the limits applied, which is the
+    foreground process group of the terminal if stdin is one, and
+    :data:`antsibull_tool.limits.TIMEOUT_RETURNCODE` is returned on timeout. If
+    the coroutine is cancelled, the command is terminated.
+    """
+    mlog.fields(func="async_run_command", argv=argv).debug("Starting command")
+    if output_log is not None:
+        output_log.write("status", None, f"$ {shlex.join(argv)}".encode("utf-8"))
+    returncode: int | None = None
+    with _foreground_terminal(limits) as terminal:
+        if output_log is not None:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                cwd=cwd,
+                env=env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=_STREAM_LIMIT,
+                **_subprocess_kwargs(limits, terminal),
+            )
+            streams = _forward_output(proc, label=None, output_log=output_log)
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *argv, cwd=cwd, env=env, **_subprocess_kwargs(limits, terminal)
+            )
+            streams = []
+        timeout = limits.timeout if limits else None
+        with contextlib.suppress(asyncio.TimeoutError):
+            returncode = await _wait(proc, *streams, timeout=timeout)
+    if returncode is None:
+        _print_status(f"Timed out after {timeout}s", output_log=output_log)
+        return TIMEOUT_RETURNCODE
+    if output_log is not None:
+        output_log.write(
+            "status", None, f"Exited with return code {returncode}".encode("utf-8")
+        )
+    return returncode
+
+
+async def _run_command(
+    command: Command,
+    *,
+    env: Mapping[str, str],
+    output_log: OutputSink | None,
+    limits: ResourceLimits | None,
+) -> int:
+    flog = mlog.fields(func="_run_command")
+    status = functools.partial(
+        _print_status, label=command.label, output_log=output_log
+    )
+    status(f"$ {shlex.join(command.argv)}")
+    flog.fields(label=command.label, argv=command.argv).debug("Starting command")
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *command.argv,
+            cwd=command.cwd,
+            env=env,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT,
+            **_subprocess_kwargs(limits),
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        status(f"Cannot run command: {exc}")
+        return 127
+    timeout = limits.timeout if limits else None
+    try:
+        returncode = await _wait(
+            proc,
+            *_forward_output(proc, label=command.label, output_log=output_log),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        status(f"Timed out after {timeout}s")
+        return TIMEOUT_RETURNCODE
+    status(f"Exited with return code {returncode}")
+    return returncode
+
+
+async def _run_commands(
+    commands: Sequence[Command],
+    *,
+    env: Mapping[str, str],
+    jobs: int,
+    output_log: OutputSink | None,
+    limits: ResourceLimits | None,
+) -> list[int]:
+    async with AioPool(size=jobs) as pool:
+        futures = [
+            pool.spawn_n(
+                _run_command(command, env=env, output_log=output_log, limits=limits)
+            )
+            for command in commands
+        ]
+        try:
+            return list(await asyncio.gather(*futures))
+        except asyncio.CancelledError:
+            await pool.cancel()
+            raise
+
+
+def aggregate_returncodes(returncodes: Sequence[int]) -> int:
+    """
+    Combine the return codes of several commands.
+
+    Returns 0 if all commands succeeded, and otherwise the return code of the first
+    command (in the order the commands were specified) that failed.
+    """
+    for returncode in returncodes:
+        if returncode != 0:
+            return returncode
+    return 0
+
+
+async def async_run_commands(
+    commands: Sequence[Command],
+    *,
+    env: Mapping[str, str],
+    jobs: int,
+    output_log: OutputSink | None = None,
+    limits: ResourceLimits | None = None,
+) -> int:
+    """
+    Run ``commands`` concurrently, running at most ``jobs`` of them at the same time.
+
+    The output of every command is forwarded line by line, prefixed by the
+    command's label, and written to ``output_log`` if provided. ``limits`` apply
+    to every command individually. Returns the aggregated return code, see
+    :func:`aggregate_returncodes`. If the coroutine is cancelled, all commands
+    are terminated.
+    """
+    returncodes = await _run_commands(
+        commands, env=env, jobs=jobs, output_log=output_log, limits=limits
+    )
+    return aggregate_returncodes(returncodes)
+
+
+def run_commands(
+    commands: Sequence[Command],
+    *,
+    env: Mapping[str, str],
+    jobs: int,
+    output_log: OutputSink | None = None,
+    limits: ResourceLimits | None = None,
+) -> int:
+    """
+    Synchronous wrapper for :func:`async_run_commands`.
+    """
+    return asyncio.run(
+        async_run_commands(
+            commands, env=env, jobs=jobs, output_log=output_log, limits=limits
+        )
+    )
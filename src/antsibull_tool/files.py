@@ -0,0 +1,204 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""List the files of a collection checkout."""
+
+from __future__ import annotations
+
+import dataclasses
+import fnmatch
+import glob
+import os
+import re
+import stat
+import typing as t
+from collections.abc import Iterable, Sequence
+
+from antsibull_fileutils.copier import CopierError
+
+from .vcs import list_git_files_cached
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+
+def walk_files(path: StrPath) -> list[str]:
+    """
+    List all files and symlinks below ``path``.
+
+    Symlinks to directories are returned as entries and are not descended into.
+    The returned paths are relative to ``path`` and use ``/`` as a separator.
+    """
+    result: list[str] = []
+    for root, dirs, files in os.walk(path, followlinks=False):
+        directory = os.path.relpath(root, path)
+        prefix = "" if directory == "." else f"{directory.replace(os.sep, '/')}/"
+        for file in files:
+            result.append(f"{prefix}{file}")
+        for a_dir in dirs:
+            if os.path.islink(os.path.join(root, a_dir)):
+                result.append(f"{prefix}{a_dir}")
+    return result
+
+
+def _list_git_files(path: StrPath, cache_dir: StrPath | None) -> list[str]:
+    try:
+        files = list_git_files_cached(path, cache_dir=cache_dir)
+    except ValueError as exc:
+        raise CopierError(
+            f"Error while listing files not ignored by Git in {path}: {exc}"
+        ) from exc
+
+    result: list[str] = []
+    for file_decoded in files:
+        try:
+            st = os.lstat(os.path.join(path, file_decoded))
+        except FileNotFoundError:
+            # Deleted files are part of git's output
+            continue
+        if stat.S_ISDIR(st.st_mode):
+            # Submodules are listed as directories
+            result.extend(
+                f"{file_decoded}/{sub_file}"
+                for sub_file in walk_files(os.path.join(path, file_decoded))
+            )
+        else:
+            result.append(file_decoded)
+    return result
+
+
+# Files that identify a collection and are never filtered out
+_ALWAYS_INCLUDED = frozenset({"galaxy.yml", "MANIFEST.json"})
+
+
+def _compile_patterns(patterns: Sequence[str]) -> re.Pattern[str] | None:
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _matches(regex: re.Pattern[str], file: str) -> bool:
+    # A pattern matching a directory matches everything below it
+    if regex.match(file):
+        return True
+    index = file.find("/")
+    while index >= 0:
+        if regex.match(file[:index]):
+            return True
+        index = file.find("/", index + 1)
+    return False
+
+
+@dataclasses.dataclass(frozen=True)
+class FileFilter:
+    """
+    Restricts the files of a collection checkout that are placed into a tree.
+
+    The patterns are shell-style globs, like the ones used by ``build_ignore`` in
+    ``galaxy.yml``, that are matched against the paths relative to the collection
+    root. A pattern matching a directory also matches all files below it.
+    If ``include`` is not empty, only matching files are kept. Files matching
+    ``exclude`` are always removed. ``galaxy.yml`` and ``MANIFEST.json`` in the
+    collection root are always kept.
+    """
+
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude)
+
+    def apply(self, files: list[str]) -> list[str]:
+        """
+        Return the files that pass the filter, keeping their order.
+        """
+        include = _compile_patterns(self.include)
+        exclude = _compile_patterns(self.exclude)
+        return [
+            file
+            for file in files
+            if file in _ALWAYS_INCLUDED
+            or (
+                (include is None or _matches(include, file))
+                and (exclude is None or not _matches(exclude, file))
+            )
+        ]
+
+
+#: Files and directories that checks of changed files need besides the files
+#: themselves, like shared plugin code, test configuration, and test helpers
+CHANGED_FILES_SUPPORT_PATTERNS = (
+    "meta",
+    "plugins/module_utils",
+    "plugins/doc_fragments",
+    "plugins/plugin_utils",
+    "tests/config.yml",
+    "tests/requirements.yml",
+    "tests/sanity",
+    "tests/unit/requirements.txt",
+    "tests/unit/constraints.txt",
+    "tests/unit/compat",
+    "tests/unit/mock",
+    "tests/unit/*__init__.py",
+    "tests/unit/*conftest.py",
+    "tests/unit/*utils.py",
+)
+
+_INTEGRATION_TARGETS_DIR = "tests/integration/targets/"
+
+
+def get_changed_files_patterns(changed_files: Iterable[str]) -> list[str]:
+    """
+    Return :class:`FileFilter` include patterns for the files needed to check
+    ``changed_files``.
+
+    These are the changed files themselves, the whole integration targets they
+    belong to, and :data:`CHANGED_FILES_SUPPORT_PATTERNS`.
+    """
+    patterns = list(CHANGED_FILES_SUPPORT_PATTERNS)
+    targets: set[str] = set()
+    for file in changed_files:
+        if file.startswith(_INTEGRATION_TARGETS_DIR):
+            target = file[len(_INTEGRATION_TARGETS_DIR) :].split("/", 1)[0]
+            targets.add(f"{_INTEGRATION_TARGETS_DIR}{target}")
+        patterns.append(glob.escape(file))
+    patterns.extend(glob.escape(target) for target in sorted(targets))
+    return patterns
+
+
+def list_files(
+    path: StrPath,
+    vcs: t.Literal["none", "git"],
+    file_filter: FileFilter | None = None,
+    *,
+    cache_dir: StrPath | None = None,
+) -> list[str]:
+    """
+    List the files of the collection checkout in ``path`` that should be copied.
+
+    For ``vcs == "git"``, only files not ignored by Git are returned. Git's
+    output is cached, see :func:`antsibull_tool.vcs.list_git_files_cached`. If
+    ``file_filter`` is provided, only files passing it are returned.
+    The returned paths are relative to ``path`` and use ``/`` as a separator.
+    """
+    files = _list_git_files(path, cache_dir) if vcs == "git" else walk_files(path)
+    if file_filter:
+        files = file_filter.apply(files)
+    return files
+
+
+def get_files_size(path: StrPath, files: Iterable[str]) -> int:
+    """
+    Return the total size of ``files``, which are relative to ``path``, in bytes.
+
+    Symlinks are not followed, and files that no longer exist are ignored.
+    """
+    size = 0
+    for file in files:
+        try:
+            size += os.lstat(os.path.join(path, file)).st_size
+        except FileNotFoundError:
+            pass
+    return size
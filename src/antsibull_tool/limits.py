@@ -0,0 +1,252 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Run commands with resource limits and a timeout, and report their resource usage."""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import os
+import resource
+import signal
+import subprocess
+import sys
+import threading
+import time
+import typing as t
+from collections.abc import Mapping, Sequence
+
+#: Return code used when a command was killed because of its timeout, like timeout(1)
+TIMEOUT_RETURNCODE = 124
+
+# How long to wait for a timed out command to exit before killing it
+_TERMINATE_TIMEOUT = 5
+
+# Signals sent to the command on repeated keyboard interrupts
+_INTERRUPT_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGKILL)
+
+
+def _set_limit(limit: int, soft: int, hard: int) -> None:
+    _old_soft, old_hard = resource.getrlimit(limit)
+    if old_hard != resource.RLIM_INFINITY:
+        soft = min(soft, old_hard)
+        hard = min(hard, old_hard)
+    resource.setrlimit(limit, (soft, hard))
+
+
+@dataclasses.dataclass(frozen=True)
+class ResourceLimits:
+    """
+    Limits for a command. The memory and CPU time limits apply to every process.
+    """
+
+    #: Wall clock time in seconds after which the command's process group is killed
+    timeout: float | None = None
+    #: Maximal size of the virtual memory in bytes
+    max_memory: int | None = None
+    #: Maximal CPU time in seconds
+    max_cpu_time: int | None = None
+    #: Niceness increment
+    nice: int | None = None
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in dataclasses.astuple(self))
+
+    def validate(self) -> None:
+        """
+        Make sure that the limits can be applied by an unprivileged process.
+
+        :raises ValueError: If they cannot.
+        """
+        if self.nice is not None and self.nice < 0 and os.geteuid() != 0:
+            raise ValueError("Only root can decrease the niceness")
+        for name, limit, value in (
+            ("memory", resource.RLIMIT_AS, self.max_memory),
+            ("CPU time", resource.RLIMIT_CPU, self.max_cpu_time),
+        ):
+            _soft, hard = resource.getrlimit(limit)
+            if value is not None and hard != resource.RLIM_INFINITY and value > hard:
+                raise ValueError(
+                    f"The {name} limit {value} exceeds the hard limit {hard}"
+                )
+
+    def apply(self) -> None:
+        """
+        Apply the limits to the current process.
+        """
+        if self.max_memory is not None:
+            _set_limit(resource.RLIMIT_AS, self.max_memory, self.max_memory)
+        if self.max_cpu_time is not None:
+            # The soft limit sends SIGXCPU, the hard limit SIGKILL
+            _set_limit(resource.RLIMIT_CPU, self.max_cpu_time, self.max_cpu_time + 1)
+        if self.nice:
+            os.nice(self.nice)
+
+    def preexec_fn(self, terminal: int | None = None) -> t.Callable[[], None]:
+        """
+        Return a ``preexec_fn`` for :class:`subprocess.Popen` that makes the
+        process a process group leader and applies the limits.
+
+        If ``terminal`` is provided, the new process group becomes its foreground
+        process group, so that the command still receives the keyboard's signals
+        and can read from the terminal.
+        """
+
+        def preexec() -> None:
+            os.setpgid(0, 0)
+            if terminal is not None:
+                _set_foreground_process_group(terminal, os.getpgrp())
+            self.apply()
+
+        return preexec
+
+
+def _set_foreground_process_group(terminal: int, pgid: int) -> None:
+    # Processes outside of the foreground process group receive SIGTTOU when
+    # changing it, unless they block it
+    old_mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTTOU})
+    try:
+        os.tcsetpgrp(terminal, pgid)
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, old_mask)
+
+
+@contextlib.contextmanager
+def foreground_terminal() -> t.Iterator[int | None]:
+    """
+    Provide stdin's file descriptor if it is a terminal whose foreground process
+    group is the current one, and ``None`` otherwise.
+
+    On exit, the current process group becomes the foreground process group of
+    that terminal again.
+    """
+    try:
+        terminal: int | None = 0 if os.tcgetpgrp(0) == os.getpgrp() else None
+    except OSError:
+        terminal = None
+    try:
+        yield terminal
+    finally:
+        if terminal is not None:
+            with contextlib.suppress(OSError):
+                _set_foreground_process_group(terminal, os.getpgrp())
+
+
+@dataclasses.dataclass(frozen=True)
+class ResourceUsage:
+    """
+    Resources used by a command.
+
+    Since the limits are applied in the forked interpreter before the command is
+    executed, the maximal resident set size includes the memory of that.
+    """
+
+    #: Maximal resident set size in bytes
+    max_rss: int
+    #: User CPU time in seconds
+    user_time: float
+    #: System CPU time in seconds
+    system_time: float
+    #: Wall clock time in seconds
+    wall: float
+
+    @classmethod
+    def from_rusage(cls, rusage: t.Any, wall: float) -> ResourceUsage:
+        """
+        Create from the result of ``os.wait4()`` or ``resource.getrusage()``.
+        """
+        # ru_maxrss is in KiB on Linux, and in bytes on macOS
+        unit = 1 if sys.platform == "darwin" else 1024
+        return cls(
+            max_rss=rusage.ru_maxrss * unit,
+            user_time=rusage.ru_utime,
+            system_time=rusage.ru_stime,
+            wall=wall,
+        )
+
+    def format(self) -> str:
+        """
+        Format as a human readable summary.
+        """
+        return (
+            f"wall {self.wall:.2f}s, user {self.user_time:.2f}s,"
+            f" system {self.system_time:.2f}s,"
+            f" max RSS {self.max_rss / 1024**2:.1f} MiB"
+        )
+
+
+def signal_process_group(pid: int, signum: int) -> None:
+    """
+    Send ``signum`` to the process group led by ``pid``, ignoring if it is gone.
+    """
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(pid, signum)
+
+
+def _wait4(pid: int) -> tuple[int, t.Any]:
+    interrupts = 0
+    while True:
+        try:
+            _pid, status, rusage = os.wait4(pid, 0)
+            return status, rusage
+        except KeyboardInterrupt:
+            # Unless it is the terminal's foreground process group, the command's
+            # process group does not receive the terminal's SIGINT; escalate on
+            # repeated interrupts
+            signum = _INTERRUPT_SIGNALS[min(interrupts, len(_INTERRUPT_SIGNALS) - 1)]
+            signal_process_group(pid, signum)
+            interrupts += 1
+
+
+def run_with_limits(
+    argv: Sequence[str],
+    *,
+    cwd: str,
+    env: Mapping[str, str],
+    limits: ResourceLimits,
+) -> tuple[int, ResourceUsage, bool]:
+    """
+    Run a command in its own process group with ``limits`` applied.
+
+    If stdin is the terminal, the process group becomes its foreground process
+    group while the command runs. If the timeout expires, the process group is
+    terminated, and killed if it did not exit after a grace period. Returns the
+    return code (:data:`TIMEOUT_RETURNCODE` on timeout), the resource usage
+    reported by ``wait4()``, and whether the timeout expired.
+    """
+    start = time.perf_counter()
+    with foreground_terminal() as terminal:
+        # pylint: disable-next=consider-using-with,subprocess-popen-preexec-fn
+        proc = subprocess.Popen(
+            argv, cwd=cwd, env=env, preexec_fn=limits.preexec_fn(terminal)
+        )
+        timed_out = threading.Event()
+        exited = threading.Event()
+
+        def on_timeout() -> None:
+            timed_out.set()
+            signal_process_group(proc.pid, signal.SIGTERM)
+            if not exited.wait(_TERMINATE_TIMEOUT):
+                signal_process_group(proc.pid, signal.SIGKILL)
+
+        timer = None
+        if limits.timeout is not None:
+            timer = threading.Timer(limits.timeout, on_timeout)
+            timer.daemon = True
+            timer.start()
+        try:
+            status, rusage = _wait4(proc.pid)
+        finally:
+            exited.set()
+            if timer is not None:
+                timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    usage = ResourceUsage.from_rusage(rusage, time.perf_counter() - start)
+    if timed_out.is_set():
+        # Also kill processes of the group that outlived the command
+        signal_process_group(proc.pid, signal.SIGKILL)
+        return TIMEOUT_RETURNCODE, usage, True
+    return proc.returncode, usage, False
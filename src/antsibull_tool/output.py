@@ -0,0 +1,163 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Show the output of commands and write it to a rotating log file."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import sys
+import typing as t
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+OutputFormat = t.Literal["text", "jsonl"]
+
+
+class OutputSink(t.Protocol):
+    """
+    Receives the output of commands line by line.
+    """
+
+    def write(
+        self, stream: str, label: str | None, line: bytes, *, newline: bool = True
+    ) -> None:
+        """
+        Write one line of output of the stream ``stream`` (``stdout``, ``stderr``,
+        or ``status``). ``line`` must not include the line break; ``newline`` is
+        false if the command's output ended without one.
+        """
+
+
+def show_output(
+    stream: str, label: str | None, line: bytes, *, newline: bool = True
+) -> None:
+    """
+    Show one line of output on the terminal.
+
+    Output of commands with a ``label`` is prefixed with it, and always ends with
+    a line break so that it is not mixed with the output of other commands.
+    Status lines are written to stderr.
+    """
+    output = sys.stdout.buffer if stream == "stdout" else sys.stderr.buffer
+    prefix = b"" if label is None else f"[{label}] ".encode("utf-8")
+    end = b"\n" if newline or label is not None else b""
+    output.write(prefix + line + end)
+    output.flush()
+
+
+class TeeOutput:
+    """
+    Writes the output to several sinks.
+    """
+
+    def __init__(self, *sinks: OutputSink):
+        self.sinks = sinks
+
+    def write(
+        self, stream: str, label: str | None, line: bytes, *, newline: bool = True
+    ) -> None:
+        """
+        Write one line of output to all sinks.
+        """
+        for sink in self.sinks:
+            sink.write(stream, label, line, newline=newline)
+
+
+class OutputLog:
+    """
+    A log file that every line of output is written to, annotated with a timestamp,
+    the stream it was written to, and the label of the command.
+
+    With ``output_format`` set to ``text``, every line is written as
+    ``<timestamp> <stream> [<label>] <line>``; with ``jsonl``, as a JSON object
+    with the keys ``time``, ``stream``, ``label``, and ``line``. If ``max_size``
+    is not zero, the file is rotated before it would exceed ``max_size`` bytes,
+    keeping ``backups`` older files with the suffixes ``.1``, ``.2``, and so on.
+    """
+
+    def __init__(
+        self,
+        path: StrPath,
+        *,
+        output_format: OutputFormat = "text",
+        max_size: int = 0,
+        backups: int = 0,
+    ):
+        self.path = os.fspath(path)
+        self.output_format = output_format
+        self.max_size = max_size
+        self.backups = backups
+        self._file: t.BinaryIO | None = None
+        self._size = 0
+
+    def __enter__(self) -> OutputLog:
+        try:
+            self._file = open(self.path, "ab")
+        except OSError as exc:
+            raise ValueError(f"Cannot open output log {self.path}: {exc}") from exc
+        self._size = self._file.tell()
+        return self
+
+    def __exit__(self, type_, value, traceback_):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                backup = f"{self.path}.{index}"
+                if os.path.exists(backup):
+                    os.replace(backup, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        # pylint: disable-next=consider-using-with
+        self._file = open(self.path, "wb")
+        self._size = 0
+
+    def _format(self, stream: str, label: str | None, line: bytes) -> bytes:
+        timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="milliseconds"
+        )
+        if self.output_format == "jsonl":
+            record = {
+                "time": timestamp,
+                "stream": stream,
+                "label": label,
+                "line": line.decode("utf-8", errors="replace"),
+            }
+            return json.dumps(record).encode("utf-8") + b"\n"
+        header = f"{timestamp} {stream} "
+        if label is not None:
+            header += f"[{label}] "
+        return header.encode("utf-8") + line + b"\n"
+
+    def write(
+        self,
+        stream: str,
+        label: str | None,
+        line: bytes,
+        *,
+        newline: bool = True,  # pylint: disable=unused-argument
+    ) -> None:
+        """
+        Write one line of output of the stream ``stream`` (``stdout``, ``stderr``,
+        or ``status``). ``line`` must not include the line break. Every line of
+        the log ends with a line break, regardless of ``newline``.
+        """
+        if self._file is None:
+            raise ValueError("The output log has not been opened")
+        data = self._format(stream, label, line)
+        if self.max_size and self._size and self._size + len(data) > self.max_size:
+            self._rotate()
+        file = t.cast(t.BinaryIO, self._file)
+        file.write(data)
+        file.flush()
+        self._size += len(data)
@@ -0,0 +1,406 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Cache the results of commands keyed on the collection tree's content and the command."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import typing as t
+from collections.abc import Iterator, Mapping, Sequence
+from importlib import metadata
+
+import antsibull_tool
+
+from .output import show_output
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+#: Prefixes of environment variables that are part of the cache key
+_KEY_ENV_PREFIXES = ("ANSIBLE_", "PYTHON")
+
+#: Directories that are never part of the tree hash
+_SKIPPED_DIRECTORIES = frozenset(("__pycache__", ".git", ".tox", ".nox"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    returncode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+"""
+
+
+def get_default_result_cache_dir() -> str:
+    """
+    Return the default location of the result cache in the user's cache directory.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "antsibull-tool", "results")
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _is_test_output(relative_dir: str) -> bool:
+    # <namespace>/<name>/tests/output is where ansible-test writes its results
+    parts = relative_dir.split(os.sep)
+    return len(parts) == 4 and parts[2:] == ["tests", "output"]
+
+
+def get_tool_versions(
+    executables: Sequence[str], env: Mapping[str, str]
+) -> dict[str, t.Any]:
+    """
+    Return the versions of the tools that can influence the commands' results.
+
+    The commands' ``executables`` are identified by their resolved paths, sizes
+    and modification times.
+    """
+    versions: dict[str, t.Any] = {
+        "antsibull-tool": antsibull_tool.__version__,
+        "python": sys.version,
+        "executables": [],
+    }
+    with contextlib.suppress(metadata.PackageNotFoundError):
+        versions["ansible-core"] = metadata.version("ansible-core")
+    for executable in executables:
+        path = shutil.which(executable, path=env.get("PATH"))
+        if path is None:
+            versions["executables"].append([executable])
+            continue
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        versions["executables"].append([path, st.st_size, st.st_mtime_ns])
+    return versions
+
+
+def get_key_environment(
+    env: Mapping[str, str], names: Sequence[str] = ()
+) -> dict[str, str]:
+    """
+    Return the environment variables of ``env`` that are part of the cache key:
+    ``PATH``, ``ANSIBLE_*``, ``PYTHON*``, and the ones in ``names``.
+    """
+    return {
+        name: value
+        for name, value in env.items()
+        if name == "PATH" or name.startswith(_KEY_ENV_PREFIXES) or name in names
+    }
+
+
+def compute_key(
+    tree_hash: str,
+    commands: Sequence[Sequence[str]],
+    env: Mapping[str, str],
+    versions: Mapping[str, t.Any],
+    *,
+    matrix: Mapping[str, Sequence[str]] | None = None,
+    changed_files: Sequence[str] | None = None,
+    template: bool = False,
+    cwd: str | None = None,
+) -> str:
+    """
+    Compute the cache key of running ``commands``, expanded over ``matrix`` and,
+    with ``template``, templated with ``changed_files`` and the working directory
+    ``cwd``, in a tree with ``tree_hash``.
+    """
+    data = {
+        "tree": tree_hash,
+        "commands": [list(argv) for argv in commands],
+        "template": template,
+        "cwd": cwd,
+        "matrix": {name: list(values) for name, values in (matrix or {}).items()},
+        "changed_files": None if changed_files is None else list(changed_files),
+        "env": dict(sorted(env.items())),
+        "versions": dict(versions),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class OutputCapture:
+    """
+    Records the output of commands as JSON lines that can be replayed exactly.
+
+    Every record has the keys ``stream``, ``label``, ``line``, and ``newline``.
+    ``line`` holds the raw bytes, with bytes that are not valid UTF-8 escaped as
+    lone surrogates.
+    """
+
+    def __init__(self, path: str, file: t.BinaryIO):
+        self.path = path
+        self._file = file
+
+    def write(
+        self, stream: str, label: str | None, line: bytes, *, newline: bool = True
+    ) -> None:
+        """
+        Record one line of output.
+        """
+        record = {
+            "stream": stream,
+            "label": label,
+            "line": line.decode("utf-8", errors="surrogateescape"),
+            "newline": newline,
+        }
+        self._file.write(json.dumps(record).encode("utf-8") + b"\n")
+        self._file.flush()
+
+
+class ResultCache:
+    """
+    A size-bounded cache of the return codes and outputs of commands.
+
+    Outputs are stored as recorded by :class:`OutputCapture`. The least recently
+    used results are removed once the cache exceeds ``max_size`` bytes.
+
+    Filesystem errors are raised as :class:`OSError`, and database errors, for
+    example of a locked or corrupted database, as :class:`sqlite3.Error`.
+    """
+
+    def __init__(
+        self,
+        path: StrPath,
+        *,
+        max_size: int,
+        log_debug: t.Callable[[str], None] | None = None,
+    ):
+        self.path = os.path.realpath(path)
+        self.max_size = max_size
+        self._outputs_dir = os.path.join(self.path, "outputs")
+        self._log_debug = log_debug
+        self._db: sqlite3.Connection | None = None
+
+    def _do_log_debug(self, msg: str, *args: t.Any) -> None:
+        if self._log_debug:
+            self._log_debug(msg, *args)
+
+    def __enter__(self) -> ResultCache:
+        os.makedirs(self._outputs_dir, mode=0o700, exist_ok=True)
+        db = sqlite3.connect(os.path.join(self.path, "index.sqlite3"), timeout=60)
+        try:
+            with db:
+                db.executescript(_SCHEMA)
+        except sqlite3.Error:
+            db.close()
+            raise
+        self._db = db
+        return self
+
+    def __exit__(self, type_, value, traceback_):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise ValueError("The result cache has not been opened")
+        return self._db
+
+    def _output_path(self, key: str) -> str:
+        return os.path.join(self._outputs_dir, f"{key}.jsonl")
+
+    def _hash_file_cached(
+        self,
+        root: str,
+        path: str,
+        st: os.stat_result,
+        new_rows: list[tuple[str, str, int, int, int, int, str]],
+    ) -> str:
+        row = self.db.execute(
+            "SELECT dev, ino, size, mtime_ns, digest FROM file_hashes WHERE path = ?",
+            (path,),
+        ).fetchone()
+        if row is not None and tuple(row[:4]) == (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+        ):
+            return row[4]
+        digest = _hash_file(path)
+        new_rows.append(
+            (path, root, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, digest)
+        )
+        return digest
+
+    def _prune_hashes(self, root: str, seen: set[str]) -> None:
+        """
+        Forget the hashes of files that are no longer part of ``root``, and of
+        trees that no longer exist.
+        """
+        existing: dict[str, bool] = {}
+        stale = [
+            (path,)
+            for path, row_root in self.db.execute(
+                "SELECT path, root FROM file_hashes"
+            ).fetchall()
+            if (
+                path not in seen
+                if row_root == root
+                else not existing.setdefault(row_root, os.path.isdir(row_root))
+            )
+        ]
+        self.db.executemany("DELETE FROM file_hashes WHERE path = ?", stale)
+        if stale:
+            self._do_log_debug("Forgot {} file hashes", len(stale))
+
+    def hash_tree(self, root: StrPath, *, persistent: bool = True) -> str:
+        """
+        Hash the contents of the ``ansible_collections`` directory ``root``,
+        following symlinks.
+
+        For ``persistent`` trees, hashes of files are remembered by path and stat
+        results, so unchanged files are not read again. Files of temporary trees
+        are new copies every time, so their hashes are not remembered.
+        """
+        root = os.path.realpath(root)
+        hasher = hashlib.sha256()
+        seen: set[tuple[int, int]] = set()
+        hashed: set[str] = set()
+        new_rows: list[tuple[str, str, int, int, int, int, str]] = []
+        # Files are hashed outside of a transaction, so that other processes
+        # using the cache are not blocked meanwhile
+        for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+            st = os.stat(dirpath)
+            relative_dir = os.path.relpath(dirpath, root)
+            if (st.st_dev, st.st_ino) in seen or _is_test_output(relative_dir):
+                dirnames.clear()
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            dirnames[:] = sorted(
+                name for name in dirnames if name not in _SKIPPED_DIRECTORIES
+            )
+            for filename in sorted(filenames):
+                full_path = os.path.realpath(os.path.join(dirpath, filename))
+                try:
+                    file_st = os.stat(full_path)
+                except FileNotFoundError:
+                    # Dangling symlink
+                    continue
+                if persistent:
+                    digest = self._hash_file_cached(root, full_path, file_st, new_rows)
+                    hashed.add(full_path)
+                else:
+                    digest = _hash_file(full_path)
+                executable = "x" if file_st.st_mode & 0o100 else "-"
+                hasher.update(
+                    os.fsencode(os.path.join(relative_dir, filename))
+                    + f"\0{executable}{digest}\0".encode("ascii")
+                )
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                new_rows,
+            )
+            self._prune_hashes(root, hashed)
+        return hasher.hexdigest()
+
+    def replay(self, key: str) -> int | None:
+        """
+        Show the cached output of ``key`` like it was shown when it was captured.
+
+        Returns the cached return code, or ``None`` if ``key`` is not cached.
+        """
+        row = self.db.execute(
+            "SELECT returncode FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._output_path(key), "rb") as f:
+                records = [json.loads(line) for line in f]
+        except FileNotFoundError:
+            return None
+        # Update the database before showing anything, so that a database error
+        # does not leave a partially replayed output behind
+        with self.db:
+            self.db.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        for record in records:
+            if record["stream"] == "status" and record["label"] is None:
+                # Status lines of a single command only go to the output log
+                continue
+            show_output(
+                record["stream"],
+                record["label"],
+                record["line"].encode("utf-8", errors="surrogateescape"),
+                newline=record["newline"],
+            )
+        return row[0]
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[OutputCapture]:
+        """
+        Capture output to a temporary file that can be stored with :meth:`store`.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self._outputs_dir, suffix=".tmp")
+        try:
+            with open(fd, "wb") as f:
+                yield OutputCapture(tmp_path, f)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+
+    def store(self, key: str, returncode: int, capture: OutputCapture) -> None:
+        """
+        Store the return code and the output captured with :meth:`capture`.
+        """
+        output_path = self._output_path(key)
+        os.replace(capture.path, output_path)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, returncode, os.stat(output_path).st_size, time.time()),
+            )
+        self._do_log_debug("Stored result {} with return code {}", key, returncode)
+        self._evict()
+
+    def _evict(self) -> None:
+        rows = self.db.execute(
+            "SELECT key, size FROM results ORDER BY last_used DESC"
+        ).fetchall()
+        total = sum(size for _, size in rows)
+        removed: list[str] = []
+        while rows and total > self.max_size:
+            key, size = rows.pop()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._output_path(key))
+            removed.append(key)
+            total -= size
+        with self.db:
+            self.db.executemany(
+                "DELETE FROM results WHERE key = ?", [(key,) for key in removed]
+            )
+        if removed:
+            self._do_log_debug("Evicted {} results", len(removed))
@@ -8,109 +8,976 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import dataclasses
+import functools
 import os
+import sqlite3
 import subprocess
+import sys
 import typing as t
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from antsibull_core.logging import log
-from antsibull_fileutils.copier import CollectionCopier, Copier, CopierError, GitCopier
-from antsibull_fileutils.vcs import detect_vcs
+from antsibull_fileutils.copier import CopierError
 
 from . import app_context
-from .collection import CollectionDetails, load_collection_details
+from .artifact import (
+    ArtifactMetadata,
+    extract_artifact,
+    get_artifact_size,
+    load_artifact_metadata,
+)
+from .bytecode import precompile_tree
+from .collection import (
+    CollectionDetails,
+    find_collections,
+    load_collection_details,
+    load_collections_details,
+)
+from .dependencies import (
+    ANSIBLE_COLLECTIONS_PATH_VARS,
+    DependencyResolver,
+    get_collections_environment,
+    get_installed_collections_paths,
+    get_sibling_directories,
+)
+from .execute import Command, async_run_command, async_run_commands, run_commands
+from .files import (
+    FileFilter,
+    get_changed_files_patterns,
+    get_files_size,
+    list_files,
+)
+from .limits import ResourceLimits, run_with_limits
+from .output import OutputLog, OutputSink, TeeOutput
+from .results import (
+    ResultCache,
+    compute_key,
+    get_default_result_cache_dir,
+    get_key_environment,
+    get_tool_versions,
+)
+from .store import ObjectStore, get_default_store_dir
+from .templating import expand_commands, template_argv
+from .timings import Phase, Timings, profile
+from .tree import (
+    CollectionRoot,
+    MaterializeStrategy,
+    get_cache_key,
+    select_tmp_root,
+)
+from .vcs import detect_vcs, keep_listings, list_changed_files
+from .watch import watch_collection
 
 mlog = log.fields(mod=__name__)
 
 
-_ANSIBLE_COLLECTIONS_PATHS = ("ANSIBLE_COLLECTIONS_PATH", "ANSIBLE_COLLECTIONS_PATHS")
+@dataclasses.dataclass(frozen=True)
+class _TreeOptions:
+    vcs: t.Literal["auto", "none", "git"]
+    cache_dir: str | None
+    materialize: MaterializeStrategy
+    with_dependencies: bool
+    dependency_paths: list[Path]
+    include: list[str]
+    exclude: list[str]
+    build_ignore: bool
+    #: A directory, ``auto``, or ``None`` for the system's temporary directory
+    tmp_root: str | None
+    tmpfs_dir: str
+    tmp_memory_budget: int
+    store_dir: str | None
+    store_max_size: int
+    #: Number of threads that synchronize files, ``None`` for the default
+    workers: int | None
+    pin_collections_path: bool
+    #: Number of cached trees per collection or workspace
+    pool_size: int
+    precompile: bool
+    #: Interpreters to compile bytecode for, all if empty
+    precompile_pythons: list[str]
 
+    @classmethod
+    def from_extra(cls, extra: Mapping[str, t.Any]) -> _TreeOptions:
+        return cls(
+            vcs=extra["vcs"],
+            cache_dir=extra["cache_dir"],
+            materialize=extra["materialize"],
+            with_dependencies=extra["with_dependencies"],
+            dependency_paths=[Path(path) for path in extra["dependency_paths"]],
+            include=extra["include"],
+            exclude=extra["exclude"],
+            build_ignore=extra["build_ignore"],
+            tmp_root=extra["tmp_root"],
+            tmpfs_dir=extra["tmpfs_dir"],
+            tmp_memory_budget=extra["tmp_memory_budget"],
+            store_dir=extra["store_dir"],
+            store_max_size=extra["store_max_size"],
+            workers=extra["workers"],
+            pin_collections_path=extra["pin_collections_path"],
+            pool_size=extra["pool_size"],
+            precompile=extra["precompile"],
+            precompile_pythons=extra["precompile_python"],
+        )
 
-def _template_argv(
-    argv: Sequence[str],
+    def file_filter(self, details: CollectionDetails) -> FileFilter:
+        """
+        Return the filter for the files of the collection described by ``details``.
+        """
+        exclude = list(self.exclude)
+        if self.build_ignore:
+            exclude.extend(details.build_ignore)
+        return FileFilter(include=self.include, exclude=exclude)
+
+
+def _changed_since(
+    path: Path,
+    details: CollectionDetails,
     *,
-    root_dir: str,
-    collection_dir: str,
+    vcs: t.Literal["none", "git"],
+    ref: str,
+    changed_only: bool,
+    options: _TreeOptions,
+    timings: Timings,
+) -> tuple[list[str], _TreeOptions]:
+    """
+    List the files changed since ``ref`` that are part of the tree.
+
+    With ``changed_only``, the returned options only place these files and the
+    files needed to check them into the tree.
+    """
+    if vcs != "git":
+        raise ValueError("--changed-since can only be used in Git repositories")
+    with timings.phase("changed_files") as phase:
+        changed_files = options.file_filter(details).apply(
+            list_changed_files(path, ref)
+        )
+        phase.files = len(changed_files)
+    mlog.fields(func="_changed_since", ref=ref, count=len(changed_files)).info(
+        "Listed changed files"
+    )
+    if changed_only:
+        options = dataclasses.replace(
+            options,
+            include=[*options.include, *get_changed_files_patterns(changed_files)],
+        )
+    return changed_files, options
+
+
+def _get_vcs(
+    path: Path, vcs: t.Literal["auto", "none", "git"], *, cache_dir: str | None
+) -> t.Literal["none", "git"]:
+    if vcs == "auto":
+        return detect_vcs(path, cache_dir=cache_dir)
+    return vcs
+
+
+def _materialize_collection(
+    root: CollectionRoot,
     path: Path,
     details: CollectionDetails,
-) -> list[str]:
-    subs = {
-        "root_path": root_dir,
-        "collection_path": collection_dir,
-        "cwd": str(path),
-        "namespace": details.namespace,
-        "name": details.name,
-        "collection_name": f"{details.namespace}.{details.name}",
-    }
-    argv = list(argv)
-    for i, arg in enumerate(argv):
+    *,
+    vcs: t.Literal["auto", "none", "git"],
+    materialize: MaterializeStrategy,
+    file_filter: FileFilter,
+    cache_dir: str | None,
+    timings: Timings,
+    files: list[str] | None = None,
+) -> str:
+    """
+    Materialize the collection in ``path`` into ``root``.
+
+    ``files`` are listed unless they are provided, or the collection is symlinked.
+    """
+    flog = mlog.fields(func="_materialize_collection")
+    if files is None and materialize != "symlink":
+        with timings.phase("list_files") as phase:
+            files = list_files(
+                path,
+                _get_vcs(path, vcs, cache_dir=cache_dir),
+                file_filter,
+                cache_dir=cache_dir,
+            )
+            phase.files = len(files)
+    with timings.phase("materialize") as phase:
+        stats = root.materialize_collection(
+            path, details.namespace, details.name, files, strategy=materialize
+        )
+        phase.files = stats.copied + stats.linked + stats.unchanged
+        phase.bytes = stats.copied_bytes
+    flog.fields(
+        collection=f"{details.namespace}.{details.name}",
+        materialize=materialize,
+        copied=stats.copied,
+        linked=stats.linked,
+        unchanged=stats.unchanged,
+        deleted=stats.deleted,
+        copied_bytes=stats.copied_bytes,
+    ).info("Materialized collection")
+    return root.collection_dir(details.namespace, details.name)
+
+
+def _extract_collection(
+    root: CollectionRoot,
+    path: Path,
+    artifact: ArtifactMetadata,
+    *,
+    options: _TreeOptions,
+    verify: bool,
+    timings: Timings,
+) -> str:
+    details = artifact.details
+    collection_dir = root.collection_dir(details.namespace, details.name)
+    with timings.phase("materialize") as phase:
+        stats = extract_artifact(
+            path,
+            collection_dir,
+            artifact,
+            file_filter=options.file_filter(details),
+            verify=verify,
+            workers=options.workers,
+            log_debug=log.debug,
+        )
+        phase.files = stats.copied
+        phase.bytes = stats.copied_bytes
+    mlog.fields(
+        func="_extract_collection",
+        collection=f"{details.namespace}.{details.name}",
+        artifact=str(path),
+        verify=verify,
+        copied=stats.copied,
+        copied_bytes=stats.copied_bytes,
+    ).info("Extracted collection artifact")
+    return collection_dir
+
+
+def _link_dependencies(
+    root: CollectionRoot,
+    collections: Sequence[tuple[Path, CollectionDetails]],
+    options: _TreeOptions,
+    timings: Timings,
+) -> set[tuple[str, str]]:
+    """
+    Link the dependencies of ``collections`` into the tree.
+
+    Returns the namespaces and names of all collections in the tree.
+    """
+    flog = mlog.fields(func="_link_dependencies")
+    result = {(details.namespace, details.name) for _, details in collections}
+    if not options.with_dependencies:
+        return result
+
+    checkout_dirs: list[Path] = []
+    collections_paths: list[Path] = []
+    for dependency_path in options.dependency_paths:
+        if (dependency_path / "ansible_collections").is_dir():
+            collections_paths.append(dependency_path)
+        else:
+            checkout_dirs.append(dependency_path)
+    for path, _ in collections:
+        checkout_dirs.extend(get_sibling_directories(path))
+    collections_paths.extend(get_installed_collections_paths())
+
+    with timings.phase("dependencies") as phase:
+        resolver = DependencyResolver(
+            checkout_dirs=checkout_dirs, collections_paths=collections_paths
+        )
+        dependencies = resolver.resolve(details for _, details in collections)
+        for candidate in dependencies.resolved:
+            details = candidate.details
+            flog.fields(
+                collection=f"{details.namespace}.{details.name}",
+                version=details.version,
+                path=str(candidate.path),
+            ).info("Linking dependency")
+            root.link_collection(candidate.path, details.namespace, details.name)
+            result.add((details.namespace, details.name))
+        phase.files = len(dependencies.resolved)
+    for unresolved in dependencies.unresolved:
+        flog.warning(f"Cannot find dependency {unresolved}")
+    return result
+
+
+def _get_tmp_root(
+    collections: Sequence[tuple[Path, CollectionDetails]],
+    options: _TreeOptions,
+    timings: Timings,
+    *,
+    vcs: t.Literal["none", "git"] | None = None,
+) -> tuple[str | None, dict[Path, list[str]]]:
+    """
+    Determine where to create a temporary tree.
+
+    For ``--tmp-root auto``, the tmpfs directory is used if the collections fit
+    into the memory budget. ``vcs`` is detected for every collection if not provided.
+
+    Also returns the files of the collections listed to estimate their size, so
+    that they need not be listed again to materialize them.
+    """
+    if options.tmp_root != "auto":
+        return options.tmp_root, {}
+    listed: dict[Path, list[str]] = {}
+    with timings.phase("estimate_size") as phase:
+        size = 0
+        phase.files = 0
+        if options.materialize != "symlink":
+            for path, details in collections:
+                files = list_files(
+                    path,
+                    vcs or _get_vcs(path, options.vcs, cache_dir=options.cache_dir),
+                    options.file_filter(details),
+                    cache_dir=options.cache_dir,
+                )
+                listed[path] = files
+                size += get_files_size(path, files)
+                phase.files += len(files)
+        phase.bytes = size
+    tmp_root = select_tmp_root(
+        size, tmpfs_dir=options.tmpfs_dir, budget=options.tmp_memory_budget
+    )
+    mlog.fields(func="_get_tmp_root", size=size, tmp_root=tmp_root).info(
+        "Selected temporary directory"
+    )
+    return None if tmp_root is None else str(tmp_root), listed
+
+
+def _get_artifact_tmp_root(
+    path: Path, options: _TreeOptions, timings: Timings
+) -> str | None:
+    """
+    Determine where to create a temporary tree for the collection artifact ``path``.
+    """
+    if options.tmp_root != "auto":
+        return options.tmp_root
+    with timings.phase("estimate_size") as phase:
+        size = get_artifact_size(path)
+        phase.bytes = size
+    tmp_root = select_tmp_root(
+        size, tmpfs_dir=options.tmpfs_dir, budget=options.tmp_memory_budget
+    )
+    mlog.fields(func="_get_artifact_tmp_root", size=size, tmp_root=tmp_root).info(
+        "Selected temporary directory"
+    )
+    return None if tmp_root is None else str(tmp_root)
+
+
+def _precompile(
+    collection_dirs: Sequence[str], options: _TreeOptions, timings: Timings
+) -> None:
+    if not options.precompile:
+        return
+    with timings.phase("precompile"):
+        for collection_dir in collection_dirs:
+            precompile_tree(
+                collection_dir,
+                pythons=options.precompile_pythons,
+                workers=options.workers,
+                log_debug=log.debug,
+            )
+
+
+@contextlib.contextmanager
+def _object_store(options: _TreeOptions) -> Iterator[ObjectStore | None]:
+    """
+    Open the object store for ``--materialize store``, and collect garbage afterwards.
+    """
+    if options.materialize != "store":
+        yield None
+        return
+    store_dir = options.store_dir
+    if store_dir is None:
+        store_dir = (
+            os.path.join(options.cache_dir, "store")
+            if options.cache_dir is not None
+            else get_default_store_dir()
+        )
+    with ObjectStore(store_dir, log_debug=log.debug) as store:
+        yield store
+        removed = store.collect_garbage(options.store_max_size)
+        mlog.fields(func="_object_store", removed=removed).info(
+            "Collected garbage in object store"
+        )
+
+
+@contextlib.contextmanager
+def _collection_tree(
+    path: Path,
+    details: CollectionDetails,
+    *,
+    vcs: t.Literal["none", "git"],
+    options: _TreeOptions,
+    store: ObjectStore | None,
+    timings: Timings,
+    artifact: ArtifactMetadata | None = None,
+    verify_checksums: bool = False,
+) -> Iterator[tuple[str, str]]:
+    """
+    Create the tree for the collection in ``path``.
+
+    If ``artifact`` is provided, ``path`` is a collection artifact that is
+    extracted into the tree.
+    """
+    key = None
+    tmp_root = None
+    listed: dict[Path, list[str]] = {}
+    if options.cache_dir is not None:
+        key = get_cache_key(path, f"{details.namespace}.{details.name}")
+    elif artifact is not None:
+        tmp_root = _get_artifact_tmp_root(path, options, timings)
+    else:
+        tmp_root, listed = _get_tmp_root([(path, details)], options, timings, vcs=vcs)
+        if tmp_root is None and store is not None:
+            # Hardlinks only work on the same filesystem
+            tmp_root = store.tmp_dir
+    with timings.timed_context(
+        CollectionRoot(
+            cache_dir=options.cache_dir,
+            key=key,
+            tmp_root=tmp_root,
+            store=store,
+            workers=options.workers,
+            pool_size=options.pool_size,
+            keep_bytecode=options.precompile,
+            log_debug=log.debug,
+        ),
+        setup="prepare_tree",
+        cleanup="cleanup",
+    ) as root:
+        if artifact is not None:
+            collection_dir = _extract_collection(
+                root,
+                path,
+                artifact,
+                options=options,
+                verify=verify_checksums,
+                timings=timings,
+            )
+        else:
+            collection_dir = _materialize_collection(
+                root,
+                path,
+                details,
+                vcs=vcs,
+                materialize=options.materialize,
+                file_filter=options.file_filter(details),
+                cache_dir=options.cache_dir,
+                timings=timings,
+                files=listed.get(path),
+            )
+        root.remove_other_collections(
+            _link_dependencies(root, [(path, details)], options, timings)
+        )
+        _precompile([collection_dir], options, timings)
+        yield root.dir, collection_dir
+
+
+def _output_log(
+    extra: Mapping[str, t.Any],
+) -> contextlib.AbstractContextManager[OutputLog | None]:
+    if extra["output_log"] is None:
+        return contextlib.nullcontext()
+    return OutputLog(
+        extra["output_log"],
+        output_format=extra["output_format"],
+        max_size=extra["output_log_max_size"],
+        backups=extra["output_log_backups"],
+    )
+
+
+def _resource_limits(extra: Mapping[str, t.Any]) -> ResourceLimits:
+    return ResourceLimits(
+        timeout=extra["timeout"],
+        max_memory=extra["max_memory"],
+        max_cpu_time=extra["max_cpu_time"],
+        nice=extra["nice"],
+    )
+
+
+def _run_command(
+    argv: list[str],
+    *,
+    cwd: str,
+    env: Mapping[str, str],
+    output_log: OutputSink | None,
+    limits: ResourceLimits,
+) -> int:
+    try:
+        if output_log is not None:
+            return asyncio.run(
+                async_run_command(
+                    argv, cwd=cwd, env=env, output_log=output_log, limits=limits
+                )
+            )
+        if limits:
+            returncode, usage, timed_out = run_with_limits(
+                argv, cwd=cwd, env=env, limits=limits
+            )
+            status = (
+                f"Timed out after {limits.timeout}s"
+                if timed_out
+                else f"Exited with return code {returncode}"
+            )
+            print(f"{status} ({usage.format()})", file=sys.stderr, flush=True)
+            return returncode
+    except subprocess.SubprocessError as e:
+        # Applying the limits failed in the forked interpreter
+        mlog.fields(func="_run_command", argv=argv).error(f"Cannot run command: {e}")
+        return 127
+    p = subprocess.run(argv, check=False, cwd=cwd, env=env)
+    return p.returncode
+
+
+def _run_commands_once(
+    commands: list[Command],
+    *,
+    env: Mapping[str, str],
+    jobs: int,
+    limits: ResourceLimits,
+    output_log: OutputSink | None,
+) -> int:
+    if len(commands) > 1:
+        return run_commands(
+            commands, env=env, jobs=jobs, output_log=output_log, limits=limits
+        )
+    return _run_command(
+        commands[0].argv,
+        cwd=commands[0].cwd,
+        env=env,
+        output_log=output_log,
+        limits=limits,
+    )
+
+
+def _run_with_result_cache(
+    extra: Mapping[str, t.Any],
+    run: Callable[[OutputSink | None], int],
+    *,
+    collection_dir: str,
+    cache_dir: str | None,
+    output_log: OutputSink | None,
+    changed_files: list[str] | None,
+    timings: Timings,
+) -> int:
+    flog = mlog.fields(func="_run_with_result_cache")
+    result_cache_dir = extra["result_cache_dir"]
+    if result_cache_dir is None:
+        result_cache_dir = (
+            os.path.join(cache_dir, "results")
+            if cache_dir is not None
+            else get_default_result_cache_dir()
+        )
+    # The commands before templating do not contain temporary paths
+    commands: list[list[str]] = extra["commands"]
+    env = get_key_environment(os.environ, extra["result_cache_env"])
+    with contextlib.ExitStack() as stack:
         try:
-            argv[i] = arg.format(**subs)
-        except Exception as exc:
-            raise ValueError(
-                f"Error while templating argument {arg!r} (#{i + 1}): {exc}"
-            ) from exc
-    return argv
-
-
-def _prepare_environment(root_dir: str) -> dict[str, str]:
-    env = dict(os.environ)
-    existing_path = None
-    for env_var in _ANSIBLE_COLLECTIONS_PATHS:
-        if env_var in env:
-            if existing_path is None:
-                existing_path = env[env_var]
-            del env[env_var]
-    modified_path = root_dir
-    if existing_path is not None:
-        modified_path = f"{modified_path}:{existing_path}"
-    for env_var in _ANSIBLE_COLLECTIONS_PATHS:
-        env[env_var] = modified_path
-    return env
+            cache = stack.enter_context(
+                ResultCache(
+                    result_cache_dir,
+                    max_size=extra["result_cache_max_size"],
+                    log_debug=log.debug,
+                )
+            )
+            with timings.phase("result_cache_lookup"):
+                key = compute_key(
+                    # The ansible_collections directory
+                    cache.hash_tree(
+                        os.path.dirname(os.path.dirname(collection_dir)),
+                        persistent=cache_dir is not None,
+                    ),
+                    commands,
+                    env,
+                    get_tool_versions([argv[0] for argv in commands], os.environ),
+                    matrix=extra["matrix"],
+                    changed_files=changed_files,
+                    template=extra["template"],
+                    cwd=os.getcwd(),
+                )
+                returncode = cache.replay(key)
+            capture = (
+                None if returncode is not None else stack.enter_context(cache.capture())
+            )
+        except (OSError, sqlite3.Error) as exc:
+            # The cache is only an optimization, for example its directory can be
+            # read-only, or the database locked or corrupted
+            flog.fields(error=exc).warning("Cannot use the result cache")
+            return run(output_log)
+        if capture is None:
+            flog.fields(key=key).info("Replayed cached result")
+            return t.cast(int, returncode)
+        returncode = run(
+            capture if output_log is None else TeeOutput(capture, output_log)
+        )
+        if returncode == 0:
+            try:
+                cache.store(key, returncode, capture)
+            except (OSError, sqlite3.Error) as exc:
+                flog.fields(error=exc).warning("Cannot store the result")
+        return returncode
 
 
-def run_local_collection() -> int:
-    flog = mlog.fields(func="generate_docs")
-    flog.debug("Begin processing docs")
+def _command_runner(
+    commands: list[Command],
+    *,
+    env: Mapping[str, str],
+    jobs: int,
+    output_log: OutputLog | None,
+    limits: ResourceLimits,
+) -> Callable[[], Awaitable[int]]:
+    if len(commands) > 1:
+        return functools.partial(
+            async_run_commands,
+            commands,
+            env=env,
+            jobs=jobs,
+            output_log=output_log,
+            limits=limits,
+        )
+    return functools.partial(
+        async_run_command,
+        commands[0].argv,
+        cwd=commands[0].cwd,
+        env=env,
+        output_log=output_log,
+        limits=limits,
+    )
+
+
+def _load_source(
+    artifact_path: str | None, options: _TreeOptions, timings: Timings
+) -> tuple[Path, t.Literal["none", "git"], CollectionDetails, ArtifactMetadata | None]:
+    """
+    Load the collection to run in, either the checkout in the current directory
+    or the collection artifact ``artifact_path``.
+    """
+    if artifact_path is not None:
+        path = Path(artifact_path).absolute()
+        with timings.phase("load_collection_details"):
+            artifact = load_artifact_metadata(path)
+        return path, "none", artifact.details, artifact
+
+    path = Path.cwd()
+
+    with timings.phase("detect_vcs"):
+        vcs = _get_vcs(path, options.vcs, cache_dir=options.cache_dir)
+
+    with timings.phase("load_collection_details"):
+        details = load_collection_details(path, cache_dir=options.cache_dir)
+    return path, vcs, details, None
+
 
+def _run_local_collection(timings: Timings) -> int:
     app_ctx = app_context.app_ctx.get()
 
-    argv: Sequence[str] = app_ctx.extra["argv"]
-    vcs: t.Literal["auto", "none", "git"] = app_ctx.extra["vcs"]
+    raw_commands: list[list[str]] = app_ctx.extra["commands"]
+    jobs: int = app_ctx.extra["jobs"]
+    watch: bool = app_ctx.extra["watch"]
     template: bool = app_ctx.extra["template"]
+    options = _TreeOptions.from_extra(app_ctx.extra)
+    limits = _resource_limits(app_ctx.extra)
+    if watch:
+        # The checkout is listed again on every poll
+        keep_listings()
 
-    path = Path.cwd()
+    path, vcs, details, artifact = _load_source(
+        app_ctx.extra["artifact"], options, timings
+    )
+
+    changed_files = None
+    if app_ctx.extra["changed_since"] is not None:
+        changed_files, options = _changed_since(
+            path,
+            details,
+            vcs=vcs,
+            ref=app_ctx.extra["changed_since"],
+            changed_only=app_ctx.extra["changed_only"],
+            options=options,
+            timings=timings,
+        )
+        if not changed_files and not watch:
+            print(
+                f"No files changed since {app_ctx.extra['changed_since']},"
+                " not running any command",
+                file=sys.stderr,
+            )
+            return 0
+
+    with contextlib.ExitStack() as stack:
+        store = stack.enter_context(_object_store(options))
+        root_dir, collection_dir = stack.enter_context(
+            _collection_tree(
+                path,
+                details,
+                vcs=vcs,
+                options=options,
+                store=store,
+                timings=timings,
+                artifact=artifact,
+                verify_checksums=app_ctx.extra["verify_checksums"],
+            )
+        )
+        commands = expand_commands(
+            raw_commands,
+            app_ctx.extra["matrix"],
+            cwd=collection_dir,
+            template=(
+                (
+                    lambda argv, variables: template_argv(
+                        argv,
+                        root_dir=root_dir,
+                        collection_dir=collection_dir,
+                        path=Path.cwd(),
+                        details=details,
+                        variables=variables,
+                        changed_files=changed_files,
+                    )
+                )
+                if template
+                else None
+            ),
+        )
+        with timings.phase("prepare_environment"):
+            env = get_collections_environment(
+                root_dir, os.environ, pin=options.pin_collections_path
+            )
+        timings.notes["collections_path"] = env[ANSIBLE_COLLECTIONS_PATH_VARS[0]]
+        run = functools.partial(
+            _run_commands_once,
+            commands,
+            env=env,
+            jobs=jobs,
+            limits=limits,
+        )
+        with timings.phase("command"), _output_log(app_ctx.extra) as output_log:
+            if app_ctx.extra["result_cache"]:
+                return _run_with_result_cache(
+                    app_ctx.extra,
+                    lambda sink: run(output_log=sink),
+                    collection_dir=collection_dir,
+                    cache_dir=options.cache_dir,
+                    output_log=output_log,
+                    changed_files=changed_files,
+                    timings=timings,
+                )
+            if watch:
+                return watch_collection(
+                    path,
+                    vcs=vcs,
+                    collection_dir=collection_dir,
+                    materialize=options.materialize,
+                    store=store,
+                    file_filter=options.file_filter(details),
+                    run=_command_runner(
+                        commands,
+                        env=env,
+                        jobs=jobs,
+                        output_log=output_log,
+                        limits=limits,
+                    ),
+                    interval=app_ctx.extra["watch_interval"],
+                    debounce=app_ctx.extra["watch_debounce"],
+                )
+            return run(output_log=output_log)
+
+
+def _report_timings(timings: Timings, *, show: bool, json_path: str | None) -> None:
+    if show:
+        print(timings.format_report(), file=sys.stderr, flush=True)
+    if json_path is not None:
+        try:
+            timings.write_json(json_path)
+        except OSError as exc:
+            mlog.fields(func="_report_timings").error(
+                f"Cannot write timings to {json_path}: {exc}"
+            )
+
+
+def run_local_collection() -> int:
+    flog = mlog.fields(func="generate_docs")
+    flog.debug("Begin processing docs")
+
+    app_ctx = app_context.app_ctx.get()
 
+    timings = Timings()
     try:
-        if vcs == "auto":
-            vcs = detect_vcs(path, log_debug=flog.debug, log_info=flog.info)
+        with profile(app_ctx.extra["profile"]):
+            return _run_local_collection(timings)
+    except (ValueError, CopierError) as e:
+        flog.error(str(e))
+        return 5
+    finally:
+        _report_timings(
+            timings,
+            show=app_ctx.extra["timings"],
+            json_path=app_ctx.extra["timings_json"],
+        )
 
-        copier = {
-            "none": Copier,
-            "git": GitCopier,
-        }[vcs]()
 
-        details = load_collection_details(path)
+def _check_unique_collections(
+    paths: Sequence[Path], all_details: Sequence[CollectionDetails]
+) -> None:
+    seen: dict[tuple[str, str], Path] = {}
+    for path, details in zip(paths, all_details):
+        collection = (details.namespace, details.name)
+        if collection in seen:
+            raise ValueError(
+                f"Collection {details.namespace}.{details.name} found both in"
+                f" {seen[collection]} and {path}"
+            )
+        seen[collection] = path
+
 
-        with CollectionCopier(
-            source_directory=str(path),
-            namespace=details.namespace,
-            name=details.name,
-            copier=copier,
+@contextlib.contextmanager
+def _workspace_tree(
+    root_path: Path,
+    collections: Sequence[tuple[Path, CollectionDetails]],
+    *,
+    options: _TreeOptions,
+    store: ObjectStore | None,
+    jobs: int,
+    timings: Timings,
+) -> Iterator[tuple[str, list[str]]]:
+    key = None
+    tmp_root = None
+    listed: dict[Path, list[str]] = {}
+    if options.cache_dir is not None:
+        key = get_cache_key(root_path, "workspace")
+    else:
+        tmp_root, listed = _get_tmp_root(collections, options, timings)
+        if tmp_root is None and store is not None:
+            tmp_root = store.tmp_dir
+    with timings.timed_context(
+        CollectionRoot(
+            cache_dir=options.cache_dir,
+            key=key,
+            tmp_root=tmp_root,
+            store=store,
+            # The collections are already synchronized concurrently
+            workers=1 if jobs > 1 else options.workers,
+            pool_size=options.pool_size,
+            keep_bytecode=options.precompile,
             log_debug=log.debug,
-        ) as (root_dir, collection_dir):
+        ),
+        setup="prepare_tree",
+        cleanup="cleanup",
+    ) as root:
+
+        def materialize_one(
+            collection: tuple[Path, CollectionDetails], *, phase: Phase
+        ) -> str:
+            path, details = collection
+            with timings.phase(f"{details.namespace}.{details.name}", parent=phase):
+                return _materialize_collection(
+                    root,
+                    path,
+                    details,
+                    vcs=options.vcs,
+                    materialize=options.materialize,
+                    file_filter=options.file_filter(details),
+                    cache_dir=options.cache_dir,
+                    timings=timings,
+                    files=listed.get(path),
+                )
+
+        with timings.phase("materialize_collections") as phase:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                collection_dirs = list(
+                    executor.map(
+                        functools.partial(materialize_one, phase=phase), collections
+                    )
+                )
+        root.remove_other_collections(
+            _link_dependencies(root, collections, options, timings)
+        )
+        _precompile(collection_dirs, options, timings)
+        yield root.dir, collection_dirs
+
+
+def _run_collections(timings: Timings) -> int:
+    flog = mlog.fields(func="_run_collections")
+    app_ctx = app_context.app_ctx.get()
+
+    argv: list[str] = app_ctx.extra["argv"]
+    root_path = Path(app_ctx.extra["root"]).absolute()
+    template: bool = app_ctx.extra["template"]
+    options = _TreeOptions.from_extra(app_ctx.extra)
+    jobs: int = app_ctx.extra["jobs"]
+
+    with timings.phase("find_collections") as phase:
+        paths = find_collections(root_path)
+        phase.files = len(paths)
+    if not paths:
+        raise ValueError(f"Cannot find any collection in {root_path}")
+    with timings.phase("load_collection_details"):
+        all_details = load_collections_details(
+            paths, max_workers=jobs, cache_dir=options.cache_dir
+        )
+    _check_unique_collections(paths, all_details)
+    flog.fields(count=len(paths)).info("Found collections")
+
+    with contextlib.ExitStack() as stack:
+        store = stack.enter_context(_object_store(options))
+        root_dir, collection_dirs = stack.enter_context(
+            _workspace_tree(
+                root_path,
+                list(zip(paths, all_details)),
+                options=options,
+                store=store,
+                jobs=jobs,
+                timings=timings,
+            )
+        )
+        commands = []
+        for path, details, collection_dir in zip(paths, all_details, collection_dirs):
+            collection_argv = argv
             if template:
-                argv = _template_argv(
+                collection_argv = template_argv(
                     argv,
                     root_dir=root_dir,
                     collection_dir=collection_dir,
                     path=path,
                     details=details,
                 )
-            env = _prepare_environment(root_dir)
-            p = subprocess.run(argv, check=False, cwd=collection_dir, env=env)
-            return p.returncode
+            commands.append(
+                Command(
+                    argv=collection_argv,
+                    cwd=collection_dir,
+                    label=f"{details.namespace}.{details.name}",
+                )
+            )
+        with timings.phase("prepare_environment"):
+            env = get_collections_environment(
+                root_dir, os.environ, pin=options.pin_collections_path
+            )
+        with timings.phase("command"), _output_log(app_ctx.extra) as output_log:
+            return run_commands(
+                commands,
+                env=env,
+                jobs=jobs,
+                output_log=output_log,
+                limits=_resource_limits(app_ctx.extra),
+            )
+
+
+def run_collections() -> int:
+    flog = mlog.fields(func="run_collections")
+    flog.debug("Begin running command in collections")
+
+    app_ctx = app_context.app_ctx.get()
+
+    timings = Timings()
+    try:
+        return _run_collections(timings)
     except (ValueError, CopierError) as e:
         flog.error(str(e))
         return 5
+    finally:
+        _report_timings(
+            timings,
+            show=app_ctx.extra["timings"],
+            json_path=app_ctx.extra["timings_json"],
+        )
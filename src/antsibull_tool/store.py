@@ -0,0 +1,264 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Content-addressed store that collection trees are assembled from by hardlinking."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import shutil
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+import typing as t
+from collections.abc import Iterator
+
+from antsibull_fileutils.copier import CopierError
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    object TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+
+
+def _hash_file(path: StrPath) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@contextlib.contextmanager
+def _db_errors(path: str) -> Iterator[None]:
+    try:
+        yield
+    except sqlite3.Error as exc:
+        raise CopierError(
+            f"Error while accessing the object store {path}: {exc}"
+        ) from exc
+
+
+def get_default_store_dir() -> str:
+    """
+    Return the default location of the object store in the user's cache directory.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "antsibull-tool", "store")
+
+
+class ObjectStore:
+    """
+    A content-addressed store of files.
+
+    Every file is stored once per content and executable bit as a read-only
+    object named after its SHA-256 hash. Trees hardlink to the objects, so trees
+    with mostly identical files share their storage. An index maps the path and
+    stat results of source files to objects, so unchanged files do not need to
+    be hashed again. Several processes can use the same store at the same time.
+
+    Objects that are not linked into any tree anymore are removed by
+    :meth:`collect_garbage`, least recently used first.
+    """
+
+    def __init__(
+        self, path: StrPath, *, log_debug: t.Callable[[str], None] | None = None
+    ):
+        self.path = os.path.realpath(path)
+        self.objects_dir = os.path.join(self.path, "objects")
+        #: Temporary trees should be created here to be on the same filesystem
+        self.tmp_dir = os.path.join(self.path, "tmp")
+        self._log_debug = log_debug
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._used: dict[str, int] = {}
+
+    def _do_log_debug(self, msg: str, *args: t.Any) -> None:
+        if self._log_debug:
+            self._log_debug(msg, *args)
+
+    def __enter__(self) -> ObjectStore:
+        try:
+            os.makedirs(self.objects_dir, mode=0o700, exist_ok=True)
+            os.makedirs(self.tmp_dir, mode=0o700, exist_ok=True)
+        except OSError as exc:
+            raise CopierError(
+                f"Error while preparing the object store {self.path}: {exc}"
+            ) from exc
+        with _db_errors(self.path):
+            self._db = sqlite3.connect(
+                os.path.join(self.path, "index.sqlite3"),
+                timeout=60,
+                check_same_thread=False,
+            )
+            with self._db:
+                self._db.executescript(_SCHEMA)
+        return self
+
+    def __exit__(self, type_, value, traceback_):
+        if self._db is None:
+            return
+        try:
+            self._flush_used()
+        finally:
+            self._db.close()
+            self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise ValueError("The object store has not been opened")
+        return self._db
+
+    def object_path(self, name: str) -> str:
+        """
+        Return the path of the object ``name``.
+        """
+        return os.path.join(self.objects_dir, name[:2], name[2:])
+
+    def _lookup(self, path: str, st: os.stat_result) -> str | None:
+        with self._lock, _db_errors(self.path):
+            row = self.db.execute(
+                "SELECT dev, ino, size, mtime_ns, mode, object FROM sources"
+                " WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if row is None or tuple(row[:5]) != (
+            st.st_dev,
+            st.st_ino,
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_mode,
+        ):
+            return None
+        return row[5]
+
+    def _store_object(self, path: str, name: str, st: os.stat_result) -> None:
+        object_path = self.object_path(name)
+        os.makedirs(os.path.dirname(object_path), mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, prefix="object")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            mode = 0o444
+            if st.st_mode & stat.S_IXUSR:
+                mode |= 0o111
+            # Trees link to the object, so it must never be modified
+            os.chmod(tmp_path, mode)
+            try:
+                os.link(tmp_path, object_path)
+            except FileExistsError:
+                # Another process stored the same object in the meantime
+                pass
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+        self._do_log_debug("Stored {!r} as object {}", path, name)
+
+    def add(self, path: StrPath, st: os.stat_result | None = None) -> str:
+        """
+        Make sure the regular file ``path`` is in the store and return the object's path.
+
+        ``st`` is the result of ``os.stat(path)`` if already known.
+        """
+        path = os.path.realpath(path)
+        if st is None:
+            st = os.stat(path)
+        name = self._lookup(path, st)
+        if name is None or not os.path.exists(self.object_path(name)):
+            name = _hash_file(path)
+            if st.st_mode & stat.S_IXUSR:
+                name += "x"
+            if not os.path.exists(self.object_path(name)):
+                self._store_object(path, name, st)
+            with self._lock, _db_errors(self.path), self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        path,
+                        st.st_dev,
+                        st.st_ino,
+                        st.st_size,
+                        st.st_mtime_ns,
+                        st.st_mode,
+                        name,
+                    ),
+                )
+        with self._lock:
+            self._used[name] = st.st_size
+        return self.object_path(name)
+
+    def _flush_used(self) -> None:
+        now = time.time()
+        with self._lock, _db_errors(self.path), self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?)",
+                [(name, size, now) for name, size in self._used.items()],
+            )
+            self._used.clear()
+
+    def collect_garbage(self, max_size: int) -> int:
+        """
+        Remove unused objects until they take at most ``max_size`` bytes.
+
+        Objects still linked into a tree are never removed, and do not count
+        towards ``max_size``. Returns the number of removed objects.
+        """
+        self._flush_used()
+        with self._lock, _db_errors(self.path):
+            rows = self.db.execute(
+                "SELECT name, size FROM objects ORDER BY last_used DESC"
+            ).fetchall()
+        unused: list[tuple[str, int]] = []
+        for name, size in rows:
+            with contextlib.suppress(FileNotFoundError):
+                if os.stat(self.object_path(name)).st_nlink > 1:
+                    continue
+            unused.append((name, size))
+        total = sum(size for _, size in unused)
+        removed: list[str] = []
+        while unused and total > max_size:
+            name, size = unused.pop()
+            object_path = self.object_path(name)
+            try:
+                if os.stat(object_path).st_nlink > 1:
+                    # Linked into a tree in the meantime
+                    continue
+                os.unlink(object_path)
+            except FileNotFoundError:
+                pass
+            removed.append(name)
+            total -= size
+        with self._lock, _db_errors(self.path), self.db:
+            self.db.executemany(
+                "DELETE FROM objects WHERE name = ?", [(name,) for name in removed]
+            )
+            self.db.executemany(
+                "DELETE FROM sources WHERE object = ?", [(name,) for name in removed]
+            )
+        self._do_log_debug("Removed {} objects from the store", len(removed))
+        return len(removed)
@@ -0,0 +1,100 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Template and expand the commands run in collection trees."""
+
+from __future__ import annotations
+
+import itertools
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path
+
+from .collection import CollectionDetails
+from .execute import Command
+
+#: Arguments consisting only of this are replaced by the changed files
+CHANGED_FILES_ARG = "{changed_files}"
+
+
+def template_argv(
+    argv: Sequence[str],
+    *,
+    root_dir: str,
+    collection_dir: str,
+    path: Path,
+    details: CollectionDetails,
+    variables: Mapping[str, str] | None = None,
+    changed_files: Sequence[str] | None = None,
+) -> list[str]:
+    """
+    Replace the template variables in the arguments of a command.
+
+    ``variables`` are the values of the matrix variables. An argument consisting
+    only of ``{changed_files}`` is replaced by ``changed_files``, if provided.
+    """
+    subs = {
+        "root_path": root_dir,
+        "collection_path": collection_dir,
+        "cwd": str(path),
+        "namespace": details.namespace,
+        "name": details.name,
+        "collection_name": f"{details.namespace}.{details.name}",
+    }
+    if variables:
+        if conflicts := sorted((subs.keys() | {"changed_files"}) & variables.keys()):
+            raise ValueError(
+                f"Matrix variables must not be named like template variables:"
+                f" {', '.join(conflicts)}"
+            )
+        subs.update(variables)
+    result: list[str] = []
+    for i, arg in enumerate(argv):
+        if changed_files is not None and arg == CHANGED_FILES_ARG:
+            result.extend(changed_files)
+            continue
+        try:
+            result.append(arg.format(**subs))
+        except Exception as exc:
+            raise ValueError(
+                f"Error while templating argument {arg!r} (#{i + 1}): {exc}"
+            ) from exc
+    return result
+
+
+def expand_matrix(matrix: Mapping[str, Sequence[str]]) -> list[dict[str, str]]:
+    """
+    Return all combinations of the values of the matrix variables.
+    """
+    names = list(matrix)
+    return [dict(zip(names, values)) for values in itertools.product(*matrix.values())]
+
+
+def expand_commands(
+    commands: Sequence[list[str]],
+    matrix: Mapping[str, Sequence[str]],
+    *,
+    cwd: str,
+    template: Callable[[Sequence[str], Mapping[str, str]], list[str]] | None,
+) -> list[Command]:
+    """
+    Expand the commands over the Cartesian product of the matrix variables.
+
+    The commands are labelled with their number if there are several, and with
+    the values of the matrix variables.
+    """
+    combinations = expand_matrix(matrix)
+    result: list[Command] = []
+    for index, argv in enumerate(commands, 1):
+        for variables in combinations:
+            label = [str(index)] if len(commands) > 1 or not matrix else []
+            label.extend(f"{name}={value}" for name, value in variables.items())
+            result.append(
+                Command(
+                    argv=list(argv) if template is None else template(argv, variables),
+                    cwd=cwd,
+                    label=" ".join(label),
+                )
+            )
+    return result
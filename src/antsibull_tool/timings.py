@@ -0,0 +1,192 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Record how much time the phases of a run take."""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import dataclasses
+import json
+import resource
+import threading
+import time
+import typing as t
+from collections.abc import Iterator
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+
+@contextlib.contextmanager
+def profile(path: StrPath | None) -> Iterator[None]:
+    """
+    Profile the ``with`` block with :mod:`cProfile` and write the statistics to
+    ``path``, if provided.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def _children_cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@dataclasses.dataclass
+class Phase:
+    """
+    Time and resources spent in one phase.
+    """
+
+    name: str
+    #: Wall clock time in seconds
+    wall: float = 0.0
+    #: CPU time of this process in seconds
+    cpu: float = 0.0
+    #: CPU time of child processes that exited during the phase in seconds
+    children_cpu: float = 0.0
+    #: Number of files processed, if applicable
+    files: int | None = None
+    #: Number of bytes processed, if applicable
+    bytes: int | None = None
+    #: Name of the phase this one is part of, if any
+    parent: str | None = None
+
+
+class Timings:
+    """
+    Collects the :class:`Phase` objects of a run, in the order they started.
+
+    Phases started while another phase of the same thread is running are part of
+    that phase, and do not count towards the total.
+    """
+
+    def __init__(self) -> None:
+        self.phases: list[Phase] = []
+        #: Additional information about the run that is shown with the timings
+        self.notes: dict[str, t.Any] = {}
+        self._running = threading.local()
+        # Maps the id() of every phase to the phase it is part of
+        self._parents: dict[int, Phase | None] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str, *, parent: Phase | None = None) -> Iterator[Phase]:
+        """
+        Measure the time spent in the ``with`` block.
+
+        The yielded :class:`Phase` can be used to record file and byte counts.
+        ``parent`` defaults to the innermost running phase of the current thread;
+        it must be provided for phases run by other threads on behalf of a phase.
+        """
+        if not hasattr(self._running, "phases"):
+            self._running.phases = []
+        running: list[Phase] = self._running.phases
+        if parent is None and running:
+            parent = running[-1]
+        phase = Phase(name, parent=None if parent is None else parent.name)
+        self._parents[id(phase)] = parent
+        self.phases.append(phase)
+        running.append(phase)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children_cpu = _children_cpu_time()
+        try:
+            yield phase
+        finally:
+            phase.wall = time.perf_counter() - wall
+            phase.cpu = time.process_time() - cpu
+            phase.children_cpu = _children_cpu_time() - children_cpu
+            running.pop()
+
+    @contextlib.contextmanager
+    def timed_context(
+        self, cm: t.ContextManager[t.Any], *, setup: str, cleanup: str
+    ) -> Iterator[t.Any]:
+        """
+        Enter the context manager ``cm``, measuring entering and exiting it as phases.
+        """
+        with contextlib.ExitStack() as stack:
+            with self.phase(setup):
+                value = stack.enter_context(cm)
+            try:
+                yield value
+            finally:
+                with self.phase(cleanup):
+                    stack.close()
+
+    def as_dict(self) -> dict[str, t.Any]:
+        """
+        Return a JSON-serializable representation of the timings.
+        """
+        top_level = [phase for phase in self.phases if phase.parent is None]
+        return {
+            "phases": [dataclasses.asdict(phase) for phase in self.phases],
+            "total": {
+                "wall": sum(phase.wall for phase in top_level),
+                "cpu": sum(phase.cpu for phase in top_level),
+                "children_cpu": sum(phase.children_cpu for phase in top_level),
+            },
+            "notes": self.notes,
+        }
+
+    def write_json(self, path: StrPath) -> None:
+        """
+        Write the timings as JSON to ``path``.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write("\n")
+
+    def _walk(self) -> list[tuple[int, Phase]]:
+        # All phases with their nesting depth, each one followed by its parts
+        parts: dict[int | None, list[Phase]] = {}
+        for phase in self.phases:
+            parent = self._parents.get(id(phase))
+            parts.setdefault(None if parent is None else id(parent), []).append(phase)
+        result: list[tuple[int, Phase]] = []
+
+        def visit(key: int | None, depth: int) -> None:
+            for phase in parts.get(key, []):
+                result.append((depth, phase))
+                visit(id(phase), depth + 1)
+
+        visit(None, 0)
+        return result
+
+    def format_report(self) -> str:
+        """
+        Format the timings as a human readable table.
+        """
+        lines = [
+            f"{'Phase':<24} {'Wall':>9} {'CPU':>9} {'Child CPU':>9}"
+            f" {'Files':>8} {'Bytes':>12}"
+        ]
+        for depth, phase in self._walk():
+            # Phases that are part of another one are indented
+            name = f"{'  ' * depth}{phase.name}"
+            files = "" if phase.files is None else str(phase.files)
+            size = "" if phase.bytes is None else str(phase.bytes)
+            lines.append(
+                f"{name:<24} {phase.wall:>8.3f}s {phase.cpu:>8.3f}s"
+                f" {phase.children_cpu:>8.3f}s {files:>8} {size:>12}".rstrip()
+            )
+        total = self.as_dict()["total"]
+        lines.append(
+            f"{'Total':<24} {total['wall']:>8.3f}s {total['cpu']:>8.3f}s"
+            f" {total['children_cpu']:>8.3f}s"
+        )
+        for name, value in self.notes.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
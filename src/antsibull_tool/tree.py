@@ -0,0 +1,844 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Collection trees that can be kept and incrementally synchronized between runs."""
+
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import errno
+import fcntl
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import time
+import typing as t
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from antsibull_fileutils.copier import CopierError
+from antsibull_fileutils.tempfile import ansible_mkdtemp, is_acceptable_tempdir
+
+from .files import walk_files
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+    from .store import ObjectStore
+
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+#: Files at least this large are copied in the kernel, and synchronized one at a time
+_LARGE_FILE_SIZE = 1024 * 1024
+
+# Small files are synchronized in batches of at most this many files or bytes, so
+# that the overhead of handing them to a worker does not dominate
+_BATCH_FILES = 64
+_BATCH_BYTES = 1024 * 1024
+
+# How many bytes copy_file_range() and sendfile() should copy per call
+_COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Directory with Python bytecode, which is kept in trees across synchronizations
+_BYTECODE_DIRECTORY = "__pycache__"
+
+# How often to check whether a tree of a pool became available
+_POOL_POLL_INTERVAL = 0.1
+
+# How often to add an object to the store again if garbage collection in
+# another process removed it before it could be linked
+_STORE_LINK_ATTEMPTS = 3
+
+# ioctl request number of Linux's FICLONE
+_FICLONE = 0x40049409
+
+#: How files are placed into a collection tree. ``symlink`` links the whole
+#: collection directory and is handled by :meth:`CollectionRoot.materialize_collection`.
+#: ``store`` hardlinks files from an :class:`antsibull_tool.store.ObjectStore`.
+MaterializeStrategy = t.Literal["copy", "hardlink", "reflink", "symlink", "store"]
+
+
+@dataclasses.dataclass
+class SyncStats:
+    """
+    Statistics of a tree synchronization.
+    """
+
+    copied: int = 0
+    linked: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    copied_bytes: int = 0
+
+    def add(self, other: SyncStats) -> None:
+        self.copied += other.copied
+        self.linked += other.linked
+        self.unchanged += other.unchanged
+        self.deleted += other.deleted
+        self.copied_bytes += other.copied_bytes
+
+
+def _hash_file(path: StrPath) -> bytes:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def _is_internal(directory: str, link: str) -> bool:
+    dest = os.path.normpath(os.path.join(directory, link))
+    if os.path.isabs(dest):
+        return False
+    return not (dest == ".." or dest.startswith(".." + os.sep))
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def _parent_directories(files: Iterable[str]) -> set[str]:
+    result: set[str] = set()
+    for file in files:
+        directory = os.path.dirname(file)
+        while directory and directory not in result:
+            result.add(directory)
+            directory = os.path.dirname(directory)
+    return result
+
+
+def _reflink_file(full_source: str, full_dest: str) -> None:
+    with open(full_source, "rb") as fsrc, open(full_dest, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    shutil.copystat(full_source, full_dest)
+
+
+# Errors that indicate that copy_file_range() cannot be used for the two files
+_COPY_FILE_RANGE_NOT_SUPPORTED_ERRNOS = frozenset(
+    {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF}
+)
+
+
+def _copy_file_range(fsrc: int, fdst: int, size: int) -> bool:
+    """
+    Copy with ``copy_file_range()``, which can share the data on filesystems
+    supporting it. Returns ``False`` if it cannot be used.
+    """
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    offset = 0
+    while True:
+        try:
+            copied = copy_file_range(fsrc, fdst, _COPY_CHUNK_SIZE)
+        except OSError as exc:
+            if offset == 0 and exc.errno in _COPY_FILE_RANGE_NOT_SUPPORTED_ERRNOS:
+                return False
+            raise
+        if copied == 0:
+            # Some filesystems report EOF for files with content they cannot copy
+            return offset > 0 or size == 0
+        offset += copied
+
+
+def _sendfile(fsrc: int, fdst: int) -> None:
+    offset = 0
+    while copied := os.sendfile(fdst, fsrc, offset, _COPY_CHUNK_SIZE):
+        offset += copied
+
+
+def _copy_large_file(full_source: str, full_dest: str, size: int) -> None:
+    """
+    Copy a file like ``shutil.copy2()``, but without moving the data through userspace.
+    """
+    with open(full_source, "rb") as fsrc, open(full_dest, "wb") as fdst:
+        if not _copy_file_range(fsrc.fileno(), fdst.fileno(), size):
+            try:
+                _sendfile(fsrc.fileno(), fdst.fileno())
+            except OSError as exc:
+                if exc.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK):
+                    raise
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                shutil.copyfileobj(fsrc, fdst)
+    shutil.copystat(full_source, full_dest)
+
+
+def _batch_files(files: list[tuple[str, int]]) -> Iterator[list[str]]:
+    """
+    Group files with their sizes so that large files are alone in their batch.
+    """
+    batch: list[str] = []
+    batch_bytes = 0
+    for relative_path, size in files:
+        if size >= _LARGE_FILE_SIZE:
+            yield [relative_path]
+            continue
+        batch.append(relative_path)
+        batch_bytes += size
+        if len(batch) >= _BATCH_FILES or batch_bytes >= _BATCH_BYTES:
+            yield batch
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield batch
+
+
+# Errors that indicate that the filesystem does not support hardlinks or reflinks
+# between source and destination
+_LINK_NOT_SUPPORTED_ERRNOS = frozenset(
+    {
+        errno.EXDEV,
+        errno.EPERM,
+        errno.EMLINK,
+        errno.EINVAL,
+        errno.ENOTTY,
+        errno.EOPNOTSUPP,
+        errno.ENOSYS,
+    }
+)
+
+
+class _TreeSynchronizer:
+    def __init__(
+        self,
+        source: StrPath,
+        dest: StrPath,
+        *,
+        strategy: MaterializeStrategy = "copy",
+        store: ObjectStore | None = None,
+        workers: int | None = None,
+        keep_bytecode: bool = False,
+        log_debug: t.Callable[[str], None] | None = None,
+    ):
+        if strategy == "symlink":
+            raise ValueError("Cannot synchronize single files with symlink strategy")
+        if strategy == "store" and store is None:
+            raise ValueError("store must be provided for the store strategy")
+        self.source = str(source)
+        self.dest = str(dest)
+        self.strategy = strategy
+        self.store = store
+        self.workers = workers
+        self.keep_bytecode = keep_bytecode
+        self._log_debug = log_debug
+        self.stats = SyncStats()
+
+    def _do_log_debug(self, msg: str, *args: t.Any) -> None:
+        if self._log_debug:
+            self._log_debug(msg, *args)
+
+    def delete_extra(self, files: set[str]) -> None:
+        directories = _parent_directories(files)
+        for root, dirs, dir_files in os.walk(self.dest, topdown=True):
+            directory = os.path.relpath(root, self.dest)
+            prefix = "" if directory == "." else f"{directory.replace(os.sep, '/')}/"
+            for a_dir in list(dirs):
+                relative_path = f"{prefix}{a_dir}"
+                if relative_path in directories:
+                    continue
+                dirs.remove(a_dir)
+                if relative_path in files:
+                    # Symlinks to directories are listed as directories
+                    continue
+                if a_dir == _BYTECODE_DIRECTORY and self.keep_bytecode:
+                    # Bytecode stays valid as long as the sources are unchanged,
+                    # and is ignored once they are removed
+                    continue
+                self._do_log_debug("Removing directory {!r}", relative_path)
+                _remove(os.path.join(root, a_dir))
+                self.stats.deleted += 1
+            for file in dir_files:
+                relative_path = f"{prefix}{file}"
+                if relative_path not in files:
+                    self._do_log_debug("Removing file {!r}", relative_path)
+                    os.unlink(os.path.join(root, file))
+                    self.stats.deleted += 1
+
+    def _sync_link(self, relative_path: str, full_source: str, full_dest: str) -> None:
+        directory = os.path.dirname(relative_path)
+        link = os.readlink(full_source)
+        full_directory = os.path.join(self.source, directory)
+        link = os.path.relpath(os.path.join(full_directory, link), full_directory)
+
+        if not _is_internal(directory, link):
+            real_source = os.path.realpath(full_source)
+            if os.path.isdir(real_source):
+                if os.path.islink(full_dest) or os.path.isfile(full_dest):
+                    os.unlink(full_dest)
+                sub_sync = _TreeSynchronizer(
+                    real_source,
+                    full_dest,
+                    strategy=self.strategy,
+                    store=self.store,
+                    workers=self.workers,
+                    keep_bytecode=self.keep_bytecode,
+                    log_debug=self._log_debug,
+                )
+                sub_sync.sync(walk_files(real_source))
+                self.strategy = sub_sync.strategy
+                self.stats.add(sub_sync.stats)
+            else:
+                self._sync_file(real_source, full_dest, self.stats)
+            return
+
+        try:
+            if os.readlink(full_dest) == link:
+                self.stats.unchanged += 1
+                return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Not a symlink
+            _remove(full_dest)
+        else:
+            os.unlink(full_dest)
+        self._do_log_debug("Creating symlink {!r} to {!r}", full_dest, link)
+        os.symlink(link, full_dest)
+        self.stats.copied += 1
+
+    def _is_unchanged(
+        self, source_st: os.stat_result, full_source: str, full_dest: str
+    ) -> bool:
+        try:
+            dest_st = os.lstat(full_dest)
+        except FileNotFoundError:
+            return False
+        if not stat.S_ISREG(dest_st.st_mode):
+            _remove(full_dest)
+            return False
+        if (source_st.st_dev, source_st.st_ino) == (dest_st.st_dev, dest_st.st_ino):
+            # Hardlinked files are always up-to-date. If the strategy changed since the
+            # tree was created, they are replaced so the source is never modified.
+            return self.strategy == "hardlink"
+        if dest_st.st_nlink > 1 or source_st.st_mode != dest_st.st_mode:
+            # Linked from the store, whose objects must not be modified, while
+            # the strategy is not store (anymore)
+            return False
+        if source_st.st_size != dest_st.st_size:
+            return False
+        if source_st.st_mtime_ns == dest_st.st_mtime_ns:
+            return True
+        if _hash_file(full_source) != _hash_file(full_dest):
+            return False
+        # Same content, only the metadata differs
+        shutil.copystat(full_source, full_dest)
+        return True
+
+    def _link_file(self, full_source: str, full_dest: str) -> bool:
+        try:
+            if self.strategy == "hardlink":
+                os.link(full_source, full_dest)
+            else:
+                _reflink_file(full_source, full_dest)
+            return True
+        except OSError as exc:
+            if exc.errno not in _LINK_NOT_SUPPORTED_ERRNOS:
+                raise
+            self._do_log_debug(
+                "Cannot {} {!r} to {!r}, falling back to copying: {}",
+                self.strategy,
+                full_source,
+                full_dest,
+                exc,
+            )
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(full_dest)
+            # Do not try again for the remaining files
+            self.strategy = "copy"
+            return False
+
+    @staticmethod
+    def _link_from_store(
+        store: ObjectStore, full_source: str, full_dest: str, stats: SyncStats
+    ) -> None:
+        """
+        Hardlink the store's object for ``full_source`` to ``full_dest``.
+
+        Another process can remove the object while collecting garbage before it
+        is linked, since it is not linked into any tree yet. In that case, the
+        object is added to the store again.
+        """
+        source_st = os.stat(full_source)
+        for attempt in range(_STORE_LINK_ATTEMPTS):
+            object_path = store.add(full_source, source_st)
+            try:
+                object_st = os.stat(object_path)
+                try:
+                    dest_st = os.lstat(full_dest)
+                except FileNotFoundError:
+                    pass
+                else:
+                    if (dest_st.st_dev, dest_st.st_ino) == (
+                        object_st.st_dev,
+                        object_st.st_ino,
+                    ):
+                        stats.unchanged += 1
+                        return
+                    _remove(full_dest)
+                os.link(object_path, full_dest)
+                stats.linked += 1
+                return
+            except FileNotFoundError:
+                if attempt == _STORE_LINK_ATTEMPTS - 1 or os.path.exists(object_path):
+                    raise
+
+    def _sync_file_from_store(
+        self, store: ObjectStore, full_source: str, full_dest: str, stats: SyncStats
+    ) -> None:
+        try:
+            self._link_from_store(store, full_source, full_dest, stats)
+        except OSError as exc:
+            if exc.errno not in _LINK_NOT_SUPPORTED_ERRNOS:
+                raise
+            self._do_log_debug(
+                "Cannot link {!r} from the store, falling back to copying: {}",
+                full_dest,
+                exc,
+            )
+            # Do not try again for the remaining files
+            self.strategy = "copy"
+            self._sync_file(full_source, full_dest, stats)
+
+    def _sync_file(self, full_source: str, full_dest: str, stats: SyncStats) -> None:
+        # Other workers can change the strategy when falling back to copying
+        strategy = self.strategy
+        if strategy == "store" and self.store is not None:
+            self._sync_file_from_store(self.store, full_source, full_dest, stats)
+            return
+        source_st = os.stat(full_source)
+        if self._is_unchanged(source_st, full_source, full_dest):
+            stats.unchanged += 1
+            return
+        # Never write into an existing file, it might be linked to the source
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(full_dest)
+        if strategy != "copy":
+            self._do_log_debug(
+                "Linking file {!r} to {!r} ({})", full_source, full_dest, strategy
+            )
+            if self._link_file(full_source, full_dest):
+                stats.linked += 1
+                return
+        self._do_log_debug("Copying file {!r} to {!r}", full_source, full_dest)
+        if source_st.st_size >= _LARGE_FILE_SIZE:
+            _copy_large_file(full_source, full_dest, source_st.st_size)
+        else:
+            shutil.copy2(full_source, full_dest)
+        stats.copied += 1
+        stats.copied_bytes += source_st.st_size
+
+    def _sync_batch(self, batch: list[str]) -> SyncStats:
+        stats = SyncStats()
+        for relative_path in batch:
+            self._sync_file(
+                os.path.join(self.source, relative_path),
+                os.path.join(self.dest, relative_path),
+                stats,
+            )
+        return stats
+
+    def sync(self, files: Iterable[str]) -> None:
+        file_set = set(files)
+        os.makedirs(self.dest, mode=0o700, exist_ok=True)
+        self.delete_extra(file_set)
+        self._sync_files(file_set)
+
+    def update(self, changed: Iterable[str], removed: Iterable[str]) -> None:
+        for relative_path in sorted(removed, reverse=True):
+            full_dest = os.path.join(self.dest, relative_path)
+            self._do_log_debug("Removing {!r}", relative_path)
+            try:
+                _remove(full_dest)
+            except FileNotFoundError:
+                continue
+            self.stats.deleted += 1
+            # Remove directories that became empty, but keep dest itself
+            directory = os.path.dirname(full_dest)
+            while directory != self.dest:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+        self._sync_files(set(changed))
+
+    def _sync_files(self, file_set: set[str]) -> None:
+        os.makedirs(self.dest, mode=0o700, exist_ok=True)
+        for directory in sorted(_parent_directories(file_set)):
+            os.makedirs(os.path.join(self.dest, directory), mode=0o700, exist_ok=True)
+        regular_files: list[tuple[str, int]] = []
+        for relative_path in sorted(file_set):
+            full_source = os.path.join(self.source, relative_path)
+            st = os.lstat(full_source)
+            if stat.S_ISLNK(st.st_mode):
+                # Symlinks can recurse into other trees, so they are not parallelized
+                self._sync_link(
+                    relative_path, full_source, os.path.join(self.dest, relative_path)
+                )
+            else:
+                regular_files.append((relative_path, st.st_size))
+        batches = list(_batch_files(regular_files))
+        if self.workers == 1 or len(batches) <= 1:
+            for batch in batches:
+                self.stats.add(self._sync_batch(batch))
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for stats in executor.map(self._sync_batch, batches):
+                self.stats.add(stats)
+
+
+def sync_tree(
+    source: StrPath,
+    dest: StrPath,
+    files: Iterable[str],
+    *,
+    strategy: MaterializeStrategy = "copy",
+    store: ObjectStore | None = None,
+    workers: int | None = None,
+    keep_bytecode: bool = False,
+    log_debug: t.Callable[[str], None] | None = None,
+) -> SyncStats:
+    """
+    Make ``dest`` contain exactly the ``files`` from ``source``.
+
+    Files whose size and modification time match are not touched. If only the
+    modification time differs, the contents are compared before copying. Files
+    and directories in ``dest`` that are not part of ``files`` are removed. With
+    ``keep_bytecode``, ``__pycache__`` directories are kept, so that bytecode of
+    unchanged files does not need to be compiled again.
+    Symlinks are handled as by ``antsibull_fileutils.copier.Copier``.
+
+    With ``strategy`` set to ``hardlink`` or ``reflink``, files are hardlinked
+    respectively cloned instead of copied. With ``strategy`` set to ``store``,
+    files are added to ``store`` and hardlinked from there. If the filesystem
+    does not support this, files are copied instead.
+
+    Files are synchronized by a pool of ``workers`` threads (by default as many as
+    :class:`concurrent.futures.ThreadPoolExecutor` uses), with small files grouped
+    into batches. Large files are copied with ``copy_file_range()`` or
+    ``sendfile()`` if possible.
+    """
+    synchronizer = _TreeSynchronizer(
+        source,
+        dest,
+        strategy=strategy,
+        store=store,
+        workers=workers,
+        keep_bytecode=keep_bytecode,
+        log_debug=log_debug,
+    )
+    try:
+        synchronizer.sync(files)
+    except OSError as exc:
+        raise CopierError(
+            f"Error while synchronizing {source} to {dest}: {exc}"
+        ) from exc
+    return synchronizer.stats
+
+
+def update_tree(
+    source: StrPath,
+    dest: StrPath,
+    changed: Iterable[str],
+    removed: Iterable[str],
+    *,
+    strategy: MaterializeStrategy = "copy",
+    store: ObjectStore | None = None,
+    workers: int | None = None,
+    log_debug: t.Callable[[str], None] | None = None,
+) -> SyncStats:
+    """
+    Apply changes of ``source`` to a tree ``dest`` created by :func:`sync_tree`.
+
+    The ``changed`` files are synchronized like by :func:`sync_tree`, and the
+    ``removed`` ones are removed from ``dest``, together with directories that
+    became empty. Other files in ``dest`` are not looked at.
+    """
+    synchronizer = _TreeSynchronizer(
+        source,
+        dest,
+        strategy=strategy,
+        store=store,
+        workers=workers,
+        log_debug=log_debug,
+    )
+    try:
+        synchronizer.update(changed, removed)
+    except OSError as exc:
+        raise CopierError(f"Error while updating {dest} from {source}: {exc}") from exc
+    return synchronizer.stats
+
+
+def get_cache_key(source_directory: StrPath, label: str) -> str:
+    """
+    Compute the name of the cached tree for a directory.
+
+    ``label`` is included to make the name human readable, for example the
+    collection's name.
+    """
+    path_hash = hashlib.sha256(os.fsencode(os.path.realpath(source_directory)))
+    return f"{label}-{path_hash.hexdigest()[:16]}"
+
+
+def select_tmp_root(size: int, *, tmpfs_dir: StrPath, budget: int) -> StrPath | None:
+    """
+    Return ``tmpfs_dir`` if a tree of ``size`` bytes fits into it, and ``None`` otherwise.
+
+    The tree fits if ``size`` is at most ``budget``, and ``tmpfs_dir`` is a
+    writable directory with enough free space.
+    """
+    if size > budget:
+        return None
+    try:
+        st = os.statvfs(tmpfs_dir)
+    except OSError:
+        return None
+    if size > st.f_bavail * st.f_frsize or not os.access(tmpfs_dir, os.W_OK):
+        return None
+    return tmpfs_dir
+
+
+class CollectionRoot:
+    """
+    Provides a directory containing a ``collections/ansible_collections`` tree.
+
+    If ``cache_dir`` is provided, the tree is stored in a subdirectory of it
+    named ``key`` and kept after exiting, so later runs only need to synchronize
+    changed files. The tree is locked while in use. Otherwise, a temporary
+    directory is created that is removed on exit. It is created in ``tmp_root``
+    if provided, and in the system's temporary directory otherwise.
+
+    With ``pool_size`` larger than one, a pool of that many trees is kept for
+    ``key``, so that several runs can use their own tree at the same time. Every
+    run uses a tree that is not in use, or waits until one becomes available.
+
+    ``workers`` is the number of threads used to synchronize files, and
+    ``keep_bytecode`` whether to keep ``__pycache__`` directories, see
+    :func:`sync_tree`.
+    """
+
+    def __init__(
+        self,
+        *,
+        cache_dir: StrPath | None = None,
+        key: str | None = None,
+        tmp_root: StrPath | None = None,
+        store: ObjectStore | None = None,
+        workers: int | None = None,
+        pool_size: int = 1,
+        keep_bytecode: bool = False,
+        log_debug: t.Callable[[str], None] | None = None,
+    ):
+        if cache_dir is not None and key is None:
+            raise ValueError("key must be provided when cache_dir is provided")
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.cache_dir = cache_dir
+        self.key = key
+        self.tmp_root = tmp_root
+        self.store = store
+        self.workers = workers
+        self.pool_size = pool_size
+        self.keep_bytecode = keep_bytecode
+        self._log_debug = log_debug
+        self._lock_fd: int | None = None
+        self.dir = ""
+
+    def _do_log_debug(self, msg: str, *args: t.Any) -> None:
+        if self._log_debug:
+            self._log_debug(msg, *args)
+
+    def _try_lock(self, trees_dir: str, key: str, *, block: bool = False) -> bool:
+        lock_path = os.path.join(trees_dir, f"{key}.lock")
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if block else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except BaseException:
+            os.close(fd)
+            raise
+        self._lock_fd = fd
+        return True
+
+    def _lock(self, trees_dir: str) -> str:
+        """
+        Lock a tree that is not in use and return its key.
+        """
+        if self.pool_size == 1:
+            keys = [str(self.key)]
+        else:
+            keys = [f"{self.key}-{slot}" for slot in range(self.pool_size)]
+        while True:
+            for key in keys:
+                if self._try_lock(trees_dir, key):
+                    return key
+            self._do_log_debug("Waiting for one of the trees {!r}", keys)
+            if len(keys) == 1:
+                self._try_lock(trees_dir, keys[0], block=True)
+                return keys[0]
+            time.sleep(_POOL_POLL_INTERVAL)
+
+    def _unlock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _mkdtemp(self) -> str:
+        if self.tmp_root is None:
+            return os.path.realpath(ansible_mkdtemp(prefix="antsibull-tool"))
+        tmp_root = os.path.realpath(self.tmp_root)
+        if not is_acceptable_tempdir(Path(tmp_root)):
+            raise CopierError(
+                f"Temporary directory {tmp_root} must not be inside an"
+                " ansible_collections tree"
+            )
+        try:
+            return tempfile.mkdtemp(prefix="antsibull-tool", dir=tmp_root)
+        except OSError as exc:
+            raise CopierError(
+                f"Error while creating temporary directory in {tmp_root}: {exc}"
+            ) from exc
+
+    def __enter__(self) -> CollectionRoot:
+        if self.cache_dir is None:
+            self.dir = self._mkdtemp()
+            self._do_log_debug("Using temporary collection root {!r}", self.dir)
+            return self
+        trees_dir = os.path.join(os.path.realpath(self.cache_dir), "trees")
+        try:
+            os.makedirs(trees_dir, exist_ok=True)
+            key = self._lock(trees_dir)
+        except OSError as exc:
+            self._unlock()
+            raise CopierError(
+                f"Error while preparing cache directory {self.cache_dir}: {exc}"
+            ) from exc
+        self.dir = os.path.join(trees_dir, key)
+        self._do_log_debug("Using cached collection root {!r}", self.dir)
+        return self
+
+    def __exit__(self, type_, value, traceback_):
+        if self.cache_dir is None:
+            shutil.rmtree(self.dir, ignore_errors=True)
+        self._unlock()
+
+    @property
+    def collections_dir(self) -> str:
+        """
+        The ``ansible_collections`` directory of the tree.
+        """
+        return os.path.join(self.dir, "collections", "ansible_collections")
+
+    def collection_dir(self, namespace: str, name: str) -> str:
+        """
+        The directory of a collection in the tree.
+        """
+        return os.path.join(self.collections_dir, namespace, name)
+
+    def remove_other_collections(self, keep: set[tuple[str, str]]) -> int:
+        """
+        Remove all collections from the tree whose namespace and name is not in ``keep``.
+
+        Returns the number of removed collections.
+        """
+        removed = 0
+        collections_dir = self.collections_dir
+        if not os.path.isdir(collections_dir):
+            return removed
+        for namespace in os.listdir(collections_dir):
+            namespace_dir = os.path.join(collections_dir, namespace)
+            if not os.path.isdir(namespace_dir):
+                # Not a namespace, like .DS_Store
+                continue
+            for name in os.listdir(namespace_dir):
+                if (namespace, name) not in keep:
+                    self._do_log_debug("Removing collection {}.{}", namespace, name)
+                    _remove(os.path.join(namespace_dir, name))
+                    removed += 1
+        return removed
+
+    def sync_collection(
+        self,
+        source_directory: StrPath,
+        namespace: str,
+        name: str,
+        files: list[str],
+        *,
+        strategy: MaterializeStrategy = "copy",
+    ) -> SyncStats:
+        """
+        Synchronize the ``files`` of a collection checkout into the tree.
+        """
+        collection_dir = self.collection_dir(namespace, name)
+        if os.path.islink(collection_dir):
+            os.unlink(collection_dir)
+        return sync_tree(
+            source_directory,
+            collection_dir,
+            files,
+            strategy=strategy,
+            store=self.store,
+            workers=self.workers,
+            keep_bytecode=self.keep_bytecode,
+            log_debug=self._log_debug,
+        )
+
+    def link_collection(
+        self, source_directory: StrPath, namespace: str, name: str
+    ) -> SyncStats:
+        """
+        Make the collection's directory in the tree a symlink to ``source_directory``.
+        """
+        collection_dir = self.collection_dir(namespace, name)
+        source = os.path.realpath(source_directory)
+        try:
+            if os.path.islink(collection_dir):
+                if os.readlink(collection_dir) == source:
+                    return SyncStats(unchanged=1)
+                os.unlink(collection_dir)
+            elif os.path.exists(collection_dir):
+                shutil.rmtree(collection_dir)
+            os.makedirs(os.path.dirname(collection_dir), mode=0o700, exist_ok=True)
+            self._do_log_debug("Creating symlink {!r} to {!r}", collection_dir, source)
+            os.symlink(source, collection_dir)
+        except OSError as exc:
+            raise CopierError(
+                f"Error while linking {source} to {collection_dir}: {exc}"
+            ) from exc
+        return SyncStats(linked=1)
+
+    def materialize_collection(
+        self,
+        source_directory: StrPath,
+        namespace: str,
+        name: str,
+        files: list[str] | None,
+        *,
+        strategy: MaterializeStrategy = "copy",
+    ) -> SyncStats:
+        """
+        Place a collection checkout into the tree.
+
+        ``files`` can only be ``None`` for the ``symlink`` strategy, which ignores it.
+        """
+        if strategy == "symlink":
+            return self.link_collection(source_directory, namespace, name)
+        if files is None:
+            raise ValueError(f"files must be provided for strategy {strategy}")
+        return self.sync_collection(
+            source_directory, namespace, name, files, strategy=strategy
+        )
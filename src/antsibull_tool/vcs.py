@@ -0,0 +1,366 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Detect Git repositories and list their files with cached git ls-files calls."""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import subprocess
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from _typeshed import StrPath
+
+#: Stamps of the files and directories whose changes can change the file list
+_Stamps = dict[str, tuple[int, int]]
+
+
+#: Environment variables that change which files Git lists; listings are not
+#: cached while one of them is set
+_GIT_ENV_VARS = (
+    "GIT_DIR",
+    "GIT_WORK_TREE",
+    "GIT_COMMON_DIR",
+    "GIT_INDEX_FILE",
+    "GIT_CONFIG",
+    "GIT_CONFIG_COUNT",
+    "GIT_CONFIG_GLOBAL",
+    "GIT_CONFIG_NOSYSTEM",
+    "GIT_CONFIG_PARAMETERS",
+    "GIT_CONFIG_SYSTEM",
+)
+
+
+def _find_git(path: StrPath) -> tuple[str, str] | None:
+    """
+    Return the root of the work tree containing ``path`` and its Git directory.
+    """
+    directory = os.path.realpath(path)
+    while True:
+        candidate = os.path.join(directory, ".git")
+        if os.path.isdir(candidate):
+            return directory, candidate
+        if os.path.isfile(candidate):
+            try:
+                with open(candidate, encoding="utf-8") as f:
+                    content = f.read().strip()
+            except OSError:
+                return None
+            if not content.startswith("gitdir:"):
+                return None
+            return directory, os.path.join(directory, content[len("gitdir:") :].strip())
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def find_git_dir(path: StrPath) -> str | None:
+    """
+    Find the Git directory of the work tree containing ``path`` without running git.
+
+    Supports ``.git`` files as used by worktrees and submodules. Returns ``None``
+    if ``path`` is not inside a work tree.
+    """
+    found = _find_git(path)
+    return None if found is None else found[1]
+
+
+def _stamp(path: str) -> tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _get_common_dir(git_dir: str) -> str:
+    # Worktrees share the configuration and info/exclude with the main repository
+    try:
+        with open(os.path.join(git_dir, "commondir"), encoding="utf-8") as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+def _get_config_stamp_paths(path: str, git_dir: str) -> list[str]:
+    """
+    Return the Git configuration files and the ignore files outside of the work
+    tree that can change the file list.
+    """
+    common_dir = _get_common_dir(git_dir)
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    try:
+        excludes_file = _run_git(
+            path, ["config", "--path", "--get", "core.excludesFile"]
+        ).decode("utf-8")
+    except ValueError:
+        # Not configured
+        excludes_file = ""
+    return [
+        os.path.join(git_dir, "index"),
+        os.path.join(common_dir, "info", "exclude"),
+        os.path.join(common_dir, "config"),
+        os.path.expanduser("~/.gitconfig"),
+        os.path.join(config_home, "git", "config"),
+        "/etc/gitconfig",
+        os.path.abspath(
+            excludes_file.strip() or os.path.join(config_home, "git", "ignore")
+        ),
+    ]
+
+
+def _get_stamps(path: str, work_tree: str, git_dir: str, files: list[str]) -> _Stamps:
+    # New or removed files change the modification time of their directory,
+    # changes to tracked files change the index, and changes to ignore files and
+    # the configuration change what is reported as untracked. Directories with
+    # listed files and their subdirectories are stamped; below directories
+    # without listed files, which are mostly ignored, new files are not noticed.
+    paths = set(_get_config_stamp_paths(path, git_dir))
+    directory = path
+    while True:
+        # Ignore files above the collection root
+        paths.add(os.path.join(directory, ".gitignore"))
+        if directory == work_tree or os.path.dirname(directory) == directory:
+            break
+        directory = os.path.dirname(directory)
+    directories = {""}
+    for file in files:
+        parent = os.path.dirname(file)
+        while parent not in directories:
+            directories.add(parent)
+            parent = os.path.dirname(parent)
+    for relative_dir in directories:
+        paths.add(relative_dir)
+        paths.add(os.path.join(relative_dir, ".gitignore"))
+        try:
+            with os.scandir(os.path.join(path, relative_dir)) as entries:
+                paths.update(
+                    os.path.join(relative_dir, entry.name)
+                    for entry in entries
+                    if entry.name != ".git" and entry.is_dir(follow_symlinks=False)
+                )
+        except OSError:
+            pass
+    return {stamp_path: _stamp(os.path.join(path, stamp_path)) for stamp_path in paths}
+
+
+@dataclasses.dataclass
+class _Listing:
+    git_dir: str
+    stamps: _Stamps
+    files: list[str]
+
+    def is_current(self, path: str) -> bool:
+        return all(
+            _stamp(os.path.join(path, stamp_path)) == stamp
+            for stamp_path, stamp in self.stamps.items()
+        )
+
+
+#: Maps the real path of a directory to the last listing of its files
+_LISTING_CACHE: dict[str, _Listing] = {}
+
+#: Maps the real path of a directory to its listing by :func:`detect_vcs`, which
+#: is used once by the next listing if the listings are not kept
+_DETECTED_LISTINGS: dict[str, list[str]] = {}
+
+_KEEP_LISTINGS = False
+
+
+def keep_listings() -> None:
+    """
+    Keep the listings of :func:`list_git_files_cached` in memory even without a
+    cache directory, for long-running processes like the daemon and watch mode.
+    """
+    global _KEEP_LISTINGS  # pylint: disable=global-statement
+    _KEEP_LISTINGS = True
+
+
+def _get_disk_cache_path(cache_dir: StrPath, path: str) -> str:
+    path_hash = hashlib.sha256(os.fsencode(path)).hexdigest()
+    return os.path.join(cache_dir, "git", f"{path_hash}.json")
+
+
+def _load_from_disk_cache(cache_dir: StrPath, path: str) -> _Listing | None:
+    try:
+        with open(_get_disk_cache_path(cache_dir, path), "rb") as f:
+            data = json.load(f)
+        return _Listing(
+            git_dir=data["git_dir"],
+            stamps={key: tuple(value) for key, value in data["stamps"].items()},
+            files=data["files"],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _store_in_disk_cache(cache_dir: StrPath, path: str, listing: _Listing) -> None:
+    cache_path = _get_disk_cache_path(cache_dir, path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dataclasses.asdict(listing), f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+
+def _run_ls_files(path: str) -> list[str]:
+    try:
+        output = subprocess.check_output(
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--deduplicate",
+            ],
+            cwd=path,
+            stderr=subprocess.PIPE,
+        ).strip(b"\x00")
+    except subprocess.CalledProcessError as exc:
+        raise ValueError("Error while running git") from exc
+    except FileNotFoundError as exc:
+        raise ValueError("Cannot find git executable") from exc
+    if not output:
+        return []
+    return [file.decode("utf-8") for file in output.split(b"\x00")]
+
+
+def _run_git(path: str, args: list[str]) -> bytes:
+    try:
+        return subprocess.check_output(["git", *args], cwd=path, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as exc:
+        stderr = exc.stderr.decode("utf-8", errors="replace").strip()
+        raise ValueError(f"Error while running git {args[0]}: {stderr}") from exc
+    except FileNotFoundError as exc:
+        raise ValueError("Cannot find git executable") from exc
+
+
+def _split_z(output: bytes) -> list[str]:
+    output = output.strip(b"\x00")
+    if not output:
+        return []
+    return [file.decode("utf-8") for file in output.split(b"\x00")]
+
+
+def list_changed_files(path: StrPath, ref: str) -> list[str]:
+    """
+    List the files in ``path`` that were added or modified since the merge base of
+    ``ref`` and ``HEAD``, including uncommitted changes and untracked files that
+    are not ignored. Deleted files are not listed.
+
+    The returned paths are relative to ``path``, sorted, and use ``/`` as a
+    separator. Raises ``ValueError`` if ``ref`` does not exist or git fails.
+    """
+    real_path = os.path.realpath(path)
+    merge_base = _run_git(real_path, ["merge-base", ref, "HEAD"]).decode().strip()
+    changed = _split_z(
+        _run_git(
+            real_path,
+            [
+                "diff",
+                "--name-only",
+                "-z",
+                "--relative",
+                "--no-renames",
+                "--diff-filter=d",
+                merge_base,
+                "--",
+            ],
+        )
+    )
+    untracked = _split_z(
+        _run_git(real_path, ["ls-files", "-z", "--others", "--exclude-standard"])
+    )
+    return sorted({*changed, *untracked})
+
+
+def list_git_files_cached(
+    path: StrPath, *, cache_dir: StrPath | None = None
+) -> list[str]:
+    """
+    List all files not ignored by Git in ``path``, like ``git ls-files`` does.
+
+    The result is cached in ``cache_dir`` if provided, and in memory if
+    :func:`keep_listings` was called. A cached listing is reused as long as the
+    Git index, the ignore files (also above ``path`` and ``core.excludesFile``),
+    the Git configuration, and the directories containing listed files and their
+    subdirectories did not change. Otherwise, only one ``git ls-files`` call is
+    made. While environment variables like ``GIT_DIR`` are set, the files are
+    always listed by git.
+
+    Raises ``ValueError`` if ``path`` is not part of a Git work tree or git fails.
+    """
+    real_path = os.path.realpath(path)
+    detected = _DETECTED_LISTINGS.pop(real_path, None)
+    if detected is not None:
+        return detected
+    found = _find_git(real_path)
+    if found is None and "GIT_DIR" not in os.environ:
+        raise ValueError(f"{path} is not part of a Git repository")
+    if (
+        found is None
+        or any(name in os.environ for name in _GIT_ENV_VARS)
+        or (cache_dir is None and not _KEEP_LISTINGS)
+    ):
+        # The inputs of the listing cannot be checked without running git, or
+        # the listing would not be used again
+        return _run_ls_files(real_path)
+    work_tree, git_dir = found
+
+    listing = _LISTING_CACHE.get(real_path)
+    if listing is None and cache_dir is not None:
+        listing = _load_from_disk_cache(cache_dir, real_path)
+    if listing is not None and listing.git_dir == git_dir:
+        if listing.is_current(real_path):
+            _LISTING_CACHE[real_path] = listing
+            return listing.files
+
+    start = time.time_ns()
+    files = _run_ls_files(real_path)
+    listing = _Listing(
+        git_dir=git_dir,
+        stamps=_get_stamps(real_path, work_tree, git_dir, files),
+        files=files,
+    )
+    # Changes within the timestamp granularity of the filesystem might not be
+    # visible in the stamps, so only cache listings of settled trees
+    if all(stamp[0] < start - 1_000_000_000 for stamp in listing.stamps.values()):
+        _LISTING_CACHE[real_path] = listing
+        if cache_dir is not None:
+            _store_in_disk_cache(cache_dir, real_path, listing)
+    return files
+
+
+def detect_vcs(
+    path: StrPath, *, cache_dir: StrPath | None = None
+) -> t.Literal["none", "git"]:
+    """
+    Detect whether ``path`` is part of a Git work tree.
+
+    Outside of Git repositories, no subprocess is started. Inside, the files are
+    listed right away with :func:`list_git_files_cached`. Where that listing is not
+    cached, the next listing of ``path`` uses it.
+    """
+    if find_git_dir(path) is None and "GIT_DIR" not in os.environ:
+        return "none"
+    try:
+        files = list_git_files_cached(path, cache_dir=cache_dir)
+    except ValueError:
+        return "none"
+    if cache_dir is None and not _KEEP_LISTINGS:
+        _DETECTED_LISTINGS[os.path.realpath(path)] = files
+    return "git"
@@ -0,0 +1,220 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+"""Watch a collection checkout for changes and re-run commands."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import os
+import sys
+import typing as t
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from antsibull_core.logging import log
+from antsibull_fileutils.copier import CopierError
+
+from .files import FileFilter, list_files
+from .store import ObjectStore
+from .tree import MaterializeStrategy, update_tree
+
+mlog = log.fields(mod=__name__)
+
+#: Maps the relative path of every file to its modification time and size
+Snapshot = dict[str, tuple[int, int]]
+
+
+def take_snapshot(
+    path: Path,
+    vcs: t.Literal["none", "git"],
+    file_filter: FileFilter | None = None,
+) -> Snapshot:
+    """
+    Record modification time and size of all files of a collection checkout.
+    """
+    result: Snapshot = {}
+    for file in list_files(path, vcs, file_filter):
+        try:
+            st = os.lstat(path / file)
+        except FileNotFoundError:
+            continue
+        result[file] = (st.st_mtime_ns, st.st_size)
+    return result
+
+
+@dataclasses.dataclass(frozen=True)
+class Changes:
+    """
+    Files that changed between two snapshots, as sorted relative paths.
+    """
+
+    added: list[str]
+    modified: list[str]
+    removed: list[str]
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Changes:
+    """
+    Determine which files were added, modified, and removed from ``old`` to ``new``.
+    """
+    return Changes(
+        added=sorted(new.keys() - old.keys()),
+        modified=sorted(
+            file for file, value in new.items() if old.get(file, value) != value
+        ),
+        removed=sorted(old.keys() - new.keys()),
+    )
+
+
+def _print_status(message: str) -> None:
+    print(f"[watch] {message}", file=sys.stderr, flush=True)
+
+
+class Watcher:
+    """
+    Re-runs a command whenever files of a collection checkout change.
+
+    The checkout is polled every ``interval`` seconds. A run that is still in
+    progress is cancelled as soon as a change has been detected. The watcher then
+    waits until no further changes happened for ``debounce`` seconds, calls
+    ``sync`` with the changes since the last synchronization, and restarts
+    ``run``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        vcs: t.Literal["none", "git"],
+        sync: Callable[[Changes], None],
+        run: Callable[[], Awaitable[int]],
+        interval: float,
+        debounce: float,
+        file_filter: FileFilter | None = None,
+    ):
+        self.path = path
+        self.vcs = vcs
+        self.file_filter = file_filter
+        self.sync = sync
+        self.run = run
+        self.interval = interval
+        self.debounce = debounce
+
+    async def _snapshot(self) -> Snapshot:
+        return await asyncio.to_thread(
+            take_snapshot, self.path, self.vcs, self.file_filter
+        )
+
+    async def _wait_for_change(self, snapshot: Snapshot) -> Snapshot:
+        while True:
+            await asyncio.sleep(self.interval)
+            new_snapshot = await self._snapshot()
+            if new_snapshot != snapshot:
+                return new_snapshot
+
+    async def _wait_until_unchanged(self, new_snapshot: Snapshot) -> Snapshot:
+        while True:
+            await asyncio.sleep(self.debounce)
+            newer_snapshot = await self._snapshot()
+            if newer_snapshot == new_snapshot:
+                return new_snapshot
+            new_snapshot = newer_snapshot
+
+    async def _run(self) -> int:
+        returncode = await self.run()
+        _print_status(f"Command exited with return code {returncode}")
+        _print_status("Waiting for changes...")
+        return returncode
+
+    async def watch(self) -> t.NoReturn:
+        """
+        Run the command and re-run it on changes until cancelled.
+        """
+        flog = mlog.fields(func="Watcher.watch")
+        snapshot = synced = await self._snapshot()
+        task = asyncio.create_task(self._run())
+        try:
+            while True:
+                snapshot = await self._wait_for_change(snapshot)
+                if not task.done():
+                    _print_status("Files changed, cancelling running command")
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                snapshot = await self._wait_until_unchanged(snapshot)
+                _print_status("Files changed, re-running command")
+                changes = diff_snapshots(synced, snapshot)
+                try:
+                    await asyncio.to_thread(self.sync, changes)
+                except CopierError as exc:
+                    # Files might have changed again while synchronizing; the
+                    # next synchronization includes these changes again
+                    _print_status(f"Cannot synchronize changes: {exc}")
+                    continue
+                synced = snapshot
+                flog.fields(
+                    added=len(changes.added),
+                    modified=len(changes.modified),
+                    removed=len(changes.removed),
+                ).debug("Synchronized tree")
+                task = asyncio.create_task(self._run())
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def watch_collection(
+    path: Path,
+    *,
+    vcs: t.Literal["none", "git"],
+    collection_dir: str,
+    materialize: MaterializeStrategy,
+    store: ObjectStore | None,
+    file_filter: FileFilter,
+    run: Callable[[], Awaitable[int]],
+    interval: float,
+    debounce: float,
+) -> int:
+    """
+    Run ``run`` and re-run it on changes of the collection checkout ``path``,
+    which is materialized to ``collection_dir``, until interrupted.
+
+    Returns 130, the return code of a program interrupted by SIGINT.
+    """
+
+    def sync(changes: Changes) -> None:
+        if materialize == "symlink":
+            return
+        stats = update_tree(
+            path,
+            collection_dir,
+            changes.added + changes.modified,
+            changes.removed,
+            strategy=materialize,
+            store=store,
+            log_debug=log.debug,
+        )
+        mlog.fields(
+            func="watch_collection",
+            copied=stats.copied,
+            linked=stats.linked,
+            deleted=stats.deleted,
+        ).info("Synchronized changes")
+
+    watcher = Watcher(
+        path,
+        vcs=vcs,
+        sync=sync,
+        run=run,
+        interval=interval,
+        debounce=debounce,
+        file_filter=file_filter,
+    )
+    try:
+        asyncio.run(watcher.watch())
+    except KeyboardInterrupt:
+        pass
+    return 130
@@ -0,0 +1,223 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tarfile
+
+import pytest
+
+from antsibull_tool.artifact import (
+    extract_artifact,
+    get_artifact_size,
+    load_artifact_metadata,
+)
+from antsibull_tool.files import FileFilter
+
+_FILES = {
+    "plugins/modules/foo.py": b"x = 1\n",
+    "plugins/module_utils/bar.py": b"y = 2\n",
+    "tests/unit/test_foo.py": b"def test_foo():\n    pass\n",
+    "docs/big.txt": b"0123456789" * 200_000,
+}
+
+
+def _add_file(tar, name, content, mode=0o644):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mode = mode
+    info.mtime = 1_700_000_000
+    tar.addfile(info, io.BytesIO(content))
+
+
+def _build_artifact(path, files, *, listed=None, symlinks=None):
+    if listed is None:
+        listed = files
+    symlinks = symlinks or {}
+    dirs = sorted(
+        directory
+        for directory in {os.path.dirname(name) for name in listed} - {""}
+        if not any(
+            directory == link or directory.startswith(f"{link}/") for link in symlinks
+        )
+    )
+    entries = [{"name": ".", "ftype": "dir"}]
+    entries.extend({"name": name, "ftype": "dir"} for name in dirs)
+    entries.extend({"name": name, "ftype": "file"} for name in symlinks)
+    entries.extend(
+        {
+            "name": name,
+            "ftype": "file",
+            "chksum_type": "sha256",
+            "chksum_sha256": hashlib.sha256(content).hexdigest(),
+        }
+        for name, content in listed.items()
+    )
+    files_json = json.dumps({"files": entries, "format": 1}).encode("utf-8")
+    manifest_json = json.dumps(
+        {
+            "collection_info": {"namespace": "foo", "name": "bar", "version": "1.0.0"},
+            "file_manifest_file": {
+                "name": "FILES.json",
+                "ftype": "file",
+                "chksum_type": "sha256",
+                "chksum_sha256": hashlib.sha256(files_json).hexdigest(),
+            },
+            "format": 1,
+        }
+    ).encode("utf-8")
+    with tarfile.open(path, mode="w:gz") as tar:
+        _add_file(tar, "MANIFEST.json", manifest_json)
+        _add_file(tar, "FILES.json", files_json)
+        for name in dirs:
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.DIRTYPE
+            info.mode = 0o755
+            tar.addfile(info)
+        for name, target in symlinks.items():
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tar.addfile(info)
+        for name, content in files.items():
+            _add_file(tar, name, content, mode=0o755 if name.endswith(".sh") else 0o644)
+
+
+def test_load_artifact_metadata(tmp_path):
+    artifact = tmp_path / "foo-bar-1.0.0.tar.gz"
+    _build_artifact(artifact, _FILES)
+
+    metadata = load_artifact_metadata(artifact)
+    assert metadata.details.namespace == "foo"
+    assert metadata.details.name == "bar"
+    assert metadata.details.version == "1.0.0"
+    assert metadata.checksums["plugins/modules/foo.py"] == (
+        hashlib.sha256(_FILES["plugins/modules/foo.py"]).hexdigest()
+    )
+    assert metadata.checksums["plugins/modules"] is None
+
+    assert get_artifact_size(artifact) > sum(len(c) for c in _FILES.values())
+
+    # FILES.json must match its checksum in MANIFEST.json
+    broken = tmp_path / "broken.tar.gz"
+    with tarfile.open(artifact) as src, tarfile.open(broken, mode="w:gz") as dest:
+        for member in src:
+            if member.name == "FILES.json":
+                _add_file(dest, member.name, b'{"files": [], "format": 1}')
+            else:
+                dest.addfile(member, src.extractfile(member))
+    with pytest.raises(ValueError, match="Checksum of FILES.json"):
+        load_artifact_metadata(broken)
+
+    not_a_tarball = tmp_path / "foo.tar.gz"
+    not_a_tarball.write_text("foo", encoding="utf-8")
+    with pytest.raises(ValueError, match="Error while loading collection artifact"):
+        load_artifact_metadata(not_a_tarball)
+
+
+def test_extract_artifact(tmp_path):
+    artifact = tmp_path / "foo-bar-1.0.0.tar.gz"
+    _build_artifact(artifact, {**_FILES, "tests/run.sh": b"#!/bin/sh\n"})
+    metadata = load_artifact_metadata(artifact)
+    dest = tmp_path / "tree" / "ansible_collections" / "foo" / "bar"
+
+    stats = extract_artifact(artifact, dest, metadata, verify=True, workers=2)
+    assert stats.copied == 7
+    assert (dest / "MANIFEST.json").is_file()
+    assert (dest / "docs" / "big.txt").read_bytes() == _FILES["docs/big.txt"]
+    assert (dest / "plugins" / "modules" / "foo.py").stat().st_mtime == 1_700_000_000
+    assert os.access(dest / "tests" / "run.sh", os.X_OK)
+
+    # Only the files passing the filter are extracted, and the destination is replaced
+    stats = extract_artifact(
+        artifact,
+        dest,
+        metadata,
+        file_filter=FileFilter(include=["plugins"], exclude=["plugins/module_utils"]),
+        verify=True,
+    )
+    assert stats.copied == 3
+    assert sorted(
+        os.path.relpath(os.path.join(dirpath, filename), dest)
+        for dirpath, _, filenames in os.walk(dest)
+        for filename in filenames
+    ) == ["FILES.json", "MANIFEST.json", "plugins/modules/foo.py"]
+
+
+def test_extract_artifact_verify(tmp_path):
+    artifact = tmp_path / "foo-bar-1.0.0.tar.gz"
+    _build_artifact(
+        artifact,
+        {**_FILES, "plugins/modules/foo.py": b"x = 2\n"},
+        listed=_FILES,
+    )
+    metadata = load_artifact_metadata(artifact)
+    dest = tmp_path / "dest"
+
+    with pytest.raises(ValueError, match="plugins/modules/foo.py has checksum"):
+        extract_artifact(artifact, dest, metadata, verify=True)
+
+    # Without verification, the files are extracted as they are
+    extract_artifact(artifact, dest, metadata)
+    assert (dest / "plugins" / "modules" / "foo.py").read_bytes() == b"x = 2\n"
+
+    missing = tmp_path / "missing.tar.gz"
+    _build_artifact(missing, {"plugins/modules/foo.py": b"x = 1\n"}, listed=_FILES)
+    with pytest.raises(ValueError, match="docs/big.txt is missing"):
+        extract_artifact(missing, dest, load_artifact_metadata(missing), verify=True)
+
+    # Members that are not listed in FILES.json are not extracted, and fail verification
+    unlisted = tmp_path / "unlisted.tar.gz"
+    _build_artifact(unlisted, {**_FILES, "plugins/evil.py": b"x = 3\n"}, listed=_FILES)
+    metadata = load_artifact_metadata(unlisted)
+    with pytest.raises(ValueError, match="plugins/evil.py is not listed in FILES.json"):
+        extract_artifact(unlisted, dest, metadata, verify=True)
+    extract_artifact(unlisted, dest, metadata)
+    assert not (dest / "plugins" / "evil.py").exists()
+
+
+def test_extract_artifact_unsafe(tmp_path):
+    artifact = tmp_path / "foo-bar-1.0.0.tar.gz"
+    _build_artifact(artifact, {"../evil.py": b"x = 1\n"}, listed={})
+    metadata = load_artifact_metadata(artifact)
+    with pytest.raises(ValueError, match="outside of the collection"):
+        extract_artifact(artifact, tmp_path / "dest", metadata)
+    assert not (tmp_path / "evil.py").exists()
+
+
+def test_extract_artifact_symlinks(tmp_path):
+    artifact = tmp_path / "foo-bar-1.0.0.tar.gz"
+    _build_artifact(
+        artifact,
+        {"plugins/modules/foo.py": b"x = 1\n"},
+        symlinks={"plugins/modules/bar.py": "foo.py", "docs": "plugins"},
+    )
+    dest = tmp_path / "dest"
+    extract_artifact(artifact, dest, load_artifact_metadata(artifact), verify=True)
+    assert os.readlink(dest / "plugins" / "modules" / "bar.py") == "foo.py"
+    assert os.readlink(dest / "docs") == "plugins"
+
+    outside = tmp_path / "outside.tar.gz"
+    _build_artifact(outside, {}, symlinks={"sub/link": "../.."})
+    with pytest.raises(ValueError, match="points outside of the collection"):
+        extract_artifact(outside, dest, load_artifact_metadata(outside))
+
+    # Chained symlinks that only point outside when writing through them
+    chained = tmp_path / "chained.tar.gz"
+    _build_artifact(
+        chained,
+        {"sub/l/m/PWNED": b"x = 1\n"},
+        symlinks={"sub/l": "..", "sub/l/m": ".."},
+    )
+    dest = tmp_path / "x" / "d"
+    with pytest.raises(ValueError, match="symlink 'sub/l'"):
+        extract_artifact(chained, dest, load_artifact_metadata(chained), verify=True)
+    assert not (tmp_path / "x" / "m").exists()
+    assert not (tmp_path / "x" / "PWNED").exists()
+    assert not (dest / "m").exists()
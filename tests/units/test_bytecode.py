@@ -0,0 +1,55 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+
+from antsibull_tool.bytecode import precompile_tree
+
+
+def _bytecode(path):
+    return (
+        path.parent / "__pycache__" / f"{path.stem}.{sys.implementation.cache_tag}.pyc"
+    )
+
+
+def test_precompile_tree(tmp_path):
+    module = tmp_path / "plugins" / "modules" / "foo.py"
+    broken = tmp_path / "plugins" / "modules" / "broken.py"
+    test_output = tmp_path / "tests" / "output" / "bar.py"
+    for path in (module, broken, test_output):
+        path.parent.mkdir(parents=True, exist_ok=True)
+    module.write_text("x = 1\n", encoding="utf-8")
+    broken.write_text("print 'Python 2'\n", encoding="utf-8")
+    test_output.write_text("y = 2\n", encoding="utf-8")
+
+    precompile_tree(tmp_path, workers=2)
+    assert _bytecode(module).is_file()
+    assert importlib.util.cache_from_source(str(module)) == str(_bytecode(module))
+    assert not _bytecode(broken).exists()
+    assert not _bytecode(test_output).exists()
+
+    # Interpreters can be listed explicitly
+    _bytecode(module).unlink()
+    precompile_tree(tmp_path, pythons=[sys.executable], workers=1)
+    assert _bytecode(module).is_file()
+
+
+def test_precompile_tree_symlink(tmp_path):
+    checkout = tmp_path / "checkout"
+    module = checkout / "plugins" / "modules" / "foo.py"
+    module.parent.mkdir(parents=True)
+    module.write_text("x = 1\n", encoding="utf-8")
+    tree = tmp_path / "tree"
+    tree.mkdir()
+    (tree / "linked").symlink_to(checkout)
+    (tree / "plugins").symlink_to(checkout / "plugins")
+
+    # Nothing is written into the checkout through symlinks
+    precompile_tree(tree / "linked", workers=1)
+    precompile_tree(tree, workers=1)
+    assert not _bytecode(module).exists()
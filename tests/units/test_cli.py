@@ -0,0 +1,106 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+
+import pytest
+from antsibull_core.args import InvalidArgumentError
+
+from antsibull_tool.cli import parse_args
+
+# Modules that must not be imported before the arguments have been parsed
+HEAVY_MODULES = (
+    "antsibull_core.app_context",
+    "antsibull_core.config",
+    "antsibull_core.logging",
+    "antsibull_tool.run",
+    "pydantic",
+    "twiggy",
+)
+
+_IMPORT_TIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+
+def _import_times(code: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        encoding="utf-8",
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME_RE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(2))
+    return times
+
+
+def test_import_does_not_load_heavy_modules():
+    times = _import_times("import antsibull_tool.cli")
+    assert "antsibull_tool.cli" in times
+    for module in HEAVY_MODULES:
+        assert module not in times
+
+
+def test_help_does_not_load_heavy_modules():
+    times = _import_times(
+        "import contextlib, io\n"
+        "from antsibull_tool.cli import run\n"
+        "with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):\n"
+        "    run(['antsibull-tool', 'run-local-collection', '--help'])\n"
+    )
+    for module in HEAVY_MODULES:
+        assert module not in times
+
+
+def test_parse_matrix():
+    args = parse_args(
+        "antsibull-tool",
+        [
+            "run-local-collection",
+            "--matrix",
+            "python=3.11,3.12",
+            "--matrix",
+            "target=a",
+            "--",
+            "ansible-test",
+            "units",
+            "--python",
+            "{python}",
+        ],
+    )
+    assert args.matrix == {"python": ["3.11", "3.12"], "target": ["a"]}
+    assert args.template
+
+    for spec in ("python", "1=a", "python=a"):
+        with pytest.raises(InvalidArgumentError):
+            parse_args(
+                "antsibull-tool",
+                [
+                    "run-local-collection",
+                    "--matrix",
+                    "python=3.11",
+                    "--matrix",
+                    spec,
+                    "--",
+                    "true",
+                ],
+            )
+
+
+def test_parse_resource_limits(monkeypatch):
+    monkeypatch.setattr("os.geteuid", lambda: 1000)
+    args = parse_args(
+        "antsibull-tool", ["run-local-collection", "--nice", "5", "--", "true"]
+    )
+    assert args.nice == 5
+    with pytest.raises(InvalidArgumentError, match="Only root"):
+        parse_args(
+            "antsibull-tool", ["run-local-collection", "--nice", "-5", "--", "true"]
+        )
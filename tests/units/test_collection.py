@@ -8,7 +8,13 @@ import re
 
 import pytest
 
-from antsibull_tool.collection import CollectionDetails, load_collection_details
+from antsibull_tool.collection import (
+    _DETAILS_CACHE,
+    CollectionDetails,
+    find_collections,
+    load_collection_details,
+    load_collections_details,
+)
 
 LOAD_DATA_GOOD = [
     (
@@ -19,6 +25,28 @@ name: bar
         "galaxy.yml",
         CollectionDetails(namespace="foo", name="bar", dependencies={}),
     ),
+    (
+        r"""---
+namespace: foo
+name: bar
+build_ignore:
+  - docs
+  - "*.tar.gz"
+""",
+        "galaxy.yml",
+        CollectionDetails(
+            namespace="foo", name="bar", build_ignore=["docs", "*.tar.gz"]
+        ),
+    ),
+    (
+        r"""---
+namespace: foo
+name: bar
+build_ignore:
+""",
+        "galaxy.yml",
+        CollectionDetails(namespace="foo", name="bar"),
+    ),
     (
         r"""{
  "collection_info": {
@@ -51,7 +79,9 @@ name: bar
  "format": 1
 }""",
         "MANIFEST.json",
-        CollectionDetails(namespace="testns", name="testcol", dependencies={}),
+        CollectionDetails(
+            namespace="testns", name="testcol", version="0.1.1231", dependencies={}
+        ),
     ),
 ]
 
@@ -102,3 +132,66 @@ def test_load_collection_details_failure_2(tmp_path):
         match=f"^Cannot find galaxy.yml or MANIFEST.json in {re.escape(str(tmp_path))}$",
     ):
         load_collection_details(tmp_path)
+
+
+def test_find_collections(tmp_path):
+    for path, filename in [
+        ("a", "galaxy.yml"),
+        ("a/tests/b", "galaxy.yml"),
+        ("c/d", "MANIFEST.json"),
+        (".tox/e", "galaxy.yml"),
+    ]:
+        (tmp_path / path).mkdir(parents=True)
+        (tmp_path / path / filename).write_text("", encoding="utf-8")
+    (tmp_path / "f").mkdir()
+
+    assert find_collections(tmp_path) == [tmp_path / "a", tmp_path / "c/d"]
+
+
+def test_load_collections_details(tmp_path):
+    paths = []
+    for name in ("a", "b"):
+        path = tmp_path / name
+        path.mkdir()
+        (path / "galaxy.yml").write_text(
+            f"namespace: foo\nname: {name}\n", encoding="utf-8"
+        )
+        paths.append(path)
+
+    assert load_collections_details(paths, max_workers=2) == [
+        CollectionDetails(namespace="foo", name="a"),
+        CollectionDetails(namespace="foo", name="b"),
+    ]
+
+
+def test_load_collection_details_cache(tmp_path):
+    collection = tmp_path / "collection"
+    collection.mkdir()
+    galaxy_yml = collection / "galaxy.yml"
+    galaxy_yml.write_text("namespace: foo\nname: bar\nversion: 1.0\n", encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+    expected = CollectionDetails(namespace="foo", name="bar", version="1.0")
+
+    assert load_collection_details(collection, cache_dir=cache_dir) == expected
+    assert len(list((cache_dir / "metadata").iterdir())) == 1
+
+    # The disk cache is used when the in-memory cache is empty
+    _DETAILS_CACHE.clear()
+    assert load_collection_details(collection, cache_dir=cache_dir) == expected
+
+    # Changing the file invalidates both caches
+    galaxy_yml.write_text(
+        "namespace: foo\nname: bar\nversion: 2.0.0\n", encoding="utf-8"
+    )
+    assert load_collection_details(
+        collection, cache_dir=cache_dir
+    ) == CollectionDetails(namespace="foo", name="bar", version="2.0.0")
+
+    # Corrupt cache entries are ignored
+    (cache_file,) = (cache_dir / "metadata").iterdir()
+    for content in ("[]", "null", '{"details": 1}'):
+        cache_file.write_text(content, encoding="utf-8")
+        _DETAILS_CACHE.clear()
+        assert load_collection_details(
+            collection, cache_dir=cache_dir
+        ) == CollectionDetails(namespace="foo", name="bar", version="2.0.0")
@@ -0,0 +1,131 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from antsibull_tool import client, daemon
+from antsibull_tool.client import run_in_daemon
+
+
+@pytest.fixture
+def daemon_socket(tmp_path):
+    socket_path = tmp_path / "daemon.sock"
+    with subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "antsibull_tool.cli",
+            "daemon",
+            "--socket",
+            str(socket_path),
+            "--idle-timeout",
+            "30",
+        ],
+    ) as daemon:
+        try:
+            for _ in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.1)
+            yield socket_path
+        finally:
+            daemon.terminate()
+            daemon.wait()
+    assert not socket_path.exists()
+
+
+def test_run_in_daemon(daemon_socket, tmp_path, capfd):
+    collection = tmp_path / "collection"
+    collection.mkdir()
+    (collection / "galaxy.yml").write_text(
+        "namespace: foo\nname: bar\n", encoding="utf-8"
+    )
+    args = [
+        "antsibull-tool",
+        "run-local-collection",
+        "--vcs=none",
+        "--",
+        "sh",
+        "-c",
+        "echo $VALUE; echo error >&2; exit 3",
+    ]
+
+    returncode = run_in_daemon(
+        daemon_socket, args, cwd=collection, env={**os.environ, "VALUE": "forwarded"}
+    )
+    assert returncode == 3
+    out, err = capfd.readouterr()
+    assert out == "forwarded\n"
+    assert err == "error\n"
+
+    # Invalid arguments
+    assert (
+        run_in_daemon(
+            daemon_socket,
+            [*args[:2], "--jobs=0", "true"],
+            cwd=collection,
+            env=os.environ,
+        )
+        == 2
+    )
+    assert "--jobs must be at least 1" in capfd.readouterr().out
+
+
+def test_run_in_daemon_not_running(tmp_path):
+    assert (
+        run_in_daemon(
+            tmp_path / "missing.sock", ["antsibull-tool"], cwd=tmp_path, env=os.environ
+        )
+        is None
+    )
+
+
+def test_run_in_daemon_other_user(daemon_socket, tmp_path, capfd, monkeypatch):
+    monkeypatch.setattr(client, "get_peer_uid", lambda sock: os.getuid() + 1)
+    returncode = run_in_daemon(
+        daemon_socket,
+        ["antsibull-tool", "run-local-collection", "--vcs=none", "--", "echo", "ran"],
+        cwd=tmp_path,
+        env=os.environ,
+    )
+    assert returncode is None
+    out, err = capfd.readouterr()
+    assert out == ""
+    assert "belongs to another user" in err
+
+
+def test_run_in_daemon_silent_client(daemon_socket, tmp_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as silent:
+        silent.connect(str(daemon_socket))
+        # The daemon must not wait for this client before serving the next one
+        start = time.monotonic()
+        returncode = run_in_daemon(
+            daemon_socket,
+            ["antsibull-tool", "run-local-collection", "--vcs=none", "--", "true"],
+            cwd=tmp_path,
+            env=os.environ,
+        )
+        assert returncode is not None
+        assert time.monotonic() - start < daemon._REQUEST_TIMEOUT + 5
+
+
+def test_bind_stale_socket_not_removable(tmp_path, monkeypatch):
+    socket_path = tmp_path / "daemon.sock"
+    socket_path.write_text("", encoding="utf-8")
+
+    def unlink(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(daemon.os, "unlink", unlink)
+    with pytest.raises(ValueError, match="Cannot remove the stale socket"):
+        daemon._bind(str(socket_path))
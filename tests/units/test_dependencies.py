@@ -0,0 +1,116 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import json
+
+from antsibull_tool.collection import CollectionDetails
+from antsibull_tool.dependencies import (
+    DependencyResolver,
+    build_collections_path,
+    get_collections_environment,
+    get_sibling_directories,
+)
+
+
+def _create_checkout(path, namespace, name, version, dependencies=None):
+    path.mkdir(parents=True)
+    lines = [f"namespace: {namespace}", f"name: {name}", f"version: {version}"]
+    if dependencies:
+        lines.append("dependencies:")
+        lines.extend(f"  {dep}: '{spec}'" for dep, spec in dependencies.items())
+    (path / "galaxy.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _create_installed(collections_path, namespace, name, version):
+    path = collections_path / "ansible_collections" / namespace / name
+    path.mkdir(parents=True)
+    manifest = {
+        "collection_info": {"namespace": namespace, "name": name, "version": version}
+    }
+    (path / "MANIFEST.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return path
+
+
+def test_resolve_dependencies(tmp_path):
+    checkouts = tmp_path / "checkouts"
+    installed = tmp_path / "installed"
+    _create_checkout(
+        checkouts / "x", "community", "x", "2.1.0", {"community.y": ">=1.0.0"}
+    )
+    _create_checkout(checkouts / "y", "community", "y", "0.9.0")
+    y_path = _create_installed(installed, "community", "y", "1.5.0")
+    _create_installed(installed, "community", "z", "1.0.0")
+
+    resolver = DependencyResolver(
+        checkout_dirs=[checkouts], collections_paths=[installed]
+    )
+    result = resolver.resolve(
+        [
+            CollectionDetails(
+                namespace="foo",
+                name="bar",
+                dependencies={
+                    "community.x": ">=2.0.0,<3.0.0",
+                    "community.z": "2.0.0",
+                    "foo.bar": "*",
+                },
+            )
+        ]
+    )
+
+    assert [
+        (str(candidate.path), candidate.details.version)
+        for candidate in result.resolved
+    ] == [
+        (str(checkouts / "x"), "2.1.0"),
+        # The checkout has a too old version
+        (str(y_path), "1.5.0"),
+    ]
+    assert result.unresolved == ["community.z:2.0.0 (required by foo.bar)"]
+
+
+def test_get_sibling_directories(tmp_path):
+    (tmp_path / "ansible_collections/foo/bar").mkdir(parents=True)
+    (tmp_path / "ansible_collections/community/baz").mkdir(parents=True)
+
+    assert get_sibling_directories(tmp_path / "ansible_collections/foo/bar") == [
+        tmp_path / "ansible_collections/foo",
+        tmp_path / "ansible_collections/community",
+    ]
+    assert get_sibling_directories(tmp_path / "foo") == [tmp_path]
+
+
+def test_build_collections_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    root = tmp_path / "root"
+    installed = tmp_path / "installed"
+    for directory in (root, installed, tmp_path / ".ansible/collections"):
+        directory.mkdir(parents=True)
+    (tmp_path / "link").symlink_to(installed)
+
+    existing = [
+        str(installed),
+        "",
+        str(tmp_path / "missing"),
+        f"{installed}/",
+        str(tmp_path / "link"),
+        "~/.ansible/collections",
+        str(root),
+    ]
+    assert build_collections_path(root, existing) == [
+        str(root),
+        str(installed),
+        str(tmp_path / ".ansible/collections"),
+    ]
+    assert build_collections_path(root, existing, pin=True) == [str(root)]
+
+    env = {"ANSIBLE_COLLECTIONS_PATHS": str(installed), "OTHER": "1"}
+    overlay = get_collections_environment(root, env)
+    assert overlay["ANSIBLE_COLLECTIONS_PATH"] == f"{root}:{installed}"
+    assert overlay["ANSIBLE_COLLECTIONS_PATHS"] == f"{root}:{installed}"
+    assert overlay["OTHER"] == "1"
+    assert env["ANSIBLE_COLLECTIONS_PATHS"] == str(installed)
@@ -0,0 +1,118 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+import pytest
+
+from antsibull_tool.execute import Command, aggregate_returncodes, run_commands
+from antsibull_tool.limits import TIMEOUT_RETURNCODE, ResourceLimits
+from antsibull_tool.output import OutputLog
+
+
+@pytest.mark.parametrize(
+    "returncodes, expected",
+    [
+        ([], 0),
+        ([0, 0], 0),
+        ([0, 3, 1], 3),
+        ([2, 0], 2),
+    ],
+)
+def test_aggregate_returncodes(returncodes, expected):
+    assert aggregate_returncodes(returncodes) == expected
+
+
+def test_run_commands(tmp_path, capfd):
+    commands = [
+        Command(
+            argv=[sys.executable, "-c", "import os; print(os.getcwd())"],
+            cwd=str(tmp_path),
+            label="1",
+        ),
+        Command(
+            argv=[
+                sys.executable,
+                "-c",
+                "import sys; print('a\\nb', file=sys.stderr); sys.exit(4)",
+            ],
+            cwd=str(tmp_path),
+            label="foo.bar",
+        ),
+    ]
+    assert run_commands(commands, env=os.environ, jobs=1) == 4
+    out, err = capfd.readouterr()
+    assert out == f"[1] {tmp_path}\n"
+    assert "[foo.bar] a\n[foo.bar] b\n" in err
+    assert "[foo.bar] Exited with return code 4\n" in err
+
+
+def test_run_commands_output_log(tmp_path, capfd):
+    commands = [
+        Command(
+            argv=[
+                sys.executable,
+                "-c",
+                "import sys; print('out'); print('err', file=sys.stderr)",
+            ],
+            cwd=str(tmp_path),
+            label="foo.bar",
+        ),
+    ]
+    with OutputLog(tmp_path / "output.jsonl", output_format="jsonl") as output_log:
+        assert (
+            run_commands(commands, env=os.environ, jobs=1, output_log=output_log) == 0
+        )
+    out, _err = capfd.readouterr()
+    assert out == "[foo.bar] out\n"
+
+    with open(tmp_path / "output.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert {record["label"] for record in records} == {"foo.bar"}
+    assert [
+        (record["stream"], record["line"])
+        for record in records
+        if record["stream"] != "status"
+    ] in (
+        [("stdout", "out"), ("stderr", "err")],
+        [("stderr", "err"), ("stdout", "out")],
+    )
+    assert records[-1]["line"] == "Exited with return code 0"
+
+
+def test_run_commands_timeout(tmp_path, capfd):
+    commands = [
+        Command(argv=["sleep", "30"], cwd=str(tmp_path), label="1"),
+        Command(argv=["true"], cwd=str(tmp_path), label="2"),
+    ]
+    returncode = run_commands(
+        commands, env=os.environ, jobs=2, limits=ResourceLimits(timeout=0.5)
+    )
+    assert returncode == TIMEOUT_RETURNCODE
+    _out, err = capfd.readouterr()
+    assert "[1] Timed out after 0.5s\n" in err
+    assert "[2] Exited with return code 0\n" in err
+
+
+def test_run_commands_preexec_failure(tmp_path, capfd, monkeypatch):
+    def apply(self):
+        raise OSError("cannot apply")
+
+    # The forked interpreter inherits the patched method
+    monkeypatch.setattr(ResourceLimits, "apply", apply)
+    commands = [
+        Command(argv=["true"], cwd=str(tmp_path), label="1"),
+        Command(argv=["true"], cwd=str(tmp_path), label="2"),
+    ]
+    returncode = run_commands(
+        commands, env=os.environ, jobs=2, limits=ResourceLimits(nice=1)
+    )
+    assert returncode == 127
+    _out, err = capfd.readouterr()
+    assert "[1] Cannot run command: " in err
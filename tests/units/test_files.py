@@ -0,0 +1,104 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import pytest
+
+from antsibull_tool.files import (
+    FileFilter,
+    get_changed_files_patterns,
+    get_files_size,
+    list_files,
+)
+
+FILES = [
+    "galaxy.yml",
+    "README.md",
+    "docs/docsite/rst/guide.rst",
+    "plugins/modules/foo.py",
+    "plugins/module_utils/bar.py",
+    "tests/unit/plugins/modules/test_foo.py",
+    "tests/output/.tmp/junk",
+]
+
+FILTER_DATA = [
+    (FileFilter(), FILES),
+    (
+        FileFilter(include=["plugins"]),
+        ["galaxy.yml", "plugins/modules/foo.py", "plugins/module_utils/bar.py"],
+    ),
+    (
+        FileFilter(include=["plugins", "tests/unit"], exclude=["*/module_utils"]),
+        [
+            "galaxy.yml",
+            "plugins/modules/foo.py",
+            "tests/unit/plugins/modules/test_foo.py",
+        ],
+    ),
+    (
+        FileFilter(exclude=["docs", "tests/output", "*.md", "galaxy.yml"]),
+        [
+            "galaxy.yml",
+            "plugins/modules/foo.py",
+            "plugins/module_utils/bar.py",
+            "tests/unit/plugins/modules/test_foo.py",
+        ],
+    ),
+]
+
+
+@pytest.mark.parametrize("file_filter, expected", FILTER_DATA)
+def test_file_filter(file_filter, expected):
+    assert file_filter.apply(FILES) == expected
+
+
+def test_list_files_filter(tmp_path):
+    for file in FILES:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text("", encoding="utf-8")
+
+    assert sorted(list_files(tmp_path, "none", FileFilter(include=["docs"]))) == [
+        "docs/docsite/rst/guide.rst",
+        "galaxy.yml",
+    ]
+
+
+def test_get_files_size(tmp_path):
+    (tmp_path / "a").write_text("abc", encoding="utf-8")
+    (tmp_path / "b").write_text("de", encoding="utf-8")
+
+    assert get_files_size(tmp_path, ["a", "b", "missing"]) == 5
+
+
+def test_get_changed_files_patterns():
+    files = [
+        "galaxy.yml",
+        "plugins/modules/foo.py",
+        "plugins/modules/bar.py",
+        "plugins/module_utils/common.py",
+        "docs/docsite/rst/guide.rst",
+        "tests/unit/plugins/modules/conftest.py",
+        "tests/unit/plugins/modules/test_foo.py",
+        "tests/unit/plugins/modules/test_bar.py",
+        "tests/integration/targets/foo/aliases",
+        "tests/integration/targets/foo/tasks/main.yml",
+        "tests/integration/targets/bar/tasks/main.yml",
+        "tests/sanity/ignore-2.17.txt",
+    ]
+    patterns = get_changed_files_patterns(
+        ["plugins/modules/foo.py", "tests/integration/targets/foo/aliases"]
+    )
+    assert FileFilter(include=patterns).apply(files) == [
+        "galaxy.yml",
+        "plugins/modules/foo.py",
+        "plugins/module_utils/common.py",
+        "tests/unit/plugins/modules/conftest.py",
+        "tests/integration/targets/foo/aliases",
+        "tests/integration/targets/foo/tasks/main.yml",
+        "tests/sanity/ignore-2.17.txt",
+    ]
+    # Changed files are not treated as patterns
+    assert get_changed_files_patterns(["plugins/[a].py"])[-1] == "plugins/[[]a].py"
@@ -0,0 +1,125 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import os
+import resource
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from antsibull_tool.limits import TIMEOUT_RETURNCODE, ResourceLimits, run_with_limits
+
+
+def test_resource_limits_bool():
+    assert not ResourceLimits()
+    assert ResourceLimits(nice=1)
+
+
+def test_run_with_limits(tmp_path):
+    output = tmp_path / "output.txt"
+    code = (
+        "import os, resource, sys\n"
+        "with open(sys.argv[1], 'w') as f:\n"
+        "    f.write(f'{os.nice(0)} {resource.getrlimit(resource.RLIMIT_AS)[0]}')\n"
+        "sys.exit(3)\n"
+    )
+    limits = ResourceLimits(max_memory=2 * 1024**3, nice=3)
+
+    returncode, usage, timed_out = run_with_limits(
+        [sys.executable, "-c", code, str(output)],
+        cwd=str(tmp_path),
+        env=os.environ,
+        limits=limits,
+    )
+    assert (returncode, timed_out) == (3, False)
+    assert usage.max_rss > 0
+    assert output.read_text(encoding="utf-8") == (
+        f"{min(os.nice(0) + 3, 19)} {2 * 1024**3}"
+    )
+
+
+def test_run_with_limits_timeout(tmp_path):
+    pid_file = tmp_path / "pid"
+    returncode, usage, timed_out = run_with_limits(
+        ["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"],
+        cwd=str(tmp_path),
+        env=os.environ,
+        limits=ResourceLimits(timeout=0.5),
+    )
+    assert (returncode, timed_out) == (TIMEOUT_RETURNCODE, True)
+    assert usage.wall < 10
+
+    # The whole process group was killed
+    pid = int(pid_file.read_text(encoding="utf-8"))
+    for _ in range(50):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("Background process is still running")
+
+
+def test_resource_limits_validate(monkeypatch):
+    monkeypatch.setattr(os, "geteuid", lambda: 1000)
+    ResourceLimits(nice=1).validate()
+    with pytest.raises(ValueError, match="Only root can decrease the niceness"):
+        ResourceLimits(nice=-1).validate()
+
+    monkeypatch.setattr(resource, "getrlimit", lambda limit: (100, 100))
+    ResourceLimits(max_memory=100, max_cpu_time=100).validate()
+    with pytest.raises(ValueError, match="memory limit 101 exceeds the hard limit"):
+        ResourceLimits(max_memory=101).validate()
+    with pytest.raises(ValueError, match="CPU time limit 101 exceeds the hard limit"):
+        ResourceLimits(max_cpu_time=101).validate()
+
+
+def test_run_with_limits_terminal(tmp_path):
+    # Run in a new session whose controlling terminal is a pseudo terminal
+    script = textwrap.dedent(f"""
+        import fcntl, os, sys, termios
+        from antsibull_tool.limits import ResourceLimits, run_with_limits
+
+        fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+        code = "import os; print(os.tcgetpgrp(0) == os.getpgrp(), os.getpgrp() == os.getpid())"
+        with open({str(tmp_path / "output.txt")!r}, "w") as f:
+            returncode, _usage, _timed_out = run_with_limits(
+                [sys.executable, "-c", code],
+                cwd=os.getcwd(),
+                env=os.environ,
+                limits=ResourceLimits(nice=1),
+            )
+            f.write(f"{{returncode}} {{os.tcgetpgrp(0) == os.getpgrp()}}")
+        """)
+    primary, secondary = os.openpty()
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-c", script],
+            stdin=secondary,
+            stdout=secondary,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+            check=False,
+            timeout=30,
+        )
+        os.close(secondary)
+        secondary = -1
+        output = os.read(primary, 1024)
+    finally:
+        os.close(primary)
+        if secondary != -1:
+            os.close(secondary)
+    assert proc.returncode == 0, proc.stderr
+
+    # The command's own process group was the foreground process group, and the
+    # terminal was handed back afterwards
+    assert b"True True" in output
+    assert (tmp_path / "output.txt").read_text(encoding="utf-8") == "0 True"
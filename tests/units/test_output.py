@@ -0,0 +1,37 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import re
+
+from antsibull_tool.output import OutputLog
+
+
+def test_output_log_text(tmp_path):
+    path = tmp_path / "output.log"
+    with OutputLog(path) as output_log:
+        output_log.write("stdout", None, b"hello")
+        output_log.write("stderr", "foo.bar", b"\xffworld")
+
+    lines = path.read_bytes().splitlines()
+    assert re.match(rb"^\d{4}-\d\d-\d\dT[\d:.]+\+00:00 stdout hello$", lines[0])
+    assert lines[1].endswith(b" stderr [foo.bar] \xffworld")
+
+
+def test_output_log_rotation(tmp_path):
+    path = tmp_path / "output.log"
+    with OutputLog(path, max_size=100, backups=2) as output_log:
+        for index in range(10):
+            output_log.write("stdout", None, f"line {index}".encode("utf-8"))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "output.log",
+        "output.log.1",
+        "output.log.2",
+    ]
+    for file in tmp_path.iterdir():
+        assert 0 < file.stat().st_size <= 100
+    assert path.read_text(encoding="utf-8").endswith(" stdout line 9\n")
@@ -0,0 +1,151 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import shutil
+
+from antsibull_tool import results
+from antsibull_tool.results import ResultCache, compute_key
+
+
+def _make_tree(root):
+    collection = root / "foo" / "bar"
+    (collection / "plugins").mkdir(parents=True)
+    (collection / "plugins" / "module.py").write_text("x = 1\n", encoding="utf-8")
+    (collection / "__pycache__").mkdir()
+    (collection / "__pycache__" / "foo.pyc").write_bytes(b"1")
+    (collection / "tests" / "output").mkdir(parents=True)
+    (collection / "tests" / "output" / "result.json").write_text("{}")
+    return collection
+
+
+def test_hash_tree(tmp_path):
+    root = tmp_path / "ansible_collections"
+    collection = _make_tree(root)
+    with ResultCache(tmp_path / "cache", max_size=1024) as cache:
+        tree_hash = cache.hash_tree(root)
+        assert cache.hash_tree(root) == tree_hash
+
+        # Test output and bytecode are not part of the hash
+        (collection / "tests" / "output" / "result.json").write_text("[]")
+        (collection / "__pycache__" / "bar.pyc").write_bytes(b"2")
+        assert cache.hash_tree(root) == tree_hash
+
+        (collection / "plugins" / "module.py").write_text("x = 2\n", encoding="utf-8")
+        changed_hash = cache.hash_tree(root)
+        assert changed_hash != tree_hash
+
+        (collection / "plugins" / "module.py").chmod(0o755)
+        assert cache.hash_tree(root) != changed_hash
+
+
+def test_hash_tree_no_transaction(tmp_path, monkeypatch):
+    # Other processes sharing the cache must not be blocked while hashing
+    root = tmp_path / "ansible_collections"
+    _make_tree(root)
+    with ResultCache(tmp_path / "cache", max_size=1024) as cache:
+        hash_file = results._hash_file
+
+        def check_hash_file(path):
+            assert not cache.db.in_transaction
+            return hash_file(path)
+
+        monkeypatch.setattr(results, "_hash_file", check_hash_file)
+        cache.hash_tree(root)
+
+
+def test_hash_tree_memo(tmp_path):
+    def count_hashes(cache):
+        return cache.db.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+
+    with ResultCache(tmp_path / "cache", max_size=1024) as cache:
+        # Temporary trees are new copies every time, their hashes are not remembered
+        temporary = tmp_path / "temporary" / "ansible_collections"
+        _make_tree(temporary)
+        tree_hash = cache.hash_tree(temporary, persistent=False)
+        assert count_hashes(cache) == 0
+
+        persistent = tmp_path / "persistent" / "ansible_collections"
+        collection = _make_tree(persistent)
+        (collection / "plugins" / "other.py").write_text("y = 1\n", encoding="utf-8")
+        cache.hash_tree(persistent)
+        assert count_hashes(cache) == 2
+
+        # Hashes of removed files and trees are forgotten
+        (collection / "plugins" / "other.py").unlink()
+        assert cache.hash_tree(persistent) == tree_hash
+        assert count_hashes(cache) == 1
+
+        shutil.rmtree(persistent)
+        cache.hash_tree(temporary)
+        assert count_hashes(cache) == 1
+        cache.hash_tree(temporary)
+        assert count_hashes(cache) == 1
+
+
+def test_compute_key():
+    key = compute_key("tree", [["ansible-test", "sanity"]], {"A": "1"}, {"v": 1})
+    assert key == compute_key(
+        "tree", [["ansible-test", "sanity"]], {"A": "1"}, {"v": 1}
+    )
+    assert key != compute_key("tree", [["ansible-test", "units"]], {"A": "1"}, {"v": 1})
+    assert key != compute_key(
+        "tree", [["ansible-test", "sanity"]], {"A": "2"}, {"v": 1}
+    )
+    assert key != compute_key(
+        "tree", [["ansible-test", "sanity"]], {"A": "1"}, {"v": 1}, template=True
+    )
+    assert key != compute_key(
+        "tree", [["ansible-test", "sanity"]], {"A": "1"}, {"v": 1}, cwd="/foo"
+    )
+
+
+def test_store_replay_evict(tmp_path, capsysbinary):
+    with ResultCache(tmp_path / "cache", max_size=200) as cache:
+        assert cache.replay("first") is None
+
+        with cache.capture() as capture:
+            capture.write("stdout", None, b"hello")
+            capture.write("stderr", None, b"warning")
+            cache.store("first", 0, capture)
+
+        assert cache.replay("first") == 0
+        out, err = capsysbinary.readouterr()
+        assert out == b"hello\n"
+        assert err == b"warning\n"
+
+        # Storing more results than fit removes the least recently used ones
+        for key in ("second", "third", "fourth"):
+            with cache.capture() as capture:
+                capture.write("stdout", None, key.encode("utf-8"))
+                cache.store(key, 0, capture)
+        assert cache.replay("first") is None
+        assert cache.replay("fourth") == 0
+
+    assert not list((tmp_path / "cache" / "outputs").glob("*.tmp"))
+
+
+def test_replay_exact(tmp_path, capsysbinary):
+    with ResultCache(tmp_path / "cache", max_size=10_000) as cache:
+        with cache.capture() as capture:
+            # A single command: its status lines are only written to the output log
+            capture.write("status", None, b"$ foo")
+            capture.write("stdout", None, b"caf\xe9 \xff")
+            capture.write("stdout", None, b"no newline", newline=False)
+            cache.store("single", 0, capture)
+        with cache.capture() as capture:
+            capture.write("status", "1", b"$ foo")
+            capture.write("stdout", "1", b"partial", newline=False)
+            capture.write("status", "1", b"Exited with return code 0")
+            cache.store("multiple", 0, capture)
+
+        assert cache.replay("single") == 0
+        assert capsysbinary.readouterr() == (b"caf\xe9 \xff\nno newline", b"")
+        assert cache.replay("multiple") == 0
+        assert capsysbinary.readouterr() == (
+            b"[1] partial\n",
+            b"[1] $ foo\n[1] Exited with return code 0\n",
+        )
@@ -0,0 +1,73 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import os
+import stat
+
+from antsibull_tool import store as store_module
+from antsibull_tool.store import ObjectStore
+
+
+def test_object_store_add(tmp_path):
+    (tmp_path / "a.txt").write_text("content", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("content", encoding="utf-8")
+    (tmp_path / "c.sh").write_text("content", encoding="utf-8")
+    (tmp_path / "c.sh").chmod(0o755)
+
+    with ObjectStore(tmp_path / "store") as store:
+        object_a = store.add(tmp_path / "a.txt")
+        object_b = store.add(tmp_path / "b.txt")
+        object_c = store.add(tmp_path / "c.sh")
+
+    # Identical content is stored once, the executable bit is part of the name
+    assert object_a == object_b
+    assert object_c == f"{object_a}x"
+    assert stat.S_IMODE(os.stat(object_a).st_mode) == 0o444
+    assert stat.S_IMODE(os.stat(object_c).st_mode) == 0o555
+    assert os.listdir(tmp_path / "store" / "tmp") == []
+
+
+def test_object_store_index(tmp_path, monkeypatch):
+    source = tmp_path / "a.txt"
+    source.write_text("content", encoding="utf-8")
+    with ObjectStore(tmp_path / "store") as store:
+        object_path = store.add(source)
+
+    def fail(path):
+        raise AssertionError(f"{path} should not be hashed")
+
+    # The index survives reopening the store
+    with ObjectStore(tmp_path / "store") as store:
+        with monkeypatch.context() as m:
+            m.setattr(store_module, "_hash_file", fail)
+            assert store.add(source) == object_path
+
+        # Changed files are hashed again
+        source.write_text("other content", encoding="utf-8")
+        assert store.add(source) != object_path
+
+
+def test_object_store_collect_garbage(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.txt").write_text(name * 10, encoding="utf-8")
+
+    with ObjectStore(tmp_path / "store") as store:
+        object_a = store.add(tmp_path / "a.txt")
+        object_b = store.add(tmp_path / "b.txt")
+        object_c = store.add(tmp_path / "c.txt")
+        # a is linked into a tree
+        os.link(object_a, tmp_path / "tree_a.txt")
+
+        assert store.collect_garbage(1000) == 0
+        # Linked objects do not count towards the size
+        assert store.collect_garbage(20) == 0
+        assert os.path.exists(object_c)
+        assert store.collect_garbage(0) == 2
+
+    assert os.path.exists(object_a)
+    assert not os.path.exists(object_b)
+    assert not os.path.exists(object_c)
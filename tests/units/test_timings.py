@@ -0,0 +1,105 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import contextlib
+import json
+import subprocess
+import sys
+
+import pytest
+
+from antsibull_tool.timings import Timings
+
+
+def test_timings(tmp_path):
+    timings = Timings()
+    with timings.phase("first") as phase:
+        phase.files = 2
+        phase.bytes = 123
+    with timings.phase("second"):
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+
+    assert [phase.name for phase in timings.phases] == ["first", "second"]
+    assert timings.phases[1].wall > 0
+    assert timings.phases[1].children_cpu >= 0
+
+    report = timings.format_report().splitlines()
+    assert report[0].startswith("Phase")
+    assert report[1].startswith("first")
+    assert report[1].endswith("       2          123")
+    assert report[-1].startswith("Total")
+
+    timings.write_json(tmp_path / "timings.json")
+    data = json.loads((tmp_path / "timings.json").read_text(encoding="utf-8"))
+    assert data["phases"][0]["files"] == 2
+    assert data["phases"][1]["bytes"] is None
+    assert data["total"]["wall"] == pytest.approx(
+        sum(phase.wall for phase in timings.phases)
+    )
+
+
+def test_timings_phase_exception():
+    timings = Timings()
+    with pytest.raises(ValueError):
+        with timings.phase("failing"):
+            raise ValueError("test")
+    assert [phase.name for phase in timings.phases] == ["failing"]
+
+
+def test_timed_context():
+    events = []
+
+    @contextlib.contextmanager
+    def context():
+        events.append("enter")
+        yield 42
+        events.append("exit")
+
+    timings = Timings()
+    with timings.timed_context(context(), setup="setup", cleanup="cleanup") as value:
+        assert value == 42
+        with timings.phase("inner"):
+            pass
+    assert events == ["enter", "exit"]
+    assert [phase.name for phase in timings.phases] == ["setup", "inner", "cleanup"]
+
+
+def test_timings_notes():
+    timings = Timings()
+    with timings.phase("first"):
+        pass
+    timings.notes["collections_path"] = "/tmp/root"
+    assert timings.format_report().splitlines()[-1] == "collections_path: /tmp/root"
+    assert timings.as_dict()["notes"] == {"collections_path": "/tmp/root"}
+
+
+def test_timings_nested():
+    timings = Timings()
+    with timings.phase("outer") as outer:
+        with timings.phase("inner"):
+            pass
+    with timings.phase("last"):
+        pass
+    # Phases of other threads are added to outer explicitly
+    with timings.phase("other", parent=outer):
+        with timings.phase("deep"):
+            pass
+
+    assert [(phase.name, phase.parent) for phase in timings.phases] == [
+        ("outer", None),
+        ("inner", "outer"),
+        ("last", None),
+        ("other", "outer"),
+        ("deep", "other"),
+    ]
+    # Only phases that are not part of another one are summed up
+    last = timings.phases[2]
+    assert timings.as_dict()["total"]["wall"] == pytest.approx(outer.wall + last.wall)
+    report = [line.split()[0] for line in timings.format_report().splitlines()]
+    assert report == ["Phase", "outer", "inner", "other", "deep", "last", "Total"]
+    lines = timings.format_report().splitlines()
+    assert lines[2].startswith("  inner ")
+    assert lines[4].startswith("    deep ")
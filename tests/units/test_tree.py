@@ -0,0 +1,304 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from antsibull_tool.files import walk_files
+from antsibull_tool.store import ObjectStore
+from antsibull_tool.tree import (
+    CollectionRoot,
+    SyncStats,
+    get_cache_key,
+    select_tmp_root,
+    sync_tree,
+    update_tree,
+)
+
+
+def _create_files(base, files: dict[str, str]) -> None:
+    for path, content in files.items():
+        full_path = base / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content, encoding="utf-8")
+
+
+def test_sync_tree(tmp_path):
+    source = tmp_path / "source"
+    dest = tmp_path / "dest"
+    _create_files(
+        source,
+        {
+            "galaxy.yml": "namespace: foo\nname: bar\n",
+            "plugins/modules/a.py": "a",
+            "plugins/modules/b.py": "b",
+            "ignored.txt": "ignored",
+        },
+    )
+    (source / "link.py").symlink_to("plugins/modules/a.py")
+    files = ["galaxy.yml", "plugins/modules/a.py", "plugins/modules/b.py", "link.py"]
+
+    stats = sync_tree(source, dest, files)
+    assert stats == SyncStats(copied=4, copied_bytes=27)
+    assert sorted(walk_files(dest)) == sorted(files)
+    assert os.readlink(dest / "link.py") == "plugins/modules/a.py"
+
+    # Nothing changed
+    stats = sync_tree(source, dest, files)
+    assert stats == SyncStats(unchanged=4)
+
+    # Only the modification time changed
+    os.utime(source / "galaxy.yml", ns=(0, 0))
+    stats = sync_tree(source, dest, files)
+    assert stats == SyncStats(unchanged=4)
+    assert (dest / "galaxy.yml").stat().st_mtime_ns == 0
+
+    # Modified, removed, and extra files
+    (source / "plugins/modules/a.py").write_text("aa", encoding="utf-8")
+    (dest / "tests/output").mkdir(parents=True)
+    (dest / "tests/output/result.txt").write_text("", encoding="utf-8")
+    files.remove("plugins/modules/b.py")
+    stats = sync_tree(source, dest, files)
+    assert stats == SyncStats(copied=1, unchanged=2, deleted=2, copied_bytes=2)
+    assert sorted(walk_files(dest)) == sorted(files)
+    assert (dest / "plugins/modules/a.py").read_text(encoding="utf-8") == "aa"
+
+    # Bytecode is kept if requested
+    (dest / "plugins/modules/__pycache__").mkdir()
+    (dest / "plugins/modules/__pycache__/a.cpython-311.pyc").write_bytes(b"")
+    stats = sync_tree(source, dest, files, keep_bytecode=True)
+    assert stats == SyncStats(unchanged=3)
+    assert (dest / "plugins/modules/__pycache__/a.cpython-311.pyc").exists()
+    stats = sync_tree(source, dest, files)
+    assert stats == SyncStats(unchanged=3, deleted=1)
+    assert not (dest / "plugins/modules/__pycache__").exists()
+
+
+def test_update_tree(tmp_path):
+    source = tmp_path / "source"
+    dest = tmp_path / "dest"
+    _create_files(
+        source,
+        {"galaxy.yml": "namespace: foo\nname: bar\n", "plugins/modules/a.py": "a"},
+    )
+    sync_tree(source, dest, ["galaxy.yml", "plugins/modules/a.py"])
+    (dest / "tests/output").mkdir(parents=True)
+
+    (source / "plugins/modules/a.py").unlink()
+    _create_files(source, {"galaxy.yml": "changed", "docs/b.md": "b"})
+    stats = update_tree(
+        source, dest, ["galaxy.yml", "docs/b.md"], ["plugins/modules/a.py"]
+    )
+    assert stats == SyncStats(copied=2, deleted=1, copied_bytes=8)
+    assert (dest / "galaxy.yml").read_text(encoding="utf-8") == "changed"
+    assert (dest / "docs/b.md").read_text(encoding="utf-8") == "b"
+    # Directories that became empty are removed, other files are left alone
+    assert not (dest / "plugins").exists()
+    assert (dest / "tests/output").is_dir()
+
+
+def test_sync_tree_workers(tmp_path):
+    source = tmp_path / "source"
+    dest = tmp_path / "dest"
+    files = {f"plugins/modules/m{index}.py": str(index) for index in range(200)}
+    _create_files(source, files)
+    large = os.urandom(3 * 1024 * 1024)
+    (source / "large.bin").write_bytes(large)
+    (source / "large.bin").chmod(0o755)
+
+    stats = sync_tree(source, dest, [*files, "large.bin"], workers=4)
+    assert stats.copied == 201
+    assert stats.copied_bytes == len(large) + sum(len(c) for c in files.values())
+    assert (dest / "large.bin").read_bytes() == large
+    assert (dest / "large.bin").stat().st_mode & 0o777 == 0o755
+    assert (dest / "large.bin").stat().st_mtime_ns == (
+        source / "large.bin"
+    ).stat().st_mtime_ns
+    assert (dest / "plugins/modules/m42.py").read_text(encoding="utf-8") == "42"
+
+    stats = sync_tree(source, dest, [*files, "large.bin"], workers=4)
+    assert stats == SyncStats(unchanged=201)
+
+
+def test_collection_root_cached(tmp_path):
+    source = tmp_path / "source"
+    cache = tmp_path / "cache"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n"})
+    key = get_cache_key(source, "foo.bar")
+
+    with CollectionRoot(cache_dir=cache, key=key) as root:
+        stats = root.sync_collection(source, "foo", "bar", ["galaxy.yml"])
+        assert stats.copied == 1
+        collection_dir = root.collection_dir("foo", "bar")
+        assert collection_dir == str(
+            cache / "trees" / key / "collections/ansible_collections/foo/bar"
+        )
+    assert os.path.isfile(os.path.join(collection_dir, "galaxy.yml"))
+
+    with CollectionRoot(cache_dir=cache, key=key) as root:
+        stats = root.sync_collection(source, "foo", "bar", ["galaxy.yml"])
+        assert stats == SyncStats(unchanged=1)
+
+
+def test_collection_root_pool(tmp_path):
+    source = tmp_path / "source"
+    cache = tmp_path / "cache"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n"})
+    key = get_cache_key(source, "foo.bar")
+
+    with CollectionRoot(cache_dir=cache, key=key, pool_size=2) as first:
+        first.sync_collection(source, "foo", "bar", ["galaxy.yml"])
+        with CollectionRoot(cache_dir=cache, key=key, pool_size=2) as second:
+            # Trees in use are never shared
+            assert second.dir != first.dir
+            assert second.sync_collection(source, "foo", "bar", ["galaxy.yml"]) == (
+                SyncStats(copied=1, copied_bytes=25)
+            )
+        first_dir = first.dir
+
+    with CollectionRoot(cache_dir=cache, key=key, pool_size=2) as root:
+        assert root.dir == first_dir
+        # Only the changes since the tree was last used need to be synchronized
+        stats = root.sync_collection(source, "foo", "bar", ["galaxy.yml"])
+        assert stats == SyncStats(unchanged=1)
+
+
+def test_collection_root_temporary(tmp_path):
+    source = tmp_path / "source"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n"})
+
+    with CollectionRoot() as root:
+        root.sync_collection(source, "foo", "bar", ["galaxy.yml"])
+        root_dir = root.dir
+        assert os.path.isfile(
+            os.path.join(root.collection_dir("foo", "bar"), "galaxy.yml")
+        )
+    assert not os.path.exists(root_dir)
+
+
+@pytest.mark.parametrize("strategy", ["hardlink", "reflink"])
+def test_sync_tree_link_strategies(strategy, tmp_path):
+    source = tmp_path / "source"
+    dest = tmp_path / "dest"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n", "a.py": "a"})
+    files = ["galaxy.yml", "a.py"]
+
+    stats = sync_tree(source, dest, files, strategy=strategy)
+    # reflink falls back to copying on filesystems that do not support it
+    assert stats.copied + stats.linked == 2
+    assert (dest / "a.py").read_text(encoding="utf-8") == "a"
+    if strategy == "hardlink":
+        assert os.path.samefile(source / "a.py", dest / "a.py")
+
+    stats = sync_tree(source, dest, files, strategy=strategy)
+    assert stats == SyncStats(unchanged=2)
+
+    # Switching back to copying must not keep hardlinks to the source
+    stats = sync_tree(source, dest, files, strategy="copy")
+    assert not os.path.samefile(source / "a.py", dest / "a.py")
+
+
+def test_sync_tree_store(tmp_path):
+    source = tmp_path / "source"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n", "a.py": "a"})
+    files = ["galaxy.yml", "a.py"]
+
+    with ObjectStore(tmp_path / "store") as store:
+        stats = sync_tree(
+            source, tmp_path / "dest1", files, strategy="store", store=store
+        )
+        assert stats == SyncStats(linked=2)
+        stats = sync_tree(
+            source, tmp_path / "dest2", files, strategy="store", store=store
+        )
+        assert stats == SyncStats(linked=2)
+        stats = sync_tree(
+            source, tmp_path / "dest1", files, strategy="store", store=store
+        )
+        assert stats == SyncStats(unchanged=2)
+
+    # Both trees share the same object, which is not the source
+    assert os.path.samefile(tmp_path / "dest1/a.py", tmp_path / "dest2/a.py")
+    assert not os.path.samefile(source / "a.py", tmp_path / "dest1/a.py")
+
+    # Switching to copying replaces the links to the store's read-only objects
+    stats = sync_tree(source, tmp_path / "dest1", files, strategy="copy")
+    assert stats == SyncStats(copied=2, copied_bytes=26)
+    assert os.stat(tmp_path / "dest1/a.py").st_nlink == 1
+    assert os.stat(tmp_path / "dest1/a.py").st_mode & 0o200
+
+    with pytest.raises(ValueError, match="^store must be provided"):
+        sync_tree(source, tmp_path / "dest3", files, strategy="store")
+
+
+def test_sync_tree_store_concurrent_gc(tmp_path, monkeypatch):
+    source = tmp_path / "source"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n", "a.py": "a"})
+    files = ["galaxy.yml", "a.py"]
+    add = ObjectStore.add
+    collected: list[str] = []
+
+    def add_and_collect(self, path, st=None):
+        object_path = add(self, path, st)
+        if object_path not in collected:
+            # Another process removes the object before it is linked
+            collected.append(object_path)
+            os.unlink(object_path)
+        return object_path
+
+    monkeypatch.setattr(ObjectStore, "add", add_and_collect)
+    with ObjectStore(tmp_path / "store") as store:
+        stats = sync_tree(
+            source, tmp_path / "dest", files, strategy="store", store=store
+        )
+    assert stats == SyncStats(linked=2)
+    assert len(collected) == 2
+    assert (tmp_path / "dest" / "a.py").read_text(encoding="utf-8") == "a"
+    assert os.stat(tmp_path / "dest" / "a.py").st_nlink == 2
+
+
+def test_collection_root_symlink(tmp_path):
+    source = tmp_path / "source"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n"})
+
+    with CollectionRoot() as root:
+        stats = root.materialize_collection(
+            source, "foo", "bar", None, strategy="symlink"
+        )
+        assert stats == SyncStats(linked=1)
+        assert os.readlink(root.collection_dir("foo", "bar")) == str(source)
+    assert (source / "galaxy.yml").is_file()
+
+
+def test_collection_root_remove_other_collections(tmp_path):
+    source = tmp_path / "source"
+    _create_files(source, {"galaxy.yml": "namespace: foo\nname: bar\n"})
+
+    with CollectionRoot() as root:
+        for name in ("bar", "baz"):
+            root.materialize_collection(source, "foo", name, ["galaxy.yml"])
+        # Stray files are not namespaces
+        with open(
+            os.path.join(root.collections_dir, ".DS_Store"), "w", encoding="utf-8"
+        ):
+            pass
+        assert root.remove_other_collections({("foo", "bar")}) == 1
+        assert os.path.isdir(root.collection_dir("foo", "bar"))
+        assert not os.path.exists(root.collection_dir("foo", "baz"))
+
+
+def test_collection_root_tmp_root(tmp_path):
+    with CollectionRoot(tmp_root=tmp_path) as root:
+        assert os.path.dirname(root.dir) == str(tmp_path)
+    assert not os.path.exists(root.dir)
+
+
+def test_select_tmp_root(tmp_path):
+    assert select_tmp_root(100, tmpfs_dir=tmp_path, budget=100) == tmp_path
+    assert select_tmp_root(101, tmpfs_dir=tmp_path, budget=100) is None
+    assert select_tmp_root(1, tmpfs_dir=tmp_path / "missing", budget=100) is None
@@ -0,0 +1,212 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import os
+import subprocess
+
+import pytest
+
+from antsibull_tool import vcs
+from antsibull_tool.vcs import (
+    detect_vcs,
+    find_git_dir,
+    list_changed_files,
+    list_git_files_cached,
+)
+
+_OLD = 1_000_000_000_000_000_000
+
+
+def _settle(path) -> None:
+    # Make all timestamps old enough for the listing to be cached
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            os.utime(os.path.join(root, name), ns=(_OLD, _OLD))
+    os.utime(path, ns=(_OLD, _OLD))
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "plugins").mkdir(parents=True)
+    (repo / "galaxy.yml").write_text("namespace: foo\nname: bar\n", encoding="utf-8")
+    (repo / "plugins" / "a.py").write_text("", encoding="utf-8")
+    (repo / ".gitignore").write_text("*.pyc\n", encoding="utf-8")
+    (repo / "plugins" / "a.pyc").write_text("", encoding="utf-8")
+    subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+    subprocess.run(["git", "add", "galaxy.yml", "plugins"], cwd=repo, check=True)
+    return repo
+
+
+@pytest.fixture
+def count_git_calls(monkeypatch):
+    calls: list[str] = []
+    run_ls_files = vcs._run_ls_files
+
+    def wrapper(path):
+        calls.append(path)
+        return run_ls_files(path)
+
+    monkeypatch.setattr(vcs, "_run_ls_files", wrapper)
+    monkeypatch.setattr(vcs, "_LISTING_CACHE", {})
+    monkeypatch.setattr(vcs, "_DETECTED_LISTINGS", {})
+    monkeypatch.setattr(vcs, "_KEEP_LISTINGS", False)
+    return calls
+
+
+def test_find_git_dir(tmp_path):
+    assert find_git_dir(tmp_path) is None
+    (tmp_path / "repo" / ".git").mkdir(parents=True)
+    (tmp_path / "repo" / "sub").mkdir()
+    assert find_git_dir(tmp_path / "repo" / "sub") == str(tmp_path / "repo" / ".git")
+    (tmp_path / "worktree").mkdir()
+    (tmp_path / "worktree" / ".git").write_text(
+        "gitdir: ../repo/.git/worktrees/wt\n", encoding="utf-8"
+    )
+    assert find_git_dir(tmp_path / "worktree") == str(
+        tmp_path / "worktree" / "../repo/.git/worktrees/wt"
+    )
+
+
+def test_list_git_files_cached(git_repo, tmp_path, count_git_calls):
+    cache_dir = tmp_path / "cache"
+    _settle(git_repo)
+    expected = [".gitignore", "galaxy.yml", "plugins/a.py"]
+
+    assert sorted(list_git_files_cached(git_repo, cache_dir=cache_dir)) == expected
+    assert sorted(list_git_files_cached(git_repo, cache_dir=cache_dir)) == expected
+    assert len(count_git_calls) == 1
+
+    # The listing is reused from the disk cache
+    vcs._LISTING_CACHE.clear()
+    assert sorted(list_git_files_cached(git_repo, cache_dir=cache_dir)) == expected
+    assert len(count_git_calls) == 1
+
+    # A new untracked file invalidates the cache
+    (git_repo / "plugins" / "b.py").write_text("", encoding="utf-8")
+    _settle(git_repo / "plugins")
+    os.utime(git_repo / "plugins", ns=(_OLD + 1, _OLD + 1))
+    assert sorted(list_git_files_cached(git_repo, cache_dir=cache_dir)) == [
+        ".gitignore",
+        "galaxy.yml",
+        "plugins/a.py",
+        "plugins/b.py",
+    ]
+    assert len(count_git_calls) == 2
+
+
+def test_list_git_files_cached_inputs(git_repo, tmp_path, count_git_calls, monkeypatch):
+    config_home = tmp_path / "config"
+    (config_home / "git").mkdir(parents=True)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(config_home))
+    collection = git_repo / "collection"
+    (collection / "empty").mkdir(parents=True)
+    (collection / "x.txt").write_text("", encoding="utf-8")
+    (collection / "README.md").write_text("", encoding="utf-8")
+    _settle(git_repo)
+    _settle(config_home)
+    vcs.keep_listings()
+
+    def list_files(expected_calls):
+        files = sorted(list_git_files_cached(collection))
+        assert len(count_git_calls) == expected_calls
+        return files
+
+    assert list_files(1) == ["README.md", "x.txt"]
+    assert list_files(1) == ["README.md", "x.txt"]
+
+    # A new file in a directory that did not contain any listed file
+    (collection / "empty" / "new.py").write_text("", encoding="utf-8")
+    _settle(collection / "empty")
+    os.utime(collection / "empty", ns=(_OLD + 1, _OLD + 1))
+    assert list_files(2) == ["README.md", "empty/new.py", "x.txt"]
+
+    # A changed ignore file above the collection root
+    (git_repo / ".gitignore").write_text("*.pyc\n*.txt\n", encoding="utf-8")
+    os.utime(git_repo / ".gitignore", ns=(_OLD + 1, _OLD + 1))
+    assert list_files(3) == ["README.md", "empty/new.py"]
+
+    # A new global ignore file
+    (config_home / "git" / "ignore").write_text("*.md\n", encoding="utf-8")
+    os.utime(config_home / "git" / "ignore", ns=(_OLD, _OLD))
+    assert list_files(4) == ["empty/new.py"]
+    assert list_files(4) == ["empty/new.py"]
+
+    # Listings are not cached while Git is configured through the environment
+    monkeypatch.setenv("GIT_CONFIG_PARAMETERS", "'core.excludesfile'=''")
+    list_files(5)
+    list_files(6)
+
+
+def test_list_git_files_cached_recent_changes(git_repo, count_git_calls):
+    # Trees that were just modified are not cached
+    vcs.keep_listings()
+    list_git_files_cached(git_repo)
+    list_git_files_cached(git_repo)
+    assert len(count_git_calls) == 2
+
+
+def test_detect_vcs(git_repo, tmp_path, count_git_calls):
+    (tmp_path / "other").mkdir()
+    assert detect_vcs(tmp_path / "other") == "none"
+    assert not count_git_calls
+    assert detect_vcs(git_repo) == "git"
+    assert len(count_git_calls) == 1
+
+    # The next listing uses the result of the detection, later ones run git again
+    assert sorted(list_git_files_cached(git_repo)) == [
+        ".gitignore",
+        "galaxy.yml",
+        "plugins/a.py",
+    ]
+    assert len(count_git_calls) == 1
+    list_git_files_cached(git_repo)
+    assert len(count_git_calls) == 2
+
+
+def test_list_git_files_not_cached(git_repo, count_git_calls, monkeypatch):
+    # Without a cache directory, one-shot runs do not pay for the stamps
+    def get_stamps(*_args):
+        raise AssertionError("Stamps are not needed")
+
+    monkeypatch.setattr(vcs, "_get_stamps", get_stamps)
+    monkeypatch.setattr(vcs, "_run_git", get_stamps)
+    _settle(git_repo)
+    list_git_files_cached(git_repo)
+    list_git_files_cached(git_repo)
+    assert len(count_git_calls) == 2
+
+
+def test_list_changed_files(git_repo):
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=a", "-c", "user.email=a@b", *args],
+            cwd=git_repo,
+            check=True,
+            capture_output=True,
+        )
+
+    git("add", ".gitignore")
+    git("commit", "-q", "-m", "initial")
+    git("branch", "base")
+    (git_repo / "plugins" / "b.py").write_text("", encoding="utf-8")
+    git("add", "plugins/b.py")
+    git("commit", "-q", "-m", "add b")
+    (git_repo / "galaxy.yml").write_text("namespace: foo\nname: baz\n")
+    (git_repo / "plugins" / "a.py").unlink()
+    (git_repo / "plugins" / "c.py").write_text("", encoding="utf-8")
+
+    assert list_changed_files(git_repo, "base") == [
+        "galaxy.yml",
+        "plugins/b.py",
+        "plugins/c.py",
+    ]
+    # Paths are relative to the directory
+    assert list_changed_files(git_repo / "plugins", "base") == ["b.py", "c.py"]
+    with pytest.raises(ValueError, match="merge-base"):
+        list_changed_files(git_repo, "missing")
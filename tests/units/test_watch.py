@@ -0,0 +1,124 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or
+# https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+# SPDX-FileCopyrightText: 2026, Ansible Project
+
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+from antsibull_fileutils.copier import CopierError
+
+from antsibull_tool.watch import Changes, Watcher, diff_snapshots, take_snapshot
+
+
+def test_take_snapshot(tmp_path):
+    (tmp_path / "a.txt").write_text("abc", encoding="utf-8")
+    os.utime(tmp_path / "a.txt", ns=(1000, 1000))
+
+    assert take_snapshot(tmp_path, "none") == {"a.txt": (1000, 3)}
+
+
+def test_diff_snapshots():
+    old = {"a.txt": (1, 1), "b.txt": (1, 1), "c.txt": (1, 1)}
+    new = {"a.txt": (1, 1), "b.txt": (2, 1), "d.txt": (1, 1)}
+    assert diff_snapshots(old, new) == Changes(
+        added=["d.txt"], modified=["b.txt"], removed=["c.txt"]
+    )
+
+
+class _ScriptedWatcher(Watcher):
+    """
+    Returns the given snapshots one after the other, recording which runs
+    happened when each of them was taken, and then waits until cancelled.
+    """
+
+    def __init__(self, snapshots, runs, **kwargs):
+        super().__init__(Path("."), vcs="none", interval=0, debounce=0, **kwargs)
+        self.snapshots = list(snapshots)
+        self.runs = runs
+        self.runs_at_snapshot: list[list[str]] = []
+        self.done = asyncio.Event()
+
+    async def _snapshot(self):
+        self.runs_at_snapshot.append(list(self.runs))
+        if not self.snapshots:
+            self.done.set()
+            await asyncio.Future()
+        return self.snapshots.pop(0)
+
+
+def test_watcher():
+    synced: list[Changes] = []
+    runs: list[str] = []
+
+    async def run() -> int:
+        runs.append("started")
+        try:
+            await asyncio.Future()
+        except asyncio.CancelledError:
+            runs.append("cancelled")
+            raise
+        return 0
+
+    first = {"a.txt": (1, 1), "c.txt": (1, 1)}
+    changing = {"a.txt": (2, 1), "c.txt": (1, 1)}
+    changed = {"a.txt": (2, 1), "b.txt": (1, 1)}
+    watcher = _ScriptedWatcher(
+        [first, first, changing, changed, changed], runs, sync=synced.append, run=run
+    )
+
+    async def main() -> None:
+        task = asyncio.create_task(watcher.watch())
+        await watcher.done.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+
+    assert watcher.runs_at_snapshot == [
+        [],
+        ["started"],
+        ["started"],
+        # The run is cancelled on the first change, before the files stop changing
+        ["started", "cancelled"],
+        ["started", "cancelled"],
+        ["started", "cancelled", "started"],
+    ]
+    assert synced == [Changes(added=["b.txt"], modified=["a.txt"], removed=["c.txt"])]
+    assert runs == ["started", "cancelled", "started", "cancelled"]
+
+
+def test_watcher_sync_failure():
+    synced: list[Changes] = []
+
+    def sync(changes: Changes) -> None:
+        synced.append(changes)
+        if len(synced) == 1:
+            raise CopierError("changed while synchronizing")
+
+    async def run() -> int:
+        return 0
+
+    first = {"a.txt": (1, 1)}
+    second = {"a.txt": (2, 1)}
+    third = {"a.txt": (2, 1), "b.txt": (1, 1)}
+    watcher = _ScriptedWatcher(
+        [first, second, second, third, third], [], sync=sync, run=run
+    )
+
+    async def main() -> None:
+        task = asyncio.create_task(watcher.watch())
+        await watcher.done.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+
+    # Changes that could not be synchronized are synchronized with the next ones
+    assert synced == [
+        Changes(added=[], modified=["a.txt"], removed=[]),
+        Changes(added=["b.txt"], modified=["a.txt"], removed=[]),
+    ]